@@ -0,0 +1,224 @@
+"""Distribuição do orçamento diário de consultas por hora do dia e provider.
+
+como_onde separa o tráfego só em diurno/noturno e visualizacao_dados descarta
+`too many requests` e `timeout` como ruído. Aqui a conversão é medida por hora
+do dia × provider e o orçamento é distribuído para maximizar o MCU esperado:
+
+    valor de uma consulta na célula (hora, provider) = taxa · margem_contrato - custo_consulta
+
+Como o valor só depende da taxa, a alocação ótima (mochila fracionária) enche
+as células da maior para a menor taxa, cada uma até o limite de chamadas por
+hora do provider, e para quando o orçamento acaba ou a consulta deixa de se
+pagar. A ordem das células é calculada uma vez em `Agendador`; mudar
+orçamento, margem ou custo só refaz uma soma acumulada.
+
+O limite por hora de cada provider é estimado do histórico: o maior volume
+numa hora em que as falhas por limite (too many requests / timeout) não
+passaram muito das registradas nas horas calmas. Para isso as consultas precisam ser lidas sem o filtro
+de ruído (`ingestao.ler_consultas(..., mensagens_descartadas=())`).
+"""
+import numpy as np
+import pandas as pd
+
+from conversao_agregada import HORAS_NOTURNO, NS_DIA, NS_HORA, epoch_ns, marcar_pagas
+
+CUSTO_CONSULTA = 0.25
+
+# Mensagens (ingestao.REFAT_STATUS) que indicam chamada recusada pelo provider por volume
+FALHAS_LIMITE = ('too many requests', 'timeout')
+
+# Excesso de falhas por limite (sobre o das horas calmas) tolerado numa hora "dentro do limite"
+TOLERANCIA_FALHAS = 0.02
+
+# Fração do limite estimado usada no plano, como margem de segurança
+FOLGA_LIMITE = 0.9
+
+# Consultas "emprestadas" da taxa do provider em cada hora (suaviza horas com pouco volume)
+PESO_PRIOR = 500
+
+COLUNAS_PERFIL = ['hora', 'provider', 'consultas', 'pagas', 'taxa_conversao', 'consultas_por_dia', 'falhas_limite', 'taxa_falha']
+
+
+def _hora_e_dia(datas) -> tuple:
+    ns = epoch_ns(datas)
+    validos = ns != np.iinfo(np.int64).min
+    return (ns % NS_DIA) // NS_HORA, ns // NS_DIA, validos
+
+
+def perfil_horario(dados: pd.DataFrame, brutas: pd.DataFrame = None, coluna_provider: str = 'provider_consulta',
+                   peso_prior: float = PESO_PRIOR) -> pd.DataFrame:
+    """Consultas, pagas e taxa de conversão por hora do dia × provider.
+
+    `dados` é all_data (created, status, CPF_pagas e provider). A taxa de cada
+    hora é encolhida para a do provider com `peso_prior` consultas. Com
+    `brutas` (consultas sem o filtro de ruído) entram também as falhas por
+    limite e a sua participação em cada hora.
+    """
+
+    hora, dia, validos = _hora_e_dia(dados['created_consulta'])
+    tabela = pd.DataFrame({
+        'hora': hora[validos],
+        'provider': dados[coluna_provider].to_numpy()[validos],
+        'dia': dia[validos],
+        'pagas': marcar_pagas(dados)[validos],
+    })
+    dias = tabela['dia'].nunique()
+    perfil = tabela.groupby(['hora', 'provider']).agg(consultas=('pagas', 'size'), pagas=('pagas', 'sum'))
+
+    providers = perfil.groupby(level='provider')[['consultas', 'pagas']].sum()
+    taxa_provider = (providers['pagas'] / providers['consultas']).reindex(perfil.index.get_level_values('provider')).to_numpy()
+    perfil['taxa_conversao'] = (perfil['pagas'] + peso_prior * taxa_provider) / (perfil['consultas'] + peso_prior)
+    perfil['consultas_por_dia'] = perfil['consultas'] / max(dias, 1)
+
+    if brutas is not None:
+        hora, _, validos = _hora_e_dia(brutas['created_consulta'])
+        falhas = pd.DataFrame({
+            'hora': hora[validos],
+            'provider': brutas[coluna_provider].to_numpy()[validos],
+            'falha': brutas['message_consulta'].isin(FALHAS_LIMITE).to_numpy()[validos],
+        }).groupby(['hora', 'provider'])['falha'].agg(['sum', 'size'])
+        perfil['falhas_limite'] = falhas['sum'].reindex(perfil.index).fillna(0).astype('int64')
+        perfil['taxa_falha'] = (falhas['sum'] / falhas['size']).reindex(perfil.index)
+    else:
+        perfil['falhas_limite'] = pd.NA
+        perfil['taxa_falha'] = np.nan
+
+    return perfil.reset_index()[COLUNAS_PERFIL]
+
+
+def estimar_limites(brutas: pd.DataFrame, tolerancia: float = TOLERANCIA_FALHAS, coluna_provider: str = 'provider_consulta') -> pd.Series:
+    """Chamadas por hora que cada provider aguenta, estimadas das horas do histórico.
+
+    A referência de falhas "normais" de cada provider é a participação das
+    falhas por limite no quarto de horas de menor volume; o limite é o maior
+    volume horário cuja participação não passou da referência + `tolerancia`.
+    """
+
+    ns = epoch_ns(brutas['created_consulta'])
+    validos = ns != np.iinfo(np.int64).min
+    horarias = pd.DataFrame({
+        'provider': brutas[coluna_provider].to_numpy()[validos],
+        'hora': ns[validos] // NS_HORA,
+        'falha': brutas['message_consulta'].isin(FALHAS_LIMITE).to_numpy()[validos],
+    }).groupby(['provider', 'hora'])['falha'].agg(['sum', 'size']).reset_index()
+
+    quartil = horarias.groupby('provider')['size'].transform(lambda volume: volume.quantile(0.25))
+    calmas = horarias[horarias['size'] <= quartil].groupby('provider')[['sum', 'size']].sum()
+    referencia = (calmas['sum'] / calmas['size']).reindex(horarias['provider']).to_numpy()
+
+    dentro = horarias['sum'] <= (referencia + tolerancia) * horarias['size']
+    limites = horarias[dentro].groupby('provider')['size'].max()
+    minimos = horarias.groupby('provider')['size'].min()
+    return limites.reindex(minimos.index).fillna(minimos).astype('int64').rename('limite_por_hora')
+
+
+class Agendador:
+    """Alocação do orçamento por (hora, provider) a partir de um perfil horário e dos limites.
+
+    `limites` é um número (chamadas por hora, igual para todos), uma Series
+    provider -> chamadas por hora (ver `estimar_limites`) ou None (sem limite:
+    cada célula pode receber o orçamento inteiro).
+    """
+
+    def __init__(self, perfil: pd.DataFrame, limites=None, folga: float = FOLGA_LIMITE):
+        grade = perfil.pivot_table(index='hora', columns='provider', values='taxa_conversao').reindex(range(24))
+        self.providers = list(grade.columns)
+        self.taxas = grade.to_numpy(dtype=np.float64)
+        self.historico = (perfil.pivot_table(index='hora', columns='provider', values='consultas_por_dia')
+                          .reindex(index=range(24), columns=self.providers).fillna(0).to_numpy())
+
+        if limites is None:
+            capacidade = np.full(len(self.providers), np.inf)
+        elif np.isscalar(limites):
+            capacidade = np.full(len(self.providers), float(limites))
+        else:
+            capacidade = pd.Series(limites).reindex(self.providers).to_numpy(dtype=np.float64)
+            capacidade = np.where(np.isnan(capacidade), np.inf, capacidade)
+        self.capacidade = np.floor(np.broadcast_to(capacidade * folga, self.taxas.shape))
+
+        # células sem medição (NaN) nunca recebem consultas
+        taxas = np.nan_to_num(self.taxas.ravel(), nan=-np.inf)
+        self._ordem = np.argsort(-taxas, kind='stable')
+        self._taxas_ordenadas = taxas[self._ordem]
+        self._capacidade_ordenada = self.capacidade.ravel()[self._ordem]
+        self._capacidade_acumulada = np.cumsum(self._capacidade_ordenada)
+        self._medidas = int(np.isfinite(self._taxas_ordenadas).sum())
+
+    def alocar(self, orcamento: float, margem_contrato: float, custo_consulta: float = CUSTO_CONSULTA,
+               gastar_tudo: bool = False) -> np.ndarray:
+        """Consultas por (hora, provider), matriz 24 × providers.
+
+        Só células em que a consulta se paga (taxa · margem > custo) recebem
+        volume, salvo com `gastar_tudo`, que usa o orçamento inteiro enquanto
+        houver capacidade.
+        """
+
+        if gastar_tudo:
+            uteis = self._medidas
+        elif margem_contrato <= 0:
+            uteis = 0
+        else:
+            # taxas em ordem decrescente: conta as células com taxa > custo / margem
+            uteis = int(np.searchsorted(-self._taxas_ordenadas, -custo_consulta / margem_contrato, side='left'))
+
+        # capacidade já ocupada pelas células anteriores; com limite infinito vira inf e as
+        # seguintes ficam com 0 (o teto usa a capacidade da célula, nunca inf - inf)
+        anterior = np.concatenate([[0.0], self._capacidade_acumulada[:uteis - 1]]) if uteis else np.zeros(0)
+        alocado = np.clip(np.floor(orcamento) - anterior, 0, self._capacidade_ordenada[:uteis])
+
+        matriz = np.zeros(self.taxas.size)
+        matriz[self._ordem[:uteis]] = alocado
+        return matriz.reshape(self.taxas.shape)
+
+    def _tabela(self, consultas: np.ndarray, margem_contrato: float, custo_consulta: float) -> pd.DataFrame:
+        taxas = np.nan_to_num(self.taxas)
+        tabela = pd.DataFrame({
+            'hora': np.repeat(np.arange(24), len(self.providers)),
+            'provider': np.tile(self.providers, 24),
+            'consultas': consultas.ravel(),
+            'taxa_conversao': self.taxas.ravel(),
+            'contratos_esperados': (consultas * taxas).ravel(),
+            'mcu_esperado': (consultas * (taxas * margem_contrato - custo_consulta)).ravel(),
+        })
+        tabela.insert(1, 'ciclo', np.where(tabela['hora'].isin(HORAS_NOTURNO), 'noturno', 'diurno'))
+        return tabela
+
+    def plano(self, orcamento: float, margem_contrato: float, custo_consulta: float = CUSTO_CONSULTA,
+              gastar_tudo: bool = False) -> pd.DataFrame:
+        """Plano hora a hora: consultas, contratos e MCU esperados por (hora, provider)."""
+
+        consultas = self.alocar(orcamento, margem_contrato, custo_consulta, gastar_tudo)
+        return self._tabela(consultas, margem_contrato, custo_consulta)
+
+    def plano_historico(self, orcamento: float, margem_contrato: float, custo_consulta: float = CUSTO_CONSULTA) -> pd.DataFrame:
+        """O mesmo orçamento distribuído como o volume histórico (referência para comparar o plano)."""
+
+        pesos = self.historico / self.historico.sum() if self.historico.sum() > 0 else np.zeros_like(self.historico)
+        return self._tabela(np.floor(orcamento * pesos), margem_contrato, custo_consulta)
+
+
+if __name__ == '__main__':
+    import sys
+
+    from armazenamento import ler_dataset
+    from ingestao import ler_consultas
+    from pipeline import DIRETORIO_CONSULTAS
+    from simulacao import margem_por_contrato
+
+    # uso: python agendador.py orcamento [diretorio_consultas]
+    orcamento = float(sys.argv[1]) if len(sys.argv) > 1 else 10_000
+    diretorio = sys.argv[2] if len(sys.argv) > 2 else DIRETORIO_CONSULTAS
+
+    dados = ler_dataset('all_data', colunas=['created_consulta', 'status_consulta', 'CPF_pagas', 'provider_consulta'])
+    brutas = pd.concat(ler_consultas(diretorio, mensagens_descartadas=()), ignore_index=True)
+    limites = estimar_limites(brutas)
+    agendador = Agendador(perfil_horario(dados, brutas), limites)
+
+    # parâmetros padrão dos dashboards
+    margem = margem_por_contrato(39.04, 10.42, 0.65, 2.85, 35.29, 2.05)
+    plano = agendador.plano(orcamento, margem)
+    historico = agendador.plano_historico(orcamento, margem)
+
+    print(limites.to_string())
+    print(plano[plano['consultas'] > 0].to_string(index=False))
+    print(f"MCU esperado: R$ {plano['mcu_esperado'].sum():,.2f} (distribuição histórica: R$ {historico['mcu_esperado'].sum():,.2f})")
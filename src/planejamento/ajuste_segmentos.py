@@ -0,0 +1,310 @@
+"""Ajuste dos modelos de taxa binomial negativa por segmento (provider, parceiro, ciclo, tabela).
+
+Mesmo modelo de como_onde (`qtd_finalizadas ~ 1`, família NegativeBinomial com
+alpha fixo e `exposure=Total_Consultas`), ajustado por IRLS em NumPy para cada
+segmento. Os segmentos são distribuídos em blocos por um pool de processos,
+cada ajuste parte dos parâmetros do bundle anterior (warm start) e o resultado
+é gravado como um bundle versionado (`negbin_v0001/bundle.json`, ...).
+"""
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from conversao_agregada import HORAS_NOTURNO, NS_DIA, NS_HORA, epoch_ns
+
+DIRETORIO_MODELOS = '../../output_data/modelos/'
+
+# Segmento -> coluna de all_data; 'global' reproduz o modelo único de como_onde
+SEGMENTOS = {
+    'provider': 'provider_consulta',
+    'parceiro': 'partiner_consulta',
+    'ciclo': 'ciclo',
+    'tabela': 'tabela',
+}
+
+COLUNAS_SEGMENTOS = ['created_consulta', 'status_consulta', 'CPF_consulta', 'CPF_pagas', 'provider_consulta', 'partiner_consulta', 'tabela']
+
+# alpha padrão de sm.families.NegativeBinomial()
+ALPHA_PADRAO = 1.0
+
+VALOR_DESCONHECIDO = 'desconhecido'
+
+# Abaixo deste total de linhas os ajustes rodam no próprio processo
+MINIMO_PARALELO = 50_000
+
+# Erro padrão máximo do intercepto anterior para servir de warm start: um segmento
+# ainda sem conversões "converge" para ~-42 com bse enorme, e partir dali estoura o exp
+BSE_MAXIMO_INICIO = 10.0
+
+
+# --- Tabelas por segmento ---
+
+def tabelas_segmentos(dados: pd.DataFrame, segmentos: dict = None, incluir_global: bool = True) -> dict:
+    """Tabelas no formato `agregado` (data, ciclo, finalizadas, total) para cada valor de cada segmento.
+
+    `dados` é all_data já com `consulta_finalizada` (ver `atribuir_conversao`).
+    Retorna {(segmento, valor): DataFrame}. A coluna `tabela` só existe para
+    CPFs com proposta paga; as demais consultas ficam em 'desconhecido'.
+    """
+
+    segmentos = SEGMENTOS if segmentos is None else segmentos
+
+    # código de (data, ciclo) em inteiros, como em conversao_agregada
+    ns = epoch_ns(dados['created_consulta'])
+    validos = ns != np.iinfo(np.int64).min
+    ns = ns[validos]
+    finalizadas = dados['consulta_finalizada'].to_numpy(dtype=np.int64)[validos]
+    if len(ns) == 0:
+        return {}
+
+    dia = ns // NS_DIA
+    noturno = np.isin((ns % NS_DIA) // NS_HORA, HORAS_NOTURNO)
+    primeiro_dia = dia.min()
+    base = (dia - primeiro_dia) * 2 + noturno.astype(np.int64)
+    n_base = int(base.max()) + 1
+
+    datas_base = pd.DatetimeIndex(((np.arange(n_base) // 2 + primeiro_dia) * NS_DIA).astype('datetime64[ns]'))
+    ciclos_base = np.where(np.arange(n_base) % 2 == 1, 'noturno', 'diurno')
+
+    agrupamentos = [('global', None)] if incluir_global else []
+    agrupamentos += list(segmentos.items())
+
+    tabelas = {}
+    for segmento, coluna in agrupamentos:
+        if coluna is None:
+            codigos, valores = np.zeros(len(base), dtype=np.int64), ['todos']
+        elif coluna == 'ciclo':
+            codigos, valores = noturno.astype(np.int64), ['diurno', 'noturno']
+        else:
+            serie = dados[coluna].astype('string').fillna(VALOR_DESCONHECIDO)[validos]
+            codigos, valores = pd.factorize(serie, sort=True)
+
+        celulas = codigos * n_base + base
+        tamanho = len(valores) * n_base
+        totais = np.bincount(celulas, minlength=tamanho).reshape(len(valores), n_base)
+        pagas = np.bincount(celulas, weights=finalizadas, minlength=tamanho).reshape(len(valores), n_base)
+
+        for i, valor in enumerate(valores):
+            ocupadas = totais[i] > 0
+            if not ocupadas.any():
+                continue
+            tabelas[(segmento, str(valor))] = pd.DataFrame({
+                'data': datas_base[ocupadas],
+                'ciclo': ciclos_base[ocupadas],
+                'qtd_finalizadas': pagas[i, ocupadas].astype(np.int64),
+                'Total_Consultas': totais[i, ocupadas],
+            })
+
+    return tabelas
+
+
+# --- Ajuste ---
+
+def ajustar_negbin(y, exposicao, exog=None, alpha: float = ALPHA_PADRAO, inicio=None,
+                   tolerancia: float = 1e-8, max_iter: int = 100) -> dict:
+    """GLM binomial negativo (link log, offset ln(exposição)) por IRLS.
+
+    Equivale a `smf.glm(..., family=NegativeBinomial(alpha), exposure=...).fit()`:
+    sem `exog` ajusta só o intercepto. `inicio` são os parâmetros de partida
+    (warm start); sem ele, ou se a partir dele o ajuste não converge, parte da
+    média como o statsmodels.
+    """
+
+    y = np.asarray(y, dtype=float)
+    exposicao = np.asarray(exposicao, dtype=float)
+    validos = exposicao > 0
+    y, exposicao = y[validos], exposicao[validos]
+    X = np.ones((len(y), 1)) if exog is None else np.asarray(exog, dtype=float)[validos]
+    offset = np.log(exposicao)
+
+    if len(y) == 0:
+        return {'params': [np.nan] * X.shape[1], 'bse': [np.nan] * X.shape[1], 'alpha': alpha,
+                'nobs': 0, 'iteracoes': 0, 'convergiu': False, 'deviance': np.nan}
+
+    if inicio is not None and np.all(np.isfinite(inicio)):
+        try:
+            with np.errstate(over='ignore', divide='ignore', invalid='ignore'):
+                ajuste = _irls(y, X, offset, alpha, X @ np.asarray(inicio, dtype=float) + offset, tolerancia, max_iter)
+            if ajuste['convergiu'] and np.all(np.isfinite(ajuste['params'] + ajuste['bse'])):
+                return ajuste
+        except np.linalg.LinAlgError:
+            pass
+
+    return _irls(y, X, offset, alpha, np.log((y + y.mean()) / 2 + 1e-10), tolerancia, max_iter)
+
+
+def _irls(y, X, offset, alpha, eta, tolerancia, max_iter) -> dict:
+    deviance = np.inf
+    convergiu = False
+    iteracoes = 0
+    for iteracoes in range(1, max_iter + 1):
+        mu = np.exp(eta)
+        pesos = mu / (1 + alpha * mu)
+        z = eta - offset + (y - mu) / mu
+
+        XtW = X.T * pesos
+        params = np.linalg.solve(XtW @ X, XtW @ z)
+        eta = X @ params + offset
+        mu = np.exp(eta)
+
+        nova = _deviance(y, mu, alpha)
+        if abs(nova - deviance) <= tolerancia * (abs(nova) + tolerancia):
+            deviance = nova
+            convergiu = True
+            break
+        deviance = nova
+
+    pesos = mu / (1 + alpha * mu)
+    covariancia = np.linalg.inv((X.T * pesos) @ X)
+
+    return {
+        'params': params.tolist(),
+        'bse': np.sqrt(np.diag(covariancia)).tolist(),
+        'alpha': alpha,
+        'nobs': int(len(y)),
+        'iteracoes': iteracoes,
+        'convergiu': convergiu,
+        'deviance': float(deviance),
+    }
+
+
+def _deviance(y, mu, alpha):
+    with np.errstate(divide='ignore', invalid='ignore'):
+        termo_y = np.where(y > 0, y * np.log(y / mu), 0.0)
+    return float(2 * np.sum(termo_y - (y + 1 / alpha) * np.log((1 + alpha * y) / (1 + alpha * mu))))
+
+
+def _ajustar_bloco(tarefas):
+    return [(chave, ajustar_negbin(y, exposicao, alpha=alpha, inicio=inicio)) for chave, y, exposicao, alpha, inicio in tarefas]
+
+
+def ajustar_segmentos(tabelas: dict, anterior: dict = None, alpha: float = ALPHA_PADRAO, processos: int = None) -> dict:
+    """Ajusta um modelo por segmento, em paralelo, com warm start a partir de `anterior`.
+
+    `tabelas` vem de `tabelas_segmentos`; `anterior` é um bundle carregado por
+    `carregar_bundle` (ou None). Retorna {'segmento=valor': ajuste}, sem os
+    segmentos cujo ajuste não deu parâmetros finitos.
+    """
+
+    anteriores = (anterior or {}).get('modelos', {})
+    tarefas = []
+    for (segmento, valor), tabela in tabelas.items():
+        chave = f'{segmento}={valor}'
+        inicio = _inicio(anteriores.get(chave))
+        tarefas.append((chave, tabela['qtd_finalizadas'].to_numpy(), tabela['Total_Consultas'].to_numpy(), alpha, inicio))
+
+    if processos is None:
+        linhas = sum(len(t[1]) for t in tarefas)
+        processos = (os.cpu_count() or 1) if linhas >= MINIMO_PARALELO else 1
+    processos = max(1, min(processos, len(tarefas)))
+
+    # um bloco por processo (maiores primeiro) para amortizar o envio das tarefas
+    tarefas.sort(key=lambda t: len(t[1]), reverse=True)
+    blocos = [tarefas[i::processos] for i in range(processos)]
+
+    if processos > 1:
+        with ProcessPoolExecutor(max_workers=processos) as executor:
+            resultados = list(executor.map(_ajustar_bloco, blocos))
+    else:
+        resultados = [_ajustar_bloco(bloco) for bloco in blocos]
+
+    # ajuste que nem da média convergiu para algo finito não entra no bundle
+    ajustes = {chave: ajuste for bloco in resultados for chave, ajuste in bloco if np.all(np.isfinite(ajuste['params']))}
+    for chave, ajuste in ajustes.items():
+        segmento, valor = chave.split('=', 1)
+        ajuste.update({'segmento': segmento, 'valor': valor, 'taxa': float(np.exp(ajuste['params'][0]))})
+
+    return dict(sorted(ajustes.items()))
+
+
+def _inicio(anterior: dict):
+    # só um ajuste anterior convergido e bem determinado serve de warm start
+    if not anterior or not anterior.get('convergiu'):
+        return None
+    if not np.all(np.asarray(anterior.get('bse', [np.nan]), dtype=float) < BSE_MAXIMO_INICIO):
+        return None
+    return anterior['params']
+
+
+# --- Bundle versionado ---
+
+def _versoes(diretorio: str) -> list:
+    if not os.path.isdir(diretorio):
+        return []
+    return sorted(int(nome.split('_v')[1]) for nome in os.listdir(diretorio)
+                  if nome.startswith('negbin_v') and os.path.exists(os.path.join(diretorio, nome, 'bundle.json')))
+
+
+def salvar_bundle(ajustes: dict, diretorio: str = DIRETORIO_MODELOS, metadados: dict = None) -> str:
+    """Grava os ajustes como uma nova versão do bundle e retorna o caminho do bundle.json."""
+
+    versoes = _versoes(diretorio)
+    versao = versoes[-1] + 1 if versoes else 1
+    pasta = os.path.join(diretorio, f'negbin_v{versao:04d}')
+    os.makedirs(pasta, exist_ok=True)
+
+    bundle = {
+        'versao': versao,
+        'criado_em': datetime.now().isoformat(timespec='seconds'),
+        'familia': 'NegativeBinomial',
+        'link': 'log',
+        'offset': 'log(Total_Consultas)',
+        'formula': 'qtd_finalizadas ~ 1',
+        **(metadados or {}),
+        'modelos': ajustes,
+    }
+
+    caminho = os.path.join(pasta, 'bundle.json')
+    temporario = caminho + '.tmp'
+    with open(temporario, 'w') as arquivo:
+        json.dump(bundle, arquivo, indent=1, ensure_ascii=False)
+    os.replace(temporario, caminho)
+
+    return caminho
+
+
+def carregar_bundle(diretorio: str = DIRETORIO_MODELOS, versao: int = None) -> dict:
+    """Bundle da versão pedida (ou a mais recente); None se ainda não existe nenhum."""
+
+    versoes = _versoes(diretorio)
+    if not versoes:
+        return None
+    versao = versoes[-1] if versao is None else versao
+    with open(os.path.join(diretorio, f'negbin_v{versao:04d}', 'bundle.json')) as arquivo:
+        return json.load(arquivo)
+
+
+def reajustar(dados: pd.DataFrame, diretorio: str = DIRETORIO_MODELOS, segmentos: dict = None,
+              alpha: float = ALPHA_PADRAO, processos: int = None) -> str:
+    """Refaz todos os ajustes a partir de all_data e grava uma nova versão do bundle."""
+
+    return reajustar_tabelas(tabelas_segmentos(dados, segmentos), diretorio, alpha=alpha, processos=processos)
+
+
+def reajustar_tabelas(tabelas: dict, diretorio: str = DIRETORIO_MODELOS, alpha: float = ALPHA_PADRAO, processos: int = None) -> str:
+    """Como `reajustar`, mas com as tabelas já montadas (ex.: pipeline.montar_tabelas_segmentos)."""
+
+    anterior = carregar_bundle(diretorio)
+    ajustes = ajustar_segmentos(tabelas, anterior, alpha=alpha, processos=processos)
+    metadados = {
+        'versao_anterior': anterior['versao'] if anterior else None,
+        'sem_ajuste': sorted(f'{segmento}={valor}' for segmento, valor in tabelas if f'{segmento}={valor}' not in ajustes),
+    }
+
+    return salvar_bundle(ajustes, diretorio, metadados)
+
+
+if __name__ == '__main__':
+    from armazenamento import ler_dataset
+    from atribuicao import atribuir_conversao
+
+    dados = atribuir_conversao(ler_dataset('all_data', colunas=COLUNAS_SEGMENTOS), regra='primeira')
+    caminho = reajustar(dados)
+    bundle = carregar_bundle()
+    print(f"bundle v{bundle['versao']} gravado em {caminho}")
+    for chave, ajuste in bundle['modelos'].items():
+        print(f"{chave}: taxa={ajuste['taxa']:.6f} (n={ajuste['nobs']}, {ajuste['iteracoes']} iterações)")
@@ -0,0 +1,105 @@
+"""API HTTP/JSON assíncrona (aiohttp) para os cálculos de servico.py.
+
+Rotas:
+
+    GET  /saude                 -> {"status": "ok"}
+    POST /v1/mcu                -> MCU, receita bruta e custos variáveis
+    POST /v1/ruptura            -> Ponto de Ruptura e MCU no limite
+    POST /v1/plato              -> ponto de platô, dif, regime e polo
+
+O corpo dos POST é `{"cenarios": [{...}, ...]}` (ou um único objeto de cenário);
+a resposta é `{"resultados": [...]}` na mesma ordem. Lotes grandes são avaliados
+num pool de threads para não bloquear o event loop.
+
+Uso: python api.py [porta]
+"""
+import asyncio
+import json
+import os
+
+from aiohttp import web
+
+from servico import OPERACOES, ErroValidacao
+
+try:
+    import orjson
+
+    _loads = orjson.loads
+    _ERROS_JSON = (orjson.JSONDecodeError,)
+
+    def _dumps(dados) -> bytes:
+        return orjson.dumps(dados)
+except ImportError:  # backend padrão quando orjson não está instalado
+    _loads = json.loads
+    _ERROS_JSON = (json.JSONDecodeError, UnicodeDecodeError)
+
+    def _dumps(dados) -> bytes:
+        return json.dumps(dados, ensure_ascii=False).encode()
+
+PORTA_PADRAO = 8080
+
+# Máximo de cenários por requisição e tamanho máximo do corpo
+MAXIMO_CENARIOS = 100_000
+TAMANHO_MAXIMO_CORPO = 64 * 1024 * 1024
+
+# A partir deste tamanho o lote sai do event loop (executor padrão)
+MINIMO_EXECUTOR = 2_000
+
+
+def _resposta(dados, status: int = 200) -> web.Response:
+    return web.Response(body=_dumps(dados), status=status, content_type='application/json')
+
+
+def _erro(mensagem: str, status: int = 400) -> web.Response:
+    return _resposta({'erro': mensagem}, status)
+
+
+def _cenarios(corpo):
+    if isinstance(corpo, dict):
+        return corpo['cenarios'] if 'cenarios' in corpo else [corpo]
+    return corpo
+
+
+def _rota(nome: str):
+    operacao = OPERACOES[nome]
+
+    async def tratar(request: web.Request) -> web.Response:
+        try:
+            corpo = _loads(await request.read())
+        except _ERROS_JSON:
+            return _erro("corpo não é um JSON válido")
+
+        cenarios = _cenarios(corpo)
+        if isinstance(cenarios, list) and len(cenarios) > MAXIMO_CENARIOS:
+            return _erro(f"máximo de {MAXIMO_CENARIOS} cenários por requisição", 413)
+
+        try:
+            if isinstance(cenarios, list) and len(cenarios) >= MINIMO_EXECUTOR:
+                resultados = await asyncio.get_running_loop().run_in_executor(None, operacao, cenarios)
+            else:
+                resultados = operacao(cenarios)
+        except ErroValidacao as erro:
+            return _erro(str(erro))
+
+        return _resposta({'resultados': resultados})
+
+    return tratar
+
+
+async def saude(request: web.Request) -> web.Response:
+    return _resposta({'status': 'ok', 'operacoes': sorted(OPERACOES)})
+
+
+def criar_app() -> web.Application:
+    app = web.Application(client_max_size=TAMANHO_MAXIMO_CORPO)
+    app.router.add_get('/saude', saude)
+    for nome in OPERACOES:
+        app.router.add_post(f'/v1/{nome}', _rota(nome))
+    return app
+
+
+if __name__ == '__main__':
+    import sys
+
+    porta = int(sys.argv[1]) if len(sys.argv) > 1 else int(os.environ.get('PORTA', PORTA_PADRAO))
+    web.run_app(criar_app(), port=porta)
@@ -0,0 +1,151 @@
+import os
+import shutil
+import uuid
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+
+DIRETORIO_DATASETS = '../../output_data/datasets/'
+
+# Partições de cada artefato: (coluna de data, coluna de provider)
+DATASETS = {
+    'dados_consulta': ('created_consulta', 'provider_consulta'),
+    'dados_pagas': ('date_pagas', 'provider_pagas'),
+    'merge_consulta_pagas': ('created_consulta', 'provider_consulta'),
+    'all_data': ('created_consulta', 'provider_consulta'),
+}
+
+PARTICIONAMENTO = ds.partitioning(pa.schema([('data', pa.string()), ('provider', pa.string())]), flavor='hive')
+
+# Colunas mínimas das análises de conversão (como_onde, conversao)
+COLUNAS_CONVERSAO = ['created_consulta', 'status_consulta', 'CPF_consulta', 'CPF_pagas']
+
+COLUNAS_CPF = ['CPF_consulta', 'CPF_pagas', 'CPF_storm']
+COLUNAS_DATA = ['created_consulta', 'update_consulta', 'date_pagas']
+COLUNAS_FLOAT = ['CMSRepassada']
+
+PROVIDER_DESCONHECIDO = 'desconhecido'
+
+
+def caminho_dataset(nome: str, raiz: str = DIRETORIO_DATASETS) -> str:
+    return os.path.join(raiz, nome)
+
+
+def tipar(df: pd.DataFrame) -> pd.DataFrame:
+    """Padroniza os tipos das colunas conhecidas: CPFs como texto de 11 dígitos, datas e valores."""
+
+    df = df.copy()
+    for coluna in COLUNAS_CPF:
+        if coluna in df.columns:
+            cpf = df[coluna].astype('string').str.replace(r'\.0$', '', regex=True).str.replace(r'\D', '', regex=True)
+            df[coluna] = cpf.where(cpf.str.len() > 0).str.zfill(11)
+    for coluna in COLUNAS_DATA:
+        if coluna in df.columns:
+            df[coluna] = pd.to_datetime(df[coluna], errors='coerce')
+    for coluna in COLUNAS_FLOAT:
+        if coluna in df.columns:
+            df[coluna] = pd.to_numeric(df[coluna], errors='coerce').astype('float64')
+    return df
+
+
+def _colunas_particao(df: pd.DataFrame, nome: str) -> pd.DataFrame:
+    coluna_data, coluna_provider = DATASETS[nome]
+    df = df.copy()
+    df['data'] = pd.to_datetime(df[coluna_data], errors='coerce').dt.strftime('%Y-%m-%d').fillna('sem_data')
+    df['provider'] = df[coluna_provider].astype('string').fillna(PROVIDER_DESCONHECIDO)
+    return df
+
+
+def gravar_dataset(df: pd.DataFrame, nome: str, raiz: str = DIRETORIO_DATASETS, substituir_particoes: bool = True,
+                   prefixo_arquivo: str = None):
+    """Grava o artefato como Parquet particionado por data e provider (hive: data=.../provider=...).
+
+    Com `substituir_particoes`, apenas as partições presentes em `df` são
+    reescritas; as demais datas do histórico ficam intactas. Com
+    `prefixo_arquivo` (ex.: o nome do CSV de origem), os arquivos são apenas
+    acrescentados com esse prefixo e podem ser removidos depois com
+    `remover_origem`.
+    """
+
+    if nome not in DATASETS:
+        raise KeyError(f"Dataset desconhecido: {nome}. Opções: {list(DATASETS)}")
+
+    if prefixo_arquivo is not None:
+        comportamento, modelo_nome = 'overwrite_or_ignore', f'{prefixo_arquivo}-{{i}}.parquet'
+    elif substituir_particoes:
+        comportamento, modelo_nome = 'delete_matching', 'parte-{i}.parquet'
+    else:
+        comportamento, modelo_nome = 'overwrite_or_ignore', f'parte-{uuid.uuid4().hex}-{{i}}.parquet'
+
+    tabela = pa.Table.from_pandas(_colunas_particao(tipar(df), nome), preserve_index=False)
+    ds.write_dataset(
+        tabela,
+        caminho_dataset(nome, raiz),
+        format='parquet',
+        partitioning=PARTICIONAMENTO,
+        existing_data_behavior=comportamento,
+        basename_template=modelo_nome,
+    )
+
+
+def remover_origem(nome: str, prefixo_arquivo: str, raiz: str = DIRETORIO_DATASETS) -> int:
+    """Remove os arquivos gravados com `prefixo_arquivo`; retorna quantos foram apagados."""
+
+    removidos = 0
+    for pasta, _, arquivos in os.walk(caminho_dataset(nome, raiz)):
+        for arquivo in arquivos:
+            if arquivo.startswith(f'{prefixo_arquivo}-') and arquivo.endswith('.parquet'):
+                os.remove(os.path.join(pasta, arquivo))
+                removidos += 1
+    return removidos
+
+
+def abrir_dataset(nome: str, raiz: str = DIRETORIO_DATASETS) -> ds.Dataset:
+    return ds.dataset(caminho_dataset(nome, raiz), format='parquet', partitioning=PARTICIONAMENTO)
+
+
+def filtro_particoes(data_inicio=None, data_fim=None, providers=None, datas=None):
+    """Expressão de filtro sobre as partições, usada para podar diretórios na leitura."""
+
+    filtro = None
+    condicoes = []
+    if datas is not None:
+        condicoes.append(ds.field('data').isin([pd.Timestamp(d).strftime('%Y-%m-%d') for d in datas]))
+    if data_inicio is not None:
+        condicoes.append(ds.field('data') >= pd.Timestamp(data_inicio).strftime('%Y-%m-%d'))
+    if data_fim is not None:
+        condicoes.append(ds.field('data') <= pd.Timestamp(data_fim).strftime('%Y-%m-%d'))
+    if providers is not None:
+        condicoes.append(ds.field('provider').isin(list(providers)))
+    for condicao in condicoes:
+        filtro = condicao if filtro is None else filtro & condicao
+    return filtro
+
+
+def ler_dataset(nome: str, colunas: list = None, data_inicio=None, data_fim=None, providers=None,
+                raiz: str = DIRETORIO_DATASETS, datas=None) -> pd.DataFrame:
+    """Lê apenas as colunas e partições pedidas do artefato.
+
+    Ex.: `ler_dataset('all_data', colunas=COLUNAS_CONVERSAO, data_inicio='2025-09-01')`.
+    """
+
+    dataset = abrir_dataset(nome, raiz)
+    tabela = dataset.to_table(columns=colunas, filter=filtro_particoes(data_inicio, data_fim, providers, datas))
+    return tabela.to_pandas()
+
+
+def converter_para_dataset(origem: str, nome: str, raiz: str = DIRETORIO_DATASETS, linhas_por_bloco: int = 500_000):
+    """Migra um artefato existente (CSV ou Parquet) para o dataset particionado, em blocos.
+
+    O dataset de destino é recriado do zero.
+    """
+
+    if origem.endswith('.parquet'):
+        blocos = (lote.to_pandas() for lote in ds.dataset(origem, format='parquet').to_batches(batch_size=linhas_por_bloco))
+    else:
+        blocos = pd.read_csv(origem, chunksize=linhas_por_bloco, dtype={c: 'string' for c in COLUNAS_CPF})
+
+    shutil.rmtree(caminho_dataset(nome, raiz), ignore_errors=True)
+    for bloco in blocos:
+        gravar_dataset(bloco, nome, raiz, substituir_particoes=False)
@@ -0,0 +1,53 @@
+import numpy as np
+import pandas as pd
+
+REGRAS = ('primeira', 'ultima')
+
+
+def atribuir_conversao(dados: pd.DataFrame, regra: str = 'primeira', janela=None, apenas_completas: bool = False,
+                       coluna_cpf: str = 'CPF_consulta', coluna_data: str = 'created_consulta',
+                       coluna_data_pagamento: str = None, coluna_destino: str = 'consulta_finalizada') -> pd.DataFrame:
+    """Marca uma única consulta convertida por CPF, em O(N log N) (ordenação + groupby/cumcount).
+
+    Um CPF converte quando tem ao menos uma consulta `completed` com proposta paga
+    (`CPF_pagas` preenchido); a conversão é atribuída à primeira ou à última
+    consulta desse CPF por data, conforme `regra`. Com `apenas_completas`, só
+    consultas `completed` concorrem. Com `janela` (ex.: `'7D'`) e
+    `coluna_data_pagamento`, só concorrem consultas feitas até `janela` antes do
+    pagamento (e não depois dele).
+    """
+
+    if regra not in REGRAS:
+        raise ValueError(f"regra deve ser uma de {REGRAS}")
+    if janela is not None and coluna_data_pagamento is None:
+        raise ValueError("janela exige coluna_data_pagamento")
+
+    completa = (dados['status_consulta'] == 'completed').to_numpy()
+    convertida = completa & dados['CPF_pagas'].notna().to_numpy()
+
+    cpf = dados[coluna_cpf].to_numpy()
+    cpfs_convertidos = pd.unique(cpf[convertida])
+    candidata = pd.Series(cpf).isin(cpfs_convertidos).to_numpy()
+
+    if apenas_completas:
+        candidata = candidata & completa
+
+    data_consulta = pd.to_datetime(dados[coluna_data], errors='coerce').to_numpy()
+    if janela is not None:
+        data_pagamento = pd.to_datetime(dados[coluna_data_pagamento], errors='coerce').to_numpy()
+        candidata = candidata & (data_consulta <= data_pagamento) & (data_consulta >= data_pagamento - pd.Timedelta(janela).to_timedelta64())
+
+    # ordena as candidatas por (CPF, data) e fica com a posição 0 de cada grupo;
+    # trabalha com posições para não depender de um índice único
+    posicoes = np.flatnonzero(candidata)
+    candidatas = pd.DataFrame({'cpf': cpf[posicoes], 'data': data_consulta[posicoes], 'posicao': posicoes})
+    candidatas = candidatas.sort_values(['cpf', 'data'], ascending=[True, regra == 'primeira'], kind='mergesort')
+    escolhidas = candidatas['posicao'].to_numpy()[candidatas.groupby('cpf', sort=False).cumcount().to_numpy() == 0]
+
+    marcacao = np.zeros(len(dados), dtype=np.int8)
+    marcacao[escolhidas] = 1
+
+    dados = dados.copy()
+    dados[coluna_destino] = marcacao
+
+    return dados
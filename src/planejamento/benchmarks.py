@@ -0,0 +1,392 @@
+"""Benchmarks dos cálculos de planejamento e do pipeline de dados.
+
+Cobre MCU escalar x em lote, detecção do platô, ingestão/junção das consultas
+(visualizacao_dados), ajuste/carga do modelo NegBin e a atualização da previsão
+horária a partir do estado salvo, sobre dados sintéticos de
+tamanho configurável. Cada execução grava os tempos em
+`<destino>/<commit>.json` e compara com a última medição de outro commit
+feita com os mesmos `--linhas` e `--repeticoes`.
+
+Uso: python benchmarks.py [--linhas N] [--repeticoes R] [--filtro texto] [--destino dir]
+"""
+import argparse
+import json
+import os
+import shutil
+import subprocess
+import tempfile
+import time
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+DIRETORIO_BENCHMARKS = '../../output_data/benchmarks/'
+
+LINHAS_PADRAO = 200_000
+REPETICOES_PADRAO = 5
+
+# Piora relativa da mediana a partir da qual a comparação acusa regressão
+TOLERANCIA_REGRESSAO = 0.20
+
+# nome -> função que recebe o contexto e devolve o callable medido
+BENCHMARKS = {}
+
+
+def benchmark(nome: str):
+    """Registra um benchmark; a preparação fica fora do callable devolvido e não é medida."""
+
+    def decorador(funcao):
+        BENCHMARKS[nome] = funcao
+        return funcao
+
+    return decorador
+
+
+# --- Dados sintéticos ---
+
+class Contexto:
+    """Parâmetros da execução e dados sintéticos compartilhados, gerados uma única vez."""
+
+    def __init__(self, linhas: int, semente: int = 0):
+        self.linhas = linhas
+        self.semente = semente
+        self.diretorio = tempfile.mkdtemp(prefix='benchmarks_')
+        self._dados = {}
+
+    def obter(self, nome: str, gerar):
+        if nome not in self._dados:
+            self._dados[nome] = gerar()
+        return self._dados[nome]
+
+    def sinteticos(self) -> dict:
+        from sinteticos import amostra
+        return self.obter('sinteticos', lambda: amostra(self.linhas, self.semente))
+
+    def consultas_brutas(self) -> pd.DataFrame:
+        return self.sinteticos()['consultas']
+
+    def pagas(self) -> pd.DataFrame:
+        return self.sinteticos()['pagas']
+
+    def arquivos_consultas(self) -> str:
+        """Consultas gravadas como resultado_*.csv diários, no formato de entrada do pipeline."""
+
+        def gravar():
+            from sinteticos import gravar_sinteticos
+
+            resumo = gravar_sinteticos(os.path.join(self.diretorio, 'sinteticos'), self.linhas, self.semente, formato='csv')
+            return resumo['caminhos']['consultas']
+
+        return self.obter('arquivos_consultas', gravar)
+
+
+def _cenarios_mcu(n: int, semente: int = 0) -> dict:
+    gerador = np.random.default_rng(semente)
+    return {
+        'tac': gerador.uniform(20, 60, n), 'spread': gerador.uniform(5, 15, n),
+        'averbacao': np.full(n, 0.65), 'formalizacao': np.full(n, 2.85),
+        'comissao1': gerador.uniform(20, 40, n), 'comissao2': np.full(n, 2.05),
+        'qtd_consulta': gerador.integers(1, 150, n).astype(float), 'valor_por_consulta': np.full(n, 0.25),
+    }
+
+
+def _cenarios_plato(n: int, semente: int = 0) -> dict:
+    gerador = np.random.default_rng(semente)
+    return {
+        'taxa_conversao': gerador.uniform(0.001, 0.05, n), 'mcu': gerador.uniform(-30, 30, n),
+        'custo_consulta': gerador.uniform(0.1, 1.0, n), 'limiar': np.full(n, 0.001),
+    }
+
+
+def _agregado(contexto: Contexto) -> pd.DataFrame:
+    """Tabela `agregado` de como_onde (data, ciclo) a partir das consultas sintéticas."""
+
+    def montar():
+        from ajuste_segmentos import tabelas_segmentos
+
+        consultas = contexto.consultas_brutas()
+        pagas = (consultas['status'] == 'completed') & consultas['document_number'].isin(contexto.pagas()['CPF_pagas'])
+        dados = pd.DataFrame({'created_consulta': consultas['created_at'], 'consulta_finalizada': pagas.astype('int8')})
+        return tabelas_segmentos(dados, segmentos={})[('global', 'todos')]
+
+    return contexto.obter('agregado', montar)
+
+
+# --- MCU ---
+
+@benchmark('mcu_escalar')
+def _mcu_escalar(contexto):
+    from mcu import calcular_mcu
+
+    n = min(contexto.linhas, 100_000)
+    linhas = list(zip(*_cenarios_mcu(n).values()))
+    return lambda: [calcular_mcu(*linha) for linha in linhas]
+
+
+@benchmark('mcu_lote')
+def _mcu_lote(contexto):
+    from mcu import calcular_mcu
+
+    cenarios = _cenarios_mcu(min(contexto.linhas, 100_000))
+    return lambda: calcular_mcu(**cenarios)
+
+
+# --- Platô ---
+
+@benchmark('plato_escalar')
+def _plato_escalar(contexto):
+    from calculos import detectar_plato
+
+    # sem o cache: mede o cálculo que o dashboard faz num cache miss
+    detectar = detectar_plato.__wrapped__
+    linhas = list(zip(*_cenarios_plato(min(contexto.linhas, 20_000)).values()))
+    return lambda: [detectar(*linha) for linha in linhas]
+
+
+@benchmark('plato_lote')
+def _plato_lote(contexto):
+    from solver_plato import resolver_plato_lote
+
+    cenarios = _cenarios_plato(min(contexto.linhas, 20_000))
+    return lambda: resolver_plato_lote(**cenarios)
+
+
+@benchmark('plato_numerico')
+def _plato_numerico(contexto):
+    from solver_plato import plato_numerico, retorno_marginal
+
+    return lambda: plato_numerico(lambda x: retorno_marginal(x, 1.0, 8.6, 0.25), 0.001)
+
+
+# --- Ingestão e junção ---
+
+@benchmark('leitura_csv_notebook')
+def _leitura_csv_notebook(contexto):
+    diretorio = contexto.arquivos_consultas()
+
+    def ler():
+        # laço do visualizacao_dados: concat incremental arquivo a arquivo
+        consulta = pd.DataFrame()
+        for arquivo in sorted(os.listdir(diretorio)):
+            consulta = pd.concat([consulta, pd.read_csv(os.path.join(diretorio, arquivo), sep=';')])
+        return consulta
+
+    return ler
+
+
+@benchmark('ingestao_parquet')
+def _ingestao_parquet(contexto):
+    from ingestao import ingerir_consultas
+
+    diretorio = contexto.arquivos_consultas()
+    destino = os.path.join(contexto.diretorio, 'dados_consulta.parquet')
+    return lambda: ingerir_consultas(diretorio, destino)
+
+
+@benchmark('juncao_merge_notebook')
+def _juncao_merge_notebook(contexto):
+    consultas = contexto.consultas_brutas().rename(columns={'document_number': 'CPF_consulta'})
+    pagas = contexto.pagas()
+
+    def juntar():
+        unicas = pagas.drop_duplicates(subset='CPF_pagas', keep='first')
+        return pd.merge(right=consultas, left=unicas, how='right', right_on='CPF_consulta', left_on='CPF_pagas')
+
+    return juntar
+
+
+@benchmark('juncao_indice_cpf')
+def _juncao_indice_cpf(contexto):
+    from juncao_cpf import JuncaoCPF
+
+    consultas = contexto.consultas_brutas().rename(columns={'document_number': 'CPF_consulta'})
+    juncao = JuncaoCPF()
+    juncao.atualizar_pagas(contexto.pagas())
+    return lambda: juncao.juntar(consultas)
+
+
+# --- Modelo NegBin ---
+
+@benchmark('negbin_ajuste_irls')
+def _negbin_ajuste_irls(contexto):
+    from ajuste_segmentos import ajustar_negbin
+
+    agregado = _agregado(contexto)
+    return lambda: ajustar_negbin(agregado['qtd_finalizadas'], agregado['Total_Consultas'])
+
+
+@benchmark('negbin_ajuste_statsmodels')
+def _negbin_ajuste_statsmodels(contexto):
+    import statsmodels.api as sm
+    import statsmodels.formula.api as smf
+
+    agregado = _agregado(contexto)
+    return lambda: smf.glm(formula='qtd_finalizadas ~ 1', data=agregado, family=sm.families.NegativeBinomial(alpha=1.0),
+                           exposure=agregado['Total_Consultas']).fit()
+
+
+def _carga_modelo(arquivo):
+    from modelos import limpar_registro, obter_modelo
+
+    caminho = os.path.join(os.path.dirname(os.path.abspath(__file__)), arquivo)
+
+    def carregar():
+        limpar_registro()
+        return obter_modelo(caminho)
+
+    return carregar
+
+
+@benchmark('negbin_carga_json')
+def _negbin_carga_json(contexto):
+    return _carga_modelo('negbin_model.json')
+
+
+@benchmark('negbin_carga_pkl')
+def _negbin_carga_pkl(contexto):
+    return _carga_modelo('negbin_model.pkl')
+
+
+# --- Previsão horária ---
+
+@benchmark('previsao_atualizacao_carregada')
+def _previsao_atualizacao_carregada(contexto):
+    """Ajuste -> salvar -> carregar -> atualizar, conferindo contra a atualização em memória."""
+    from previsao import HORAS_SEMANA, PrevisorHorario
+
+    gerador = np.random.default_rng(contexto.semente)
+    series = max(min(contexto.linhas // 1000, 500), 2)
+    rotulos = pd.DataFrame({'metrica': np.resize(['consultas', 'pagas'], series), 'segmento': np.arange(series) // 2})
+    valores = gerador.poisson(50, (series, 3 * HORAS_SEMANA)).astype(np.float64)
+    ajuste, novas = valores[:, :2 * HORAS_SEMANA], valores[:, 2 * HORAS_SEMANA:]
+
+    caminho = os.path.join(contexto.diretorio, 'previsao.parquet')
+    PrevisorHorario.ajustar(rotulos, 0, ajuste).salvar(caminho)
+    esperado = PrevisorHorario.ajustar(rotulos, 0, ajuste).atualizar(novas)
+
+    def atualizar():
+        previsor = PrevisorHorario.carregar(caminho).atualizar(novas)
+        if not np.allclose(previsor.prever(), esperado.prever()):
+            raise AssertionError("estado recarregado diverge da atualização em memória")
+        return previsor
+
+    return atualizar
+
+
+# --- Execução ---
+
+def medir(funcao, repeticoes: int = REPETICOES_PADRAO) -> dict:
+    """Tempos (s) de `repeticoes` execuções após um aquecimento."""
+
+    funcao()
+    tempos = []
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        funcao()
+        tempos.append(time.perf_counter() - inicio)
+
+    return {'mediana': float(np.median(tempos)), 'minimo': min(tempos), 'maximo': max(tempos), 'repeticoes': repeticoes}
+
+
+def executar(linhas: int = LINHAS_PADRAO, repeticoes: int = REPETICOES_PADRAO, filtro: str = None) -> dict:
+    """Roda os benchmarks registrados; falhas (ex.: dependência ausente) ficam registradas em `erro`."""
+
+    contexto = Contexto(linhas)
+    resultados = {}
+    try:
+        for nome, preparar in BENCHMARKS.items():
+            if filtro and filtro not in nome:
+                continue
+            try:
+                resultados[nome] = medir(preparar(contexto), repeticoes)
+            except Exception as erro:  # um benchmark quebrado não derruba os demais
+                resultados[nome] = {'erro': f'{type(erro).__name__}: {erro}'}
+    finally:
+        shutil.rmtree(contexto.diretorio, ignore_errors=True)
+
+    return resultados
+
+
+def commit_atual() -> str:
+    """Hash curto do HEAD, com sufixo `-sujo` quando há mudanças não commitadas."""
+
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, check=True).stdout.strip()
+        sujo = subprocess.run(['git', 'status', '--porcelain', '--untracked-files=no'], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return 'sem_git'
+    return f'{commit}-sujo' if sujo else commit
+
+
+def salvar_resultados(resultados: dict, destino: str = DIRETORIO_BENCHMARKS, linhas: int = None, repeticoes: int = None) -> str:
+    os.makedirs(destino, exist_ok=True)
+    commit = commit_atual()
+    caminho = os.path.join(destino, f'{commit}.json')
+
+    with open(caminho, 'w') as arquivo:
+        json.dump({
+            'commit': commit,
+            'data': datetime.now().isoformat(timespec='seconds'),
+            'linhas': linhas,
+            'repeticoes': repeticoes,
+            'resultados': resultados,
+        }, arquivo, indent=1)
+
+    return caminho
+
+
+def medicao_anterior(destino: str, commit: str, linhas: int = None, repeticoes: int = None) -> dict:
+    """Última medição gravada por outro commit (pela data de modificação) com os mesmos
+    `linhas` e `repeticoes`, ou None. Tempos de tamanhos diferentes não são comparáveis.
+    """
+
+    if not os.path.isdir(destino):
+        return None
+    arquivos = [os.path.join(destino, a) for a in os.listdir(destino) if a.endswith('.json') and a != f'{commit}.json']
+    for caminho in sorted(arquivos, key=os.path.getmtime, reverse=True):
+        with open(caminho) as arquivo:
+            medicao = json.load(arquivo)
+        if medicao.get('linhas') == linhas and medicao.get('repeticoes') == repeticoes:
+            return medicao
+    return None
+
+
+def comparar(atual: dict, anterior: dict, tolerancia: float = TOLERANCIA_REGRESSAO) -> pd.DataFrame:
+    """Razão das medianas atual/anterior por benchmark, marcando as regressões acima da tolerância."""
+
+    linhas = []
+    for nome, medicao in atual.items():
+        base = anterior.get(nome, {})
+        if 'mediana' not in medicao or 'mediana' not in base:
+            continue
+        razao = medicao['mediana'] / base['mediana'] if base['mediana'] else np.nan
+        linhas.append({'benchmark': nome, 'anterior_s': base['mediana'], 'atual_s': medicao['mediana'],
+                       'razao': razao, 'regressao': razao > 1 + tolerancia})
+
+    return pd.DataFrame(linhas, columns=['benchmark', 'anterior_s', 'atual_s', 'razao', 'regressao'])
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--linhas', type=int, default=LINHAS_PADRAO)
+    parser.add_argument('--repeticoes', type=int, default=REPETICOES_PADRAO)
+    parser.add_argument('--filtro', default=None)
+    parser.add_argument('--destino', default=DIRETORIO_BENCHMARKS)
+    args = parser.parse_args()
+
+    resultados = executar(args.linhas, args.repeticoes, args.filtro)
+    for nome, medicao in resultados.items():
+        print(f"{nome:28s} {medicao['mediana'] * 1000:10.2f} ms" if 'mediana' in medicao else f"{nome:28s} {medicao['erro']}")
+
+    caminho = salvar_resultados(resultados, args.destino, args.linhas, args.repeticoes)
+    anterior = medicao_anterior(args.destino, commit_atual(), args.linhas, args.repeticoes)
+    print(f"\nresultados em {caminho}")
+    if anterior is None:
+        print(f"sem medição anterior de outro commit com {args.linhas} linhas e {args.repeticoes} repetições; comparação omitida")
+    else:
+        comparacao = comparar(resultados, anterior['resultados'])
+        print(f"comparação com {anterior['commit']}:")
+        print(comparacao.to_string(index=False))
+        if comparacao['regressao'].any():
+            raise SystemExit(1)
@@ -0,0 +1,104 @@
+import functools
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+# Casas decimais usadas para normalizar floats na chave: absorve ruído de ponto
+# flutuante dos sliders (ex.: 0.1 + 0.2) sem misturar valores realmente distintos.
+CASAS_DECIMAIS = 8
+
+
+class CacheLRU:
+    """Cache LRU limitado e thread-safe, com contadores de acertos e falhas."""
+
+    def __init__(self, tamanho_maximo: int = 256):
+        if tamanho_maximo < 1:
+            raise ValueError("tamanho_maximo deve ser >= 1")
+
+        self.tamanho_maximo = tamanho_maximo
+        self.acertos = 0
+        self.falhas = 0
+        self._dados = OrderedDict()
+        self._trava = threading.Lock()
+
+    def __len__(self):
+        return len(self._dados)
+
+    def obter(self, chave, calcular):
+        """Retorna o valor da chave, calculando e guardando com `calcular()` quando ausente."""
+
+        with self._trava:
+            if chave in self._dados:
+                self._dados.move_to_end(chave)
+                self.acertos += 1
+                return self._dados[chave]
+            self.falhas += 1
+
+        # o cálculo roda fora da trava para não serializar sessões diferentes
+        valor = calcular()
+
+        with self._trava:
+            self._dados[chave] = valor
+            self._dados.move_to_end(chave)
+            while len(self._dados) > self.tamanho_maximo:
+                self._dados.popitem(last=False)
+
+        return valor
+
+    def limpar(self):
+        with self._trava:
+            self._dados.clear()
+            self.acertos = 0
+            self.falhas = 0
+
+    def estatisticas(self) -> dict:
+        total = self.acertos + self.falhas
+        return {
+            'acertos': self.acertos,
+            'falhas': self.falhas,
+            'taxa_acerto': self.acertos / total if total else 0.0,
+            'tamanho': len(self._dados),
+            'tamanho_maximo': self.tamanho_maximo,
+        }
+
+
+def normalizar(valor):
+    """Converte um parâmetro em valor hashable e estável para uso na chave do cache."""
+
+    if isinstance(valor, (bool, np.bool_)):
+        return bool(valor)
+    if isinstance(valor, (int, np.integer)):
+        return int(valor)
+    if isinstance(valor, (float, np.floating)):
+        valor = round(float(valor), CASAS_DECIMAIS)
+        # -0.0 e 0.0 devem cair na mesma chave
+        return valor + 0.0
+    if isinstance(valor, np.ndarray):
+        return tuple(normalizar(v) for v in valor.tolist())
+    if isinstance(valor, (list, tuple)):
+        return tuple(normalizar(v) for v in valor)
+    if isinstance(valor, dict):
+        return tuple(sorted((k, normalizar(v)) for k, v in valor.items()))
+    return valor
+
+
+def memoizar(tamanho_maximo: int = 256):
+    """Decorador que memoiza a função num CacheLRU próprio, chaveado pelos parâmetros normalizados.
+
+    O cache fica exposto em `funcao.cache` (estatísticas, limpeza). Os valores
+    devolvidos são compartilhados entre chamadas e não devem ser modificados.
+    """
+
+    def decorador(funcao):
+        cache = CacheLRU(tamanho_maximo)
+
+        @functools.wraps(funcao)
+        def envoltorio(*args, **kwargs):
+            chave = (normalizar(args), normalizar(kwargs))
+            return cache.obter(chave, lambda: funcao(*args, **kwargs))
+
+        envoltorio.cache = cache
+        return envoltorio
+
+    return decorador
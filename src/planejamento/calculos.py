@@ -0,0 +1,94 @@
+import numpy as np
+import pandas as pd
+
+from cache_calculos import memoizar
+from mcu import calcular_mcu, calcular_ponto_ruptura
+from sensibilidade import PONTOS_MAPA, mapa_calor, tornado
+from simulacao import simular_lucro
+from solver_plato import CONSULTA_MAX, CONSULTA_MIN, PASSO_PADRAO, polo_retorno, resolver_plato, retorno_marginal
+
+
+# --- MCU e Ponto de Ruptura ---
+
+@memoizar(tamanho_maximo=512)
+def curva_mcu(tac, spread, averbacao, formalizacao, comissao1, comissao2, valor_por_consulta, max_consultas):
+    """Curva da MCU em função do número de consultas (1..max_consultas)."""
+
+    consultas = np.arange(1, int(max_consultas) + 1)
+    mcus, _, _ = calcular_mcu(tac, spread, averbacao, formalizacao, comissao1, comissao2, consultas, valor_por_consulta)
+
+    return pd.DataFrame({'Consultas': consultas, 'MCU': mcus})
+
+
+@memoizar(tamanho_maximo=512)
+def ponto_ruptura(tac, spread, averbacao, formalizacao, comissao1, comissao2, valor_por_consulta):
+    """Retorna (ponto_ruptura_int, mcu_ruptura), ou (None, None) quando não há margem para consultas."""
+
+    ponto = calcular_ponto_ruptura(tac, spread, averbacao, formalizacao, comissao1, comissao2, valor_por_consulta)
+    if np.isnan(ponto):
+        return None, None
+
+    ponto_ruptura_int = int(ponto)
+    mcu_ruptura, _, _ = calcular_mcu(tac, spread, averbacao, formalizacao, comissao1, comissao2, ponto_ruptura_int, valor_por_consulta)
+
+    return ponto_ruptura_int, mcu_ruptura
+
+
+# --- Curva de Retorno Marginal e Platô ---
+
+@memoizar(tamanho_maximo=512)
+def curva_retorno(taxa_conversao, mcu, custo_consulta, pontos=400):
+    """Curva do retorno marginal para o gráfico, avaliada pela forma fechada (solver_plato.py).
+
+    Pontos a menos de um passo do polo (onde dif muda de sinal) ficam NaN para não
+    distorcer a escala do gráfico.
+    """
+
+    consultas = np.linspace(CONSULTA_MIN + 2 * PASSO_PADRAO, CONSULTA_MAX, int(pontos))
+    retorno = retorno_marginal(consultas, taxa_conversao, mcu, custo_consulta)
+
+    polo = polo_retorno(taxa_conversao, mcu, custo_consulta)
+    if not np.isnan(polo):
+        retorno = np.where(np.abs(consultas - polo) < PASSO_PADRAO, np.nan, retorno)
+
+    return consultas, retorno
+
+
+@memoizar(tamanho_maximo=512)
+def detectar_plato(taxa_conversao, mcu, custo_consulta, limiar):
+    """Retorna (ponto_plato, dif_no_plato) pela solução analítica; NaN quando não há platô."""
+
+    plato = resolver_plato(taxa_conversao, mcu, custo_consulta, limiar)
+
+    return plato['ponto_plato'], plato['dif_no_plato']
+
+
+def retorno_no_ponto(taxa_conversao, mcu, custo_consulta, consultas):
+    """Retorno marginal exatamente em `consultas`."""
+
+    return retorno_marginal(consultas, taxa_conversao, mcu, custo_consulta)
+
+
+# --- Simulação Monte Carlo ---
+
+@memoizar(tamanho_maximo=64)
+def simulacao_lucro(taxa, alpha, margem_contrato, custo_consulta, volumes=None, sorteios=100_000, semente=42):
+    """Quantis do lucro por volume (simulacao.py); `volumes` None usa a grade padrão de consultas."""
+
+    return simular_lucro(taxa, alpha, margem_contrato, custo_consulta, volumes, sorteios=sorteios, semente=semente)
+
+
+# --- Sensibilidade ---
+
+@memoizar(tamanho_maximo=128)
+def tornado_sensibilidade(base, variacao, metrica='mcu'):
+    """Tabela do tornado (sensibilidade.py) para o cenário `base` e a faixa ±`variacao`."""
+
+    return tornado(base, variacao, metrica=metrica)
+
+
+@memoizar(tamanho_maximo=64)
+def mapa_sensibilidade(base, parametro_x, parametro_y, variacao, pontos=PONTOS_MAPA):
+    """Grade 2-D (valores_x, valores_y, mcu, ponto_ruptura) de um par de parâmetros."""
+
+    return mapa_calor(base, parametro_x, parametro_y, variacao, pontos)
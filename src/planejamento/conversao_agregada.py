@@ -0,0 +1,143 @@
+"""Agregação de conversão (pagas / total de consultas) em qualquer granularidade.
+
+Os timestamps são tratados como inteiros (ns desde a época) e agrupados por
+divisão inteira + np.bincount, sem formatar strings nem fazer merges. Para
+troca interativa de granularidade, `RollupConversao` agrega uma única vez por
+minuto e deriva as demais granularidades a partir desse rollup.
+"""
+import numpy as np
+import pandas as pd
+
+NS_MINUTO = 60 * 10**9
+NS_HORA = 60 * NS_MINUTO
+NS_DIA = 24 * NS_HORA
+
+GRANULARIDADES = {'minuto': NS_MINUTO, 'hora': NS_HORA, 'dia': NS_DIA}
+
+# Horas do ciclo noturno (consulta) de como_onde; o restante é o ciclo diurno (digitação)
+HORAS_NOTURNO = [18, 19, 20, 21, 22, 23, 0, 1, 2, 3, 4, 5, 6, 7, 8]
+
+# Ciclo de conversão de conversao.ipynb: consultas a partir das 18h pertencem ao ciclo do dia seguinte
+HORA_VIRADA_CICLO = 18
+
+_NOTURNO = np.isin(np.arange(24), HORAS_NOTURNO)
+
+
+def marcar_pagas(dados: pd.DataFrame) -> np.ndarray:
+    """Consulta paga: `completed` e CPF com proposta paga (critério de `sucesso` em conversao.ipynb)."""
+    return ((dados['status_consulta'] == 'completed') & dados['CPF_pagas'].notna()).to_numpy()
+
+
+def epoch_ns(datas) -> np.ndarray:
+    datas = pd.to_datetime(pd.Series(datas), errors='coerce')
+    if getattr(datas.dt, 'tz', None) is not None:
+        datas = datas.dt.tz_localize(None)
+    return datas.to_numpy(dtype='datetime64[ns]').view(np.int64)
+
+
+def _montar(rotulos, total, pagas) -> pd.DataFrame:
+    total = total.astype(np.int64)
+    pagas = pagas.astype(np.int64)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        conversao = np.where(total > 0, pagas / total, np.nan)
+    return pd.DataFrame({
+        'count_pagas': pagas,
+        'count_nao_pagas': total - pagas,
+        'total_consultas': total,
+        'conversao': conversao,
+    }, index=rotulos)
+
+
+def _codigos(ns: np.ndarray, granularidade: str):
+    """Código inteiro do balde de cada timestamp e função que transforma código em rótulo."""
+
+    if granularidade in GRANULARIDADES:
+        passo = GRANULARIDADES[granularidade]
+        return ns // passo, lambda codigos: pd.DatetimeIndex((codigos * passo).astype('datetime64[ns]'), name='created_consulta')
+
+    if granularidade == 'ciclo':
+        # como_onde: data + diurno/noturno -> código = dia*2 + noturno
+        dia = ns // NS_DIA
+        hora = (ns % NS_DIA) // NS_HORA
+        codigos = dia * 2 + _NOTURNO[hora]
+
+        def rotulos(c):
+            return pd.MultiIndex.from_arrays([
+                pd.DatetimeIndex(((c // 2) * NS_DIA).astype('datetime64[ns]')),
+                np.where(c % 2 == 1, 'noturno', 'diurno'),
+            ], names=['data', 'ciclo'])
+        return codigos, rotulos
+
+    if granularidade == 'ciclo_conversao':
+        # desloca 6h para que 18h-17h59 do dia seguinte caia no mesmo dia
+        deslocado = ns + (24 - HORA_VIRADA_CICLO) * NS_HORA
+        return deslocado // NS_DIA, lambda c: pd.DatetimeIndex((c * NS_DIA).astype('datetime64[ns]'), name='ID_Ciclo')
+
+    raise ValueError(f"granularidade inválida: {granularidade}. Opções: {list(GRANULARIDADES) + ['ciclo', 'ciclo_conversao']}")
+
+
+def _agregar_codigos(ns, total, pagas, granularidade, preencher) -> pd.DataFrame:
+    codigos, rotulos = _codigos(ns, granularidade)
+    inicio = codigos.min()
+    posicoes = codigos - inicio
+
+    total = np.bincount(posicoes, weights=total)
+    pagas = np.bincount(posicoes, weights=pagas, minlength=len(total))
+    codigos_saida = np.arange(len(total), dtype=np.int64) + inicio
+
+    if not preencher:
+        ocupados = total > 0
+        total, pagas, codigos_saida = total[ocupados], pagas[ocupados], codigos_saida[ocupados]
+
+    return _montar(rotulos(codigos_saida), total, pagas)
+
+
+def agregar_conversao(datas, pagas, granularidade: str = 'hora', preencher: bool = True) -> pd.DataFrame:
+    """Pagas, não pagas, total e taxa de conversão por balde de tempo, em uma passada.
+
+    `datas` são os `created_consulta` e `pagas` a máscara booleana de consultas
+    pagas (ver `marcar_pagas`). Com `preencher`, baldes sem consulta aparecem
+    com zero (equivalente ao `resample(...).sum()` do notebook).
+    """
+
+    ns = epoch_ns(datas)
+    pagas = np.asarray(pagas, dtype=bool)
+    validos = ns != np.iinfo(np.int64).min  # NaT
+    ns, pagas = ns[validos], pagas[validos]
+
+    if len(ns) == 0:
+        return _montar(pd.Index([]), np.array([]), np.array([]))
+
+    return _agregar_codigos(ns, None, pagas, granularidade, preencher)
+
+
+class RollupConversao:
+    """Rollup por minuto, pré-calculado uma vez, para trocar de granularidade sem voltar às linhas."""
+
+    def __init__(self, datas, pagas):
+        por_minuto = agregar_conversao(datas, pagas, 'minuto', preencher=True)
+        self.minutos = por_minuto.index.asi8 // NS_MINUTO if len(por_minuto) else np.array([], dtype=np.int64)
+        self.total = por_minuto['total_consultas'].to_numpy()
+        self.pagas = por_minuto['count_pagas'].to_numpy()
+
+    @classmethod
+    def de_dados(cls, dados: pd.DataFrame, coluna_data: str = 'created_consulta') -> 'RollupConversao':
+        return cls(dados[coluna_data], marcar_pagas(dados))
+
+    def agregar(self, granularidade: str = 'hora', preencher: bool = True) -> pd.DataFrame:
+        """Mesma saída de `agregar_conversao`, calculada a partir do rollup por minuto."""
+
+        if len(self.minutos) == 0:
+            return _montar(pd.Index([]), np.array([]), np.array([]))
+
+        return _agregar_codigos(self.minutos * NS_MINUTO, self.total, self.pagas, granularidade, preencher)
+
+    def perfil_horario(self) -> pd.DataFrame:
+        """Médias por hora do dia (0-23) das séries horárias, como o `por_hora` do notebook."""
+
+        horario = self.agregar('hora')
+        horas = horario.index.hour
+        por_hora = horario.groupby(horas)[['total_consultas', 'count_pagas']].mean()
+        por_hora.index.name = 'horario_consulta'
+        por_hora['taxa_aprovacao'] = por_hora['count_pagas'] / por_hora['total_consultas']
+        return por_hora
@@ -0,0 +1,215 @@
+"""Diagnóstico de distribuição de vários atributos e segmentos de uma vez.
+
+Substitui o `retorna_distribuicao` de planejamento_prod / planejamento_sinteticos,
+que soma um atributo por CPF e calcula assimetria, curtose, média, desvio e o
+histograma (regra da raiz) de um atributo por chamada. Aqui:
+
+- a soma por CPF de todos os atributos sai de um único groupby;
+- os momentos de todos os pares (segmento, atributo) saem de bincounts
+  sobre a tabela longa, sem laço em Python;
+- assimetria e curtose seguem os padrões do scipy (viesadas, curtose de
+  Fisher), como no notebook, e o Jarque-Bera resume a aderência à normal;
+- `histogramas` traz as contagens por bin com a contagem esperada da normal
+  teórica (a curva vermelha do notebook), também num bincount só.
+
+Com `aplicar_log`, valores não positivos viram NaN (no notebook viravam -inf)
+e são contados em `nao_positivos`. Para grupos muito grandes, `aproximado=True`
+troca os quantis exatos por um esboço de histograma de RESOLUCAO_ESBOCO bins
+por grupo (erro de no máximo (max - min) / RESOLUCAO_ESBOCO).
+"""
+import numpy as np
+import pandas as pd
+from scipy.special import ndtr
+
+ATRIBUTOS = ['comissao_comercial', 'valor_operacao', 'CMSRepassada', 'tac_total', 'spread_total']
+
+QUANTIS = (0.05, 0.25, 0.5, 0.75, 0.95)
+RESOLUCAO_ESBOCO = 4096
+
+COLUNAS_DIAGNOSTICO = ['atributo', 'n', 'nao_positivos', 'media', 'desvio', 'assimetria', 'curtose', 'jarque_bera', 'p_normal',
+                       'minimo', 'maximo', 'bins']
+
+
+def _longa(dados: pd.DataFrame, atributos: list, segmentos: list, chave: str, aplicar_log: bool) -> pd.DataFrame:
+    """Tabela longa (segmentos..., atributo, valor) com a soma por `chave` de cada atributo."""
+
+    if chave is not None:
+        dados = dados.groupby(segmentos + [chave], observed=True, dropna=False)[atributos].sum(min_count=1).reset_index()
+
+    # formato longo sem melt: segmentos repetidos por atributo e atributo como categoria
+    longa = pd.DataFrame({segmento: np.tile(dados[segmento].to_numpy(), len(atributos)) for segmento in segmentos})
+    longa['atributo'] = pd.Categorical.from_codes(np.repeat(np.arange(len(atributos)), len(dados)), categories=atributos)
+    longa['valor'] = np.concatenate([dados[a].to_numpy(dtype='float64', na_value=np.nan) for a in atributos]) if atributos else []
+    longa['nao_positivo'] = False
+    if aplicar_log:
+        longa['nao_positivo'] = longa['valor'] <= 0
+        longa['valor'] = np.log(longa['valor'].where(~longa['nao_positivo']))
+
+    return longa
+
+
+def _codigos(longa: pd.DataFrame, grupos: list) -> tuple:
+    """Código inteiro do grupo de cada linha (0..n_grupos-1, na ordem dos grupos) e o índice dos grupos."""
+
+    combinados = np.zeros(len(longa), dtype=np.int64)
+    niveis = []
+    for coluna in grupos:
+        codigos, unicos = pd.factorize(longa[coluna], sort=True, use_na_sentinel=False)
+        combinados = combinados * len(unicos) + codigos
+        niveis.append(unicos)
+
+    # compacta os códigos combinados; com poucos grupos possíveis, sem ordenar as linhas
+    possiveis = int(np.prod([len(unicos) for unicos in niveis]))
+    if possiveis <= 10 * len(longa) + 1:
+        presentes = np.flatnonzero(np.bincount(combinados, minlength=possiveis))
+        mapa = np.zeros(possiveis, dtype=np.int64)
+        mapa[presentes] = np.arange(len(presentes))
+        codigos = mapa[combinados]
+    else:
+        presentes, codigos = np.unique(combinados, return_inverse=True)
+
+    valores_niveis = []
+    for unicos in reversed(niveis):
+        presentes, posicao = np.divmod(presentes, len(unicos))
+        valores_niveis.append(unicos.take(posicao))
+    indice = pd.MultiIndex.from_arrays(valores_niveis[::-1], names=grupos)
+
+    return codigos, indice
+
+
+def _momentos(longa: pd.DataFrame, grupos: list) -> tuple:
+    """Diagnóstico por grupo (índice = grupos) e os códigos de grupo e valores das linhas válidas."""
+
+    codigos, indice = _codigos(longa, grupos)
+    n_grupos = len(indice)
+
+    # momentos centrais por bincount dos códigos de grupo: média e somas das potências dos desvios
+    valores = longa['valor'].to_numpy()
+    validos = ~np.isnan(valores)
+    codigos_validos, valores = codigos[validos], valores[validos]
+    n = np.bincount(codigos_validos, minlength=n_grupos)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        media = np.bincount(codigos_validos, weights=valores, minlength=n_grupos) / n
+        desvios = valores - media[codigos_validos]
+        quadrados = desvios * desvios
+        m2, m3, m4 = (np.bincount(codigos_validos, weights=potencia, minlength=n_grupos) / n
+                      for potencia in (quadrados, quadrados * desvios, quadrados * quadrados))
+        assimetria = m3 / m2 ** 1.5
+        curtose = m4 / m2 ** 2 - 3
+        jarque_bera = n / 6 * (assimetria ** 2 + curtose ** 2 / 4)
+        desvio = np.sqrt(m2 * n / (n - 1))
+
+    extremos = pd.Series(valores).groupby(codigos_validos).agg(['min', 'max'])
+
+    diagnostico = pd.DataFrame({
+        'n': n,
+        'nao_positivos': np.bincount(codigos, weights=longa['nao_positivo'].to_numpy(), minlength=n_grupos).astype('int64'),
+        'media': media,
+        'desvio': desvio,
+        'assimetria': assimetria,
+        'curtose': curtose,
+        'jarque_bera': jarque_bera,
+        'p_normal': np.exp(-jarque_bera / 2),  # cauda da qui-quadrado com 2 graus de liberdade
+        'minimo': extremos['min'].reindex(range(n_grupos)).to_numpy(),
+        'maximo': extremos['max'].reindex(range(n_grupos)).to_numpy(),
+        'bins': np.maximum(np.round(np.sqrt(n)), 1).astype('int64'),
+    }, index=indice)
+
+    return diagnostico, codigos_validos, valores
+
+
+def diagnosticar(dados: pd.DataFrame, atributos: list = None, segmentos: list = None, chave: str = 'cpfs',
+                 aplicar_log: bool = False, quantis=QUANTIS, aproximado: bool = False) -> pd.DataFrame:
+    """Uma linha por (segmentos..., atributo) com momentos, normalidade, extremos, bins e quantis.
+
+    `chave` é a coluna somada antes do diagnóstico (CPF, como no notebook);
+    None usa as linhas como estão. Atributos ausentes em `dados` são ignorados.
+    """
+
+    atributos = [a for a in (ATRIBUTOS if atributos is None else atributos) if a in dados.columns]
+    segmentos = list(segmentos or [])
+    longa = _longa(dados, atributos, segmentos, chave, aplicar_log)
+    diagnostico, codigos, valores = _momentos(longa, segmentos + ['atributo'])
+
+    colunas_quantis = [f'q{round(q * 100):02d}' for q in quantis or ()]
+    if colunas_quantis:
+        if aproximado:
+            tabela_quantis = _quantis_esboco(codigos, valores, diagnostico, quantis)
+        else:
+            tabela_quantis = pd.Series(valores).groupby(codigos).quantile(list(quantis)).unstack()
+            # grupos sem nenhum valor válido (ou entrada vazia) ficam com quantis NaN
+            tabela_quantis = tabela_quantis.reindex(index=range(len(diagnostico)), columns=list(quantis)).set_axis(diagnostico.index)
+        tabela_quantis.columns = colunas_quantis
+        diagnostico = diagnostico.join(tabela_quantis)
+
+    return diagnostico.reset_index()[segmentos + COLUNAS_DIAGNOSTICO + colunas_quantis]
+
+
+def _bin(valores, codigos, minimos, larguras, bins) -> np.ndarray:
+    # bin de cada valor dentro do seu grupo; o máximo cai no último bin, como no np.histogram
+    with np.errstate(divide='ignore', invalid='ignore'):
+        posicao = np.floor((valores - minimos[codigos]) / larguras[codigos])
+    return np.clip(posicao, 0, bins[codigos] - 1).astype(np.int64)
+
+
+def _quantis_esboco(codigos: np.ndarray, valores: np.ndarray, diagnostico: pd.DataFrame, quantis) -> pd.DataFrame:
+    """Quantis por interpolação num histograma fino de cada grupo (um bincount para todos)."""
+
+    minimos = diagnostico['minimo'].to_numpy()
+    larguras = (diagnostico['maximo'].to_numpy() - minimos) / RESOLUCAO_ESBOCO
+    larguras = np.where(larguras > 0, larguras, 1.0)
+    resolucao = np.full(len(diagnostico), RESOLUCAO_ESBOCO)
+
+    celulas = codigos * RESOLUCAO_ESBOCO + _bin(valores, codigos, minimos, larguras, resolucao)
+    contagens = np.bincount(celulas, minlength=len(diagnostico) * RESOLUCAO_ESBOCO).reshape(len(diagnostico), RESOLUCAO_ESBOCO)
+    acumuladas = np.cumsum(contagens, axis=1)
+    totais = acumuladas[:, -1:]
+
+    resultado = np.full((len(diagnostico), len(quantis)), np.nan)
+    for j, q in enumerate(quantis):
+        alvo = q * totais
+        indice = np.minimum((acumuladas < alvo).sum(axis=1), RESOLUCAO_ESBOCO - 1)
+        antes = np.where(indice > 0, np.take_along_axis(acumuladas, (indice - 1)[:, None], axis=1)[:, 0], 0)
+        dentro = np.take_along_axis(contagens, indice[:, None], axis=1)[:, 0]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            fracao = np.where(dentro > 0, (alvo[:, 0] - antes) / dentro, 0.0)
+        resultado[:, j] = np.where(totais[:, 0] > 0, minimos + (indice + fracao) * larguras, np.nan)
+
+    return pd.DataFrame(resultado, index=diagnostico.index)
+
+
+def histogramas(dados: pd.DataFrame, atributos: list = None, segmentos: list = None, chave: str = 'cpfs',
+                aplicar_log: bool = False) -> pd.DataFrame:
+    """Contagens por bin (regra da raiz) de cada (segmentos..., atributo) e a contagem esperada pela normal teórica."""
+
+    atributos = [a for a in (ATRIBUTOS if atributos is None else atributos) if a in dados.columns]
+    segmentos = list(segmentos or [])
+    grupos = segmentos + ['atributo']
+
+    longa = _longa(dados, atributos, segmentos, chave, aplicar_log)
+    diagnostico, codigos, valores = _momentos(longa, grupos)
+    diagnostico = diagnostico.reset_index()
+
+    bins = diagnostico['bins'].to_numpy()
+    minimos = diagnostico['minimo'].to_numpy()
+    larguras = (diagnostico['maximo'].to_numpy() - minimos) / bins
+    larguras = np.where(larguras > 0, larguras, 1.0)
+    inicio_grupo = np.concatenate([[0], np.cumsum(bins)[:-1]])
+
+    contagens = np.bincount(inicio_grupo[codigos] + _bin(valores, codigos, minimos, larguras, bins), minlength=int(bins.sum()))
+
+    grupo = np.repeat(np.arange(len(diagnostico)), bins)
+    posicao = np.arange(int(bins.sum())) - inicio_grupo[grupo]
+    bin_inicio = minimos[grupo] + posicao * larguras[grupo]
+    bin_fim = bin_inicio + larguras[grupo]
+
+    media, desvio = diagnostico['media'].to_numpy()[grupo], diagnostico['desvio'].to_numpy()[grupo]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        esperada = diagnostico['n'].to_numpy()[grupo] * (ndtr((bin_fim - media) / desvio) - ndtr((bin_inicio - media) / desvio))
+
+    histograma = diagnostico.loc[grupo, grupos].reset_index(drop=True)
+    histograma['bin_inicio'] = bin_inicio
+    histograma['bin_fim'] = bin_fim
+    histograma['contagem'] = contagens
+    histograma['normal_esperada'] = esperada
+    return histograma
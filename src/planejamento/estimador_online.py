@@ -0,0 +1,171 @@
+"""Estimador online da taxa de conversão (binomial negativa só com intercepto e exposure).
+
+O modelo de como_onde (`qtd_finalizadas ~ 1`, exposure=Total_Consultas) é
+reajustado por IRLS sobre a tabela `agregado` inteira a cada carga. Aqui cada
+segmento guarda só somas das linhas (data, ciclo) já vistas:
+
+    n, Σy, Σe, Σy², Σy·e, Σe²        (y = finalizadas, e = Total_Consultas)
+
+e cada linha nova (ou revisada, quando chegam pagas atrasadas) entra em O(1).
+A qualquer momento:
+
+    taxa  r = Σy / Σe
+    alpha α = Σ[(y - e·r)² - e·r] / (r²·Σe²)     (momentos da NB2: Var = μ + α·μ²)
+    ep(ln r) = √(1/Σy + α·Σe²/(Σe)²)
+
+A taxa é o estimador de razão (quase-verossimilhança de Poisson), que coincide
+com o IRLS quando α → 0 e fica muito próxima dele nos volumes do agregado; o
+erro-padrão usa a variância NB2 com o α estimado. `exportar` grava o
+artefato JSON de modelos (mesmo formato do negbin_model.json), que os
+dashboards recarregam sozinhos quando o arquivo muda.
+"""
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+from modelos import artefato_de_ajuste, salvar_artefato
+
+CAMINHO_ESTIMADOR = '../../output_data/estado/estimador_online.json'
+
+CHAVE_GLOBAL = 'global=todos'
+
+ESTATISTICAS = ['n', 'soma_y', 'soma_e', 'soma_yy', 'soma_ye', 'soma_ee']
+COLUNAS_ESTIMATIVA = ['chave', 'nobs', 'taxa', 'inferior', 'superior', 'bse', 'alpha']
+
+
+def _linha(y: float, e: float) -> np.ndarray:
+    return np.array([1.0, y, e, y * y, y * e, e * e])
+
+
+class EstimadorOnline:
+    """Estatísticas suficientes por segmento (chave 'segmento=valor', como em ajuste_segmentos)."""
+
+    def __init__(self, estatisticas: dict = None, linhas: dict = None):
+        self.estatisticas = {chave: np.asarray(valores, dtype=float) for chave, valores in (estatisticas or {}).items()}
+        # valores já absorvidos por (data, ciclo), para aplicar só a diferença quando a linha é revista
+        self.linhas = {chave: dict(valores) for chave, valores in (linhas or {}).items()}
+
+    def atualizar(self, chave: str, finalizadas: float, total: float, linha: str = None) -> bool:
+        """Absorve uma linha (finalizadas, exposição); com `linha`, substitui o valor anterior dela.
+
+        Retorna False quando nada muda (exposição zero ou linha já vista com os mesmos valores).
+        """
+
+        finalizadas, total = float(finalizadas), float(total)
+        if total <= 0:
+            return False
+        soma = self.estatisticas.setdefault(chave, np.zeros(len(ESTATISTICAS)))
+        if linha is not None:
+            vistas = self.linhas.setdefault(chave, {})
+            anterior = vistas.get(linha)
+            if anterior is not None:
+                if tuple(anterior) == (finalizadas, total):
+                    return False
+                soma -= _linha(*anterior)
+            vistas[linha] = (finalizadas, total)
+        soma += _linha(finalizadas, total)
+        return True
+
+    def sincronizar(self, tabelas: dict) -> int:
+        """Aplica tabelas no formato agregado ({chave: DataFrame}); só linhas novas ou alteradas mudam algo.
+
+        Aceita a saída de `tabelas_segmentos` (chaves (segmento, valor), colunas
+        data e ciclo) ou o agregado do pipeline (data_f, ciclo_f). Retorna
+        quantas linhas foram absorvidas.
+        """
+
+        absorvidas = 0
+        for chave, tabela in tabelas.items():
+            if isinstance(chave, tuple):
+                chave = '='.join(chave)
+            tabela = tabela.rename(columns={'data_f': 'data', 'ciclo_f': 'ciclo'})
+            rotulos = pd.to_datetime(tabela['data']).dt.strftime('%Y-%m-%d') + '|' + tabela['ciclo'].astype(str)
+            for linha, y, e in zip(rotulos, tabela['qtd_finalizadas'].tolist(), tabela['Total_Consultas'].tolist()):
+                absorvidas += self.atualizar(chave, y, e, linha)
+        return absorvidas
+
+    def estimativa(self, chave: str = CHAVE_GLOBAL, z: float = 1.96) -> dict:
+        """Taxa, intervalo de confiança (escala log), erro-padrão de ln(taxa) e alpha de um segmento."""
+
+        n, soma_y, soma_e, soma_yy, soma_ye, soma_ee = self.estatisticas.get(chave, np.zeros(len(ESTATISTICAS)))
+        if soma_y <= 0 or soma_e <= 0:
+            return {'chave': chave, 'nobs': int(n), 'taxa': 0.0 if soma_e > 0 else np.nan,
+                    'inferior': np.nan, 'superior': np.nan, 'bse': np.nan, 'alpha': np.nan}
+
+        taxa = soma_y / soma_e
+        excesso = soma_yy - 2 * taxa * soma_ye + taxa ** 2 * soma_ee - soma_y
+        alpha = max(excesso / (taxa ** 2 * soma_ee), 0.0)
+        bse = np.sqrt(1 / soma_y + alpha * soma_ee / soma_e ** 2)
+
+        return {
+            'chave': chave,
+            'nobs': int(n),
+            'taxa': float(taxa),
+            'inferior': float(taxa * np.exp(-z * bse)),
+            'superior': float(taxa * np.exp(z * bse)),
+            'bse': float(bse),
+            'alpha': float(alpha),
+        }
+
+    def estimativas(self, z: float = 1.96) -> pd.DataFrame:
+        return pd.DataFrame([self.estimativa(chave, z) for chave in sorted(self.estatisticas)], columns=COLUNAS_ESTIMATIVA)
+
+    def artefato(self, chave: str = CHAVE_GLOBAL, alpha: float = None) -> dict:
+        """Artefato de modelos (negbin_model.json); `alpha` fixa a dispersão em vez da estimada."""
+
+        estimativa = self.estimativa(chave)
+        return artefato_de_ajuste({
+            'alpha': estimativa['alpha'] if alpha is None else alpha,
+            'params': [float(np.log(estimativa['taxa']))],
+            'bse': [estimativa['bse']],
+            'nobs': estimativa['nobs'],
+        })
+
+    def exportar(self, destino: str, chave: str = CHAVE_GLOBAL, alpha: float = None) -> str:
+        if not self.estimativa(chave)['taxa'] > 0:
+            raise ValueError(f"sem conversões em {chave}: nada para exportar")
+        salvar_artefato(self.artefato(chave, alpha), destino)
+        return destino
+
+    # --- persistência ---
+
+    def salvar(self, caminho: str = CAMINHO_ESTIMADOR):
+        os.makedirs(os.path.dirname(os.path.abspath(caminho)), exist_ok=True)
+        estado = {
+            'estatisticas': {chave: dict(zip(ESTATISTICAS, valores.tolist())) for chave, valores in self.estatisticas.items()},
+            'linhas': {chave: {linha: list(valores) for linha, valores in vistas.items()} for chave, vistas in self.linhas.items()},
+        }
+        temporario = caminho + '.tmp'
+        with open(temporario, 'w') as arquivo:
+            json.dump(estado, arquivo, ensure_ascii=False)
+        os.replace(temporario, caminho)
+
+    @classmethod
+    def carregar(cls, caminho: str = CAMINHO_ESTIMADOR) -> 'EstimadorOnline':
+        """Estado salvo, ou um estimador vazio se o arquivo ainda não existe."""
+
+        if not os.path.exists(caminho):
+            return cls()
+        with open(caminho) as arquivo:
+            estado = json.load(arquivo)
+        return cls(
+            {chave: [valores[nome] for nome in ESTATISTICAS] for chave, valores in estado['estatisticas'].items()},
+            {chave: {linha: tuple(valores) for linha, valores in vistas.items()} for chave, vistas in estado['linhas'].items()},
+        )
+
+
+if __name__ == '__main__':
+    import sys
+
+    from armazenamento import DIRETORIO_DATASETS
+
+    # uso: python estimador_online.py [destino.json]  (ex.: negbin_model.json, lido pelos dashboards)
+    estimador = EstimadorOnline.carregar()
+    agregado = pd.read_parquet(os.path.join(DIRETORIO_DATASETS, 'agregado.parquet'))
+    print(f"{estimador.sincronizar({CHAVE_GLOBAL: agregado})} linhas novas ou revistas")
+    estimador.salvar()
+    print(estimador.estimativas().to_string(index=False))
+    if len(sys.argv) > 1:
+        print(f"artefato gravado em {estimador.exportar(sys.argv[1])}")
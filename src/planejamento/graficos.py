@@ -0,0 +1,413 @@
+"""Gráficos dos dashboards.
+
+Três caminhos para o mesmo gráfico:
+
+- `figura_*`: Figure nova do matplotlib (API orientada a objetos, fora do
+  pyplot), para notebooks; é liberada pelo coletor como qualquer objeto.
+- `imagem_*`: bytes PNG/SVG memoizados pelos parâmetros. A renderização reusa
+  uma única Figure por tipo de gráfico, limpa a cada desenho, então o processo
+  não acumula figuras entre reruns do Streamlit.
+- `grafico_*_altair`: especificação Vega-Lite (Altair) com apenas os arrays de
+  dados, desenhada no navegador; disponível quando o altair está instalado.
+"""
+import io
+import threading
+
+import numpy as np
+import pandas as pd
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.colors import TwoSlopeNorm
+from matplotlib.figure import Figure
+
+from cache_calculos import memoizar
+from calculos import (curva_mcu, curva_retorno, detectar_plato, mapa_sensibilidade, ponto_ruptura, retorno_no_ponto, simulacao_lucro,
+                      tornado_sensibilidade)
+from mcu import calcular_mcu
+from sensibilidade import METRICAS, PARAMETROS, PONTOS_MAPA
+
+try:
+    import altair as alt
+
+    ALTAIR_DISPONIVEL = True
+except ImportError:  # o caminho no navegador é opcional
+    alt = None
+    ALTAIR_DISPONIVEL = False
+
+TAMANHO_FIGURA = (10, 5)
+DPI_IMAGEM = 110
+
+# Acima disto os marcadores da curva da MCU são espaçados (markevery)
+MAXIMO_MARCADORES = 40
+
+# Uma Figure reaproveitada por tipo de gráfico; o matplotlib não é thread-safe,
+# então a renderização é serializada pela trava
+_figuras = {}
+_trava_render = threading.Lock()
+
+
+# --- Desenho ---
+
+def _desenhar_mcu(ax, tac, spread, averbacao, formalizacao, comissao1, comissao2, valor_por_consulta, qtd_consulta_teste, max_consultas_grafico):
+    df_mcu = curva_mcu(tac, spread, averbacao, formalizacao, comissao1, comissao2, valor_por_consulta, max_consultas_grafico)
+    ponto_ruptura_int, _ = ponto_ruptura(tac, spread, averbacao, formalizacao, comissao1, comissao2, valor_por_consulta)
+
+    # Plot da MCU
+    espacamento = max(1, int(np.ceil(len(df_mcu) / MAXIMO_MARCADORES)))
+    ax.plot(df_mcu['Consultas'], df_mcu['MCU'], marker='o', markevery=espacamento, linestyle='-', color='skyblue', label='MCU por Consulta')
+
+    # Linha de Zero (Ponto de Equilíbrio)
+    ax.axhline(0, color='red', linestyle='--', linewidth=2, label='Ponto de Equilíbrio (MCU=0)')
+
+    # Linha vertical no Ponto de Ruptura (se aplicável)
+    if ponto_ruptura_int is not None:
+        mcu_atual, _, _ = calcular_mcu(tac, spread, averbacao, formalizacao, comissao1, comissao2, qtd_consulta_teste, valor_por_consulta)
+        # Desenha o Ponto de Ruptura (Máximo de Consultas Viável)
+        ax.axvline(ponto_ruptura_int, color='green', linestyle=':', linewidth=2, label=f'Máximo Viável ({ponto_ruptura_int})')
+        # Marca a MCU atual
+        ax.plot(qtd_consulta_teste, mcu_atual, 'o', color='purple', markersize=8, label=f'Cenário Atual ({qtd_consulta_teste} consultas)')
+
+    ax.set_title(f'MCU em Função do Número de Consultas (Máx. {max_consultas_grafico})')
+    ax.set_xlabel('Quantidade de Consultas por Contrato')
+    ax.set_ylabel('Margem de Contribuição Unitária (R$)')
+    ax.grid(True, linestyle='--')
+    ax.legend()
+
+
+def _desenhar_plato(ax, taxa_conversao, mcu, custo_consulta, mean_consulta, limiar):
+    consultas, retorno = curva_retorno(taxa_conversao, mcu, custo_consulta)
+    ponto_plato, dif_no_plato = detectar_plato(taxa_conversao, mcu, custo_consulta, limiar)
+    retorno_atual = retorno_no_ponto(taxa_conversao, mcu, custo_consulta, mean_consulta)
+
+    # Linha principal
+    ax.plot(
+        consultas,
+        retorno,
+        color='blue',
+        linestyle='--',
+        linewidth=2,
+        label="Retorno Marginal"
+    )
+
+    # Região e linha do platô
+    if not np.isnan(ponto_plato):
+        cor_plato, texto_plato, cor_linha = _estilo_plato(dif_no_plato)
+        ax.axvspan(ponto_plato, consultas.max(), color=cor_plato, alpha=0.3, label=texto_plato)
+        ax.axvline(x=ponto_plato, color=cor_linha, linestyle=':', linewidth=2, label=f"Ponto de Platô ({int(ponto_plato)})")
+
+    # --- Marca o ponto atual ---
+    ax.scatter(
+        mean_consulta, retorno_atual,
+        s=120, color='purple', edgecolor='white', zorder=5,
+        label=f"Cenário Atual ({int(mean_consulta)} consultas)"
+    )
+
+    # Linha vertical tracejada do cenário atual
+    ax.axvline(x=mean_consulta, color='purple', linestyle='--', alpha=0.6)
+
+    # Texto com seta para o ponto
+    ax.annotate(
+        f"{int(mean_consulta)} consultas\nRetorno: {retorno_atual:.2f}",
+        xy=(mean_consulta, retorno_atual),
+        xytext=(mean_consulta + 5000, retorno_atual + 0.05),
+        arrowprops=dict(arrowstyle="->", color='purple'),
+        color='purple',
+        fontsize=9,
+        bbox=dict(boxstyle="round,pad=0.3", fc="lavender", ec="purple", alpha=0.6)
+    )
+
+    # --- Estilo geral ---
+    ax.set_xlabel("Número de Consultas")
+    ax.set_ylabel("Retorno marginal (ΔDif / ΔDif anterior)")
+    ax.set_title("Curva de Retorno Marginal com Identificação de Eficiência, Ineficiência e Cenário Atual")
+    ax.legend()
+    ax.grid(True, linestyle='--', alpha=0.6)
+
+
+def _desenhar_simulacao(ax, taxa, alpha, margem_contrato, custo_consulta, mean_consulta, sorteios=100_000, semente=42):
+    tabela = simulacao_lucro(taxa, alpha, margem_contrato, custo_consulta, sorteios=sorteios, semente=semente)
+
+    ax.fill_between(tabela['consultas'], tabela['lucro_p5'], tabela['lucro_p95'], color='skyblue', alpha=0.4, label='Faixa P5 - P95')
+    ax.plot(tabela['consultas'], tabela['lucro_p50'], color='blue', linewidth=2, label='Mediana (P50)')
+    ax.plot(tabela['consultas'], tabela['lucro_medio'], color='navy', linestyle='--', linewidth=1, label='Lucro médio')
+
+    ax.axhline(0, color='red', linestyle='--', linewidth=1.5, label='Lucro zero')
+    ax.axvline(x=mean_consulta, color='purple', linestyle='--', alpha=0.6, label=f'Cenário Atual ({int(mean_consulta)} consultas)')
+
+    ax.set_xlabel('Número de Consultas')
+    ax.set_ylabel('Lucro (R$)')
+    ax.set_title(f'Distribuição do Lucro Simulado ({sorteios:,} sorteios por volume)')
+    ax.legend()
+    ax.grid(True, linestyle='--', alpha=0.6)
+
+
+def _desenhar_tornado(ax, base, variacao, metrica):
+    tabela = tornado_sensibilidade(base, variacao, metrica)
+    prefixo = 'mcu' if metrica == 'mcu' else 'ruptura'
+    inferior, superior = f'{prefixo}_inferior', f'{prefixo}_superior'
+    referencia = tabela[f'{prefixo}_base'].iloc[0]
+
+    # maior impacto no topo; cada barra vai do valor de referência ao resultado na ponta da faixa
+    tabela = tabela.iloc[::-1]
+    posicoes = np.arange(len(tabela))
+    ax.barh(posicoes, tabela[inferior] - referencia, left=referencia, color='indianred', label=f'Parâmetro -{variacao:.0%}')
+    ax.barh(posicoes, tabela[superior] - referencia, left=referencia, color='seagreen', alpha=0.8, label=f'Parâmetro +{variacao:.0%}')
+    ax.axvline(referencia, color='black', linewidth=1)
+
+    ax.set_yticks(posicoes)
+    ax.set_yticklabels(tabela['rotulo'])
+    ax.set_xlabel(METRICAS[metrica])
+    ax.set_title(f'Sensibilidade a ±{variacao:.0%} em cada parâmetro')
+    ax.grid(True, axis='x', linestyle='--', alpha=0.6)
+    ax.legend()
+
+
+def _desenhar_mapa_calor(ax, base, parametro_x, parametro_y, variacao, metrica, pontos):
+    valores_x, valores_y, mcu, ruptura = mapa_sensibilidade(base, parametro_x, parametro_y, variacao, pontos)
+    grade = mcu if metrica == 'mcu' else ruptura
+
+    # imshow desenha a grade como uma imagem só (bem mais rápido que pcolormesh com dezenas de milhares de células)
+    extensao = [valores_x[0], valores_x[-1], valores_y[0], valores_y[-1]]
+    if metrica == 'mcu':
+        minimo, maximo = np.nanmin(grade), np.nanmax(grade)
+        normalizacao = TwoSlopeNorm(0.0, minimo, maximo) if minimo < 0 < maximo else None
+        imagem = ax.imshow(grade, origin='lower', extent=extensao, aspect='auto', cmap='RdYlGn', norm=normalizacao)
+    else:
+        imagem = ax.imshow(grade, origin='lower', extent=extensao, aspect='auto', cmap='viridis')
+    ax.figure.colorbar(imagem, ax=ax, label=METRICAS[metrica])
+
+    # fronteira da MCU zero e o cenário atual
+    if np.nanmin(mcu) < 0 < np.nanmax(mcu):
+        ax.contour(valores_x, valores_y, mcu, levels=[0], colors='black', linestyles='--', linewidths=1.5)
+    ax.plot(base[parametro_x], base[parametro_y], 'o', color='purple', markersize=8, label='Cenário Atual')
+
+    ax.set_xlabel(PARAMETROS.get(parametro_x, parametro_x))
+    ax.set_ylabel(PARAMETROS.get(parametro_y, parametro_y))
+    ax.set_title(f'{METRICAS[metrica]}: {PARAMETROS.get(parametro_x, parametro_x)} × {PARAMETROS.get(parametro_y, parametro_y)} (±{variacao:.0%})')
+    ax.legend(loc='upper right')
+
+
+def _estilo_plato(dif_no_plato):
+    if dif_no_plato > 0:
+        return "lightgreen", "Platô da Eficiência (Lucro)", "green"
+    return "lightcoral", "Platô da Ineficiência (Prejuízo)", "red"
+
+
+_DESENHOS = {
+    'mcu': _desenhar_mcu,
+    'plato': _desenhar_plato,
+    'simulacao': _desenhar_simulacao,
+    'tornado': _desenhar_tornado,
+    'mapa_calor': _desenhar_mapa_calor,
+}
+
+
+# --- Figuras (notebooks) ---
+
+def _nova_figura(tipo, *args):
+    fig = Figure(figsize=TAMANHO_FIGURA)
+    FigureCanvasAgg(fig)
+    _DESENHOS[tipo](fig.subplots(), *args)
+    fig.tight_layout()
+    return fig
+
+
+def figura_mcu(tac, spread, averbacao, formalizacao, comissao1, comissao2, valor_por_consulta, qtd_consulta_teste, max_consultas_grafico):
+    """Gráfico de tendência da MCU em função do número de consultas."""
+    return _nova_figura('mcu', tac, spread, averbacao, formalizacao, comissao1, comissao2, valor_por_consulta, qtd_consulta_teste, max_consultas_grafico)
+
+
+def figura_plato(taxa_conversao, mcu, custo_consulta, mean_consulta, limiar):
+    """Curva de retorno marginal com o platô de eficiência/ineficiência e o cenário atual."""
+    return _nova_figura('plato', taxa_conversao, mcu, custo_consulta, mean_consulta, limiar)
+
+
+def figura_simulacao(taxa, alpha, margem_contrato, custo_consulta, mean_consulta, sorteios=100_000, semente=42):
+    """Faixa P5-P95 e mediana do lucro simulado por volume de consultas."""
+    return _nova_figura('simulacao', taxa, alpha, margem_contrato, custo_consulta, mean_consulta, sorteios, semente)
+
+
+def figura_tornado(base, variacao, metrica='mcu'):
+    """Tornado do impacto de ±`variacao` em cada parâmetro sobre a MCU ou o ponto de ruptura."""
+    return _nova_figura('tornado', base, variacao, metrica)
+
+
+def figura_mapa_calor(base, parametro_x, parametro_y, variacao, metrica='mcu', pontos=PONTOS_MAPA):
+    """Mapa de calor da MCU ou do ponto de ruptura para um par de parâmetros, com a fronteira MCU = 0."""
+    return _nova_figura('mapa_calor', base, parametro_x, parametro_y, variacao, metrica, pontos)
+
+
+# --- Imagens memoizadas (dashboards) ---
+
+def _renderizar(tipo, formato, *args) -> bytes:
+    with _trava_render:
+        fig = _figuras.get(tipo)
+        if fig is None:
+            fig = Figure(figsize=TAMANHO_FIGURA)
+            FigureCanvasAgg(fig)
+            _figuras[tipo] = fig
+        fig.clear()
+
+        _DESENHOS[tipo](fig.subplots(), *args)
+        fig.tight_layout()
+
+        buffer = io.BytesIO()
+        fig.savefig(buffer, format=formato, dpi=DPI_IMAGEM)
+        fig.clear()
+
+    return buffer.getvalue()
+
+
+@memoizar(tamanho_maximo=64)
+def imagem_mcu(tac, spread, averbacao, formalizacao, comissao1, comissao2, valor_por_consulta, qtd_consulta_teste, max_consultas_grafico, formato='png'):
+    """Bytes (PNG ou SVG) do gráfico da MCU, memoizados pelos parâmetros."""
+    return _renderizar('mcu', formato, tac, spread, averbacao, formalizacao, comissao1, comissao2, valor_por_consulta, qtd_consulta_teste, max_consultas_grafico)
+
+
+@memoizar(tamanho_maximo=64)
+def imagem_plato(taxa_conversao, mcu, custo_consulta, mean_consulta, limiar, formato='png'):
+    """Bytes (PNG ou SVG) da curva de retorno marginal, memoizados pelos parâmetros."""
+    return _renderizar('plato', formato, taxa_conversao, mcu, custo_consulta, mean_consulta, limiar)
+
+
+@memoizar(tamanho_maximo=64)
+def imagem_simulacao(taxa, alpha, margem_contrato, custo_consulta, mean_consulta, sorteios=100_000, semente=42, formato='png'):
+    """Bytes (PNG ou SVG) da distribuição do lucro simulado, memoizados pelos parâmetros."""
+    return _renderizar('simulacao', formato, taxa, alpha, margem_contrato, custo_consulta, mean_consulta, sorteios, semente)
+
+
+@memoizar(tamanho_maximo=64)
+def imagem_tornado(base, variacao, metrica='mcu', formato='png'):
+    """Bytes (PNG ou SVG) do tornado de sensibilidade, memoizados pelos parâmetros."""
+    return _renderizar('tornado', formato, base, variacao, metrica)
+
+
+@memoizar(tamanho_maximo=64)
+def imagem_mapa_calor(base, parametro_x, parametro_y, variacao, metrica='mcu', pontos=PONTOS_MAPA, formato='png'):
+    """Bytes (PNG ou SVG) do mapa de calor de um par de parâmetros, memoizados pelos parâmetros."""
+    return _renderizar('mapa_calor', formato, base, parametro_x, parametro_y, variacao, metrica, pontos)
+
+
+# --- Vega-Lite (renderização no navegador) ---
+
+def _exigir_altair():
+    if not ALTAIR_DISPONIVEL:
+        raise ImportError("altair não está instalado; use imagem_* ou instale altair")
+
+
+def _linha_horizontal(valor, cor):
+    return alt.Chart(pd.DataFrame({'y': [valor]})).mark_rule(color=cor, strokeDash=[6, 4]).encode(y='y:Q')
+
+
+def _linha_vertical(valor, cor):
+    return alt.Chart(pd.DataFrame({'x': [valor]})).mark_rule(color=cor, strokeDash=[2, 2]).encode(x='x:Q')
+
+
+def grafico_mcu_altair(tac, spread, averbacao, formalizacao, comissao1, comissao2, valor_por_consulta, qtd_consulta_teste, max_consultas_grafico):
+    """Gráfico da MCU em Vega-Lite (para `st.altair_chart`)."""
+
+    _exigir_altair()
+    df_mcu = curva_mcu(tac, spread, averbacao, formalizacao, comissao1, comissao2, valor_por_consulta, max_consultas_grafico)
+    ponto_ruptura_int, _ = ponto_ruptura(tac, spread, averbacao, formalizacao, comissao1, comissao2, valor_por_consulta)
+
+    camadas = [
+        alt.Chart(df_mcu).mark_line(color='skyblue').encode(
+            x=alt.X('Consultas:Q', title='Quantidade de Consultas por Contrato'),
+            y=alt.Y('MCU:Q', title='Margem de Contribuição Unitária (R$)'),
+            tooltip=['Consultas', alt.Tooltip('MCU:Q', format='.2f')],
+        ),
+        _linha_horizontal(0, 'red'),
+    ]
+
+    if ponto_ruptura_int is not None:
+        mcu_atual, _, _ = calcular_mcu(tac, spread, averbacao, formalizacao, comissao1, comissao2, qtd_consulta_teste, valor_por_consulta)
+        camadas.append(_linha_vertical(ponto_ruptura_int, 'green'))
+        camadas.append(alt.Chart(pd.DataFrame({'Consultas': [qtd_consulta_teste], 'MCU': [mcu_atual]}))
+                       .mark_point(color='purple', filled=True, size=100).encode(x='Consultas:Q', y='MCU:Q'))
+
+    return alt.layer(*camadas).properties(title=f'MCU em Função do Número de Consultas (Máx. {max_consultas_grafico})')
+
+
+def grafico_plato_altair(taxa_conversao, mcu, custo_consulta, mean_consulta, limiar):
+    """Curva de retorno marginal em Vega-Lite (para `st.altair_chart`)."""
+
+    _exigir_altair()
+    consultas, retorno = curva_retorno(taxa_conversao, mcu, custo_consulta)
+    ponto_plato, dif_no_plato = detectar_plato(taxa_conversao, mcu, custo_consulta, limiar)
+    retorno_atual = retorno_no_ponto(taxa_conversao, mcu, custo_consulta, mean_consulta)
+
+    # NaN perto do polo vira lacuna na linha
+    curva = pd.DataFrame({'consultas': consultas, 'retorno': retorno})
+    camadas = [
+        alt.Chart(curva).mark_line(color='blue', strokeDash=[8, 4]).encode(
+            x=alt.X('consultas:Q', title='Número de Consultas'),
+            y=alt.Y('retorno:Q', title='Retorno marginal (ΔDif / ΔDif anterior)'),
+        ),
+    ]
+
+    if not np.isnan(ponto_plato):
+        cor_plato, _, cor_linha = _estilo_plato(dif_no_plato)
+        regiao = pd.DataFrame({'inicio': [ponto_plato], 'fim': [consultas.max()]})
+        camadas.insert(0, alt.Chart(regiao).mark_rect(color=cor_plato, opacity=0.3).encode(x='inicio:Q', x2='fim:Q'))
+        camadas.append(_linha_vertical(ponto_plato, cor_linha))
+
+    camadas.append(alt.Chart(pd.DataFrame({'consultas': [mean_consulta], 'retorno': [retorno_atual]}))
+                   .mark_point(color='purple', filled=True, size=120).encode(x='consultas:Q', y='retorno:Q'))
+
+    return alt.layer(*camadas).properties(title='Curva de Retorno Marginal')
+
+
+def grafico_simulacao_altair(taxa, alpha, margem_contrato, custo_consulta, mean_consulta, sorteios=100_000, semente=42):
+    """Faixa P5-P95 e mediana do lucro simulado em Vega-Lite (para `st.altair_chart`)."""
+
+    _exigir_altair()
+    tabela = simulacao_lucro(taxa, alpha, margem_contrato, custo_consulta, sorteios=sorteios, semente=semente)
+    base = alt.Chart(tabela[['consultas', 'lucro_p5', 'lucro_p50', 'lucro_p95', 'lucro_medio']])
+
+    camadas = [
+        base.mark_area(color='skyblue', opacity=0.4).encode(
+            x=alt.X('consultas:Q', title='Número de Consultas'),
+            y=alt.Y('lucro_p5:Q', title='Lucro (R$)'),
+            y2='lucro_p95:Q',
+        ),
+        base.mark_line(color='blue').encode(x='consultas:Q', y='lucro_p50:Q'),
+        base.mark_line(color='navy', strokeDash=[4, 4]).encode(x='consultas:Q', y='lucro_medio:Q'),
+        _linha_horizontal(0, 'red'),
+        _linha_vertical(mean_consulta, 'purple'),
+    ]
+
+    return alt.layer(*camadas).properties(title=f'Distribuição do Lucro Simulado ({sorteios:,} sorteios por volume)')
+
+
+def grafico_tornado_altair(base, variacao, metrica='mcu'):
+    """Tornado de sensibilidade em Vega-Lite (para `st.altair_chart`).
+
+    O mapa de calor fica só na versão em imagem: a grade tem dezenas de
+    milhares de pontos, acima do limite de linhas que o altair envia.
+    """
+
+    _exigir_altair()
+    tabela = tornado_sensibilidade(base, variacao, metrica)
+    prefixo = 'mcu' if metrica == 'mcu' else 'ruptura'
+    inferior, superior = f'{prefixo}_inferior', f'{prefixo}_superior'
+    referencia = tabela[f'{prefixo}_base'].iloc[0]
+
+    barras = pd.DataFrame({
+        'rotulo': np.concatenate([tabela['rotulo'], tabela['rotulo']]),
+        'lado': [f'-{variacao:.0%}'] * len(tabela) + [f'+{variacao:.0%}'] * len(tabela),
+        'inicio': referencia,
+        'valor': np.concatenate([tabela[inferior], tabela[superior]]),
+    })
+    ordem = list(tabela['rotulo'])
+
+    camadas = [
+        alt.Chart(barras).mark_bar(opacity=0.8).encode(
+            x=alt.X('inicio:Q', title=METRICAS[metrica]),
+            x2='valor:Q',
+            y=alt.Y('rotulo:N', sort=ordem, title=None),
+            color=alt.Color('lado:N', scale=alt.Scale(range=['indianred', 'seagreen']), title='Parâmetro'),
+            tooltip=['rotulo', 'lado', alt.Tooltip('valor:Q', format='.2f')],
+        ),
+        _linha_vertical(referencia, 'black'),
+    ]
+
+    return alt.layer(*camadas).properties(title=f'Sensibilidade a ±{variacao:.0%} em cada parâmetro')
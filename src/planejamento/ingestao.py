@@ -0,0 +1,136 @@
+import os
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from instrumentacao import etapa
+
+# Mensagens de retorno da consulta -> categoria usada nas análises
+REFAT_STATUS = {'Não foi possível consultar o saldo no momento! - Instituição Fiduciária não possui autorização do Trabalhador para Operação Fiduciária.': 'falta autorizacao',
+'Trabalhador não possui adesão ao saque aniversário vigente na data corrente.': 'sem adesão ao SA',
+'Existe uma Operação Fiduciária em andamento. Tente mais tarde.': 'Já existe operação',
+'Não foi possível consultar o saldo no momento! - Trabalhador informado não possui contas de FGTS.': 'não tem conta FGTS',
+'Não foi possível consultar o saldo no momento! - Mudanças cadastrais na conta do FGTS foram realizadas, que impedem a contratação. Entre em contato com o setor de FGTS da CAIXA.': 'mudança cadastrais',
+'Não foi possível consultar o saldo no momento!': 'sem consulta',
+'Endpoint request timed out': 'timeout',
+'Não foi possível consultar o saldo no momento! - Existe uma Operação Fiduciária em andamento. Tente mais tarde.': 'Já existe operação',
+'Too Many Requests': 'too many requests',
+'Não foi possível consultar o saldo no momento! - Operação não permitida por pendência no processo de pagamento de saque aniversário.': 'pendência no processo de pagamento SA',
+'Não foi possível consultar o saldo no momento! - Não é possível realizar a operação para o CPF informado.': 'proibida operação CPF informado',
+'Não foi possível consultar o saldo no momento! - Operação não permitida antes de 13/05/2025. ': 'data limit',
+'Não foi possível consultar o saldo no momento! - Operação não permitida antes de 10/05/2025. ': 'data limit',
+'Request failed with status code 504':'504'}
+
+# Categorias tratadas como ruído e descartadas da base de consultas
+MENSAGENS_DESCARTADAS = ('falta autorizacao', 'too many requests', 'timeout')
+
+# Colunas do resultado diário (mesma ordem do arquivo) e seus tipos
+COLUNAS_CONSULTA = ['id_consulta', 'provider_consulta', 'CPF_consulta', 'status_consulta', 'provider_key_consulta', 'created_consulta', 'update_consulta', 'partiner_consulta', 'message_consulta']
+DTYPES_CONSULTA = {coluna: 'string' for coluna in COLUNAS_CONSULTA}
+COLUNAS_DATA = ['created_consulta', 'update_consulta']
+
+SCHEMA_CONSULTA = pa.schema([
+    ('id_consulta', pa.string()),
+    ('provider_consulta', pa.string()),
+    ('CPF_consulta', pa.string()),
+    ('status_consulta', pa.string()),
+    ('provider_key_consulta', pa.string()),
+    ('created_consulta', pa.timestamp('ns')),
+    ('update_consulta', pa.timestamp('ns')),
+    ('partiner_consulta', pa.string()),
+    ('message_consulta', pa.string()),
+    ('arquivo_origem', pa.string()),
+])
+
+TAMANHO_CHUNK = 200_000
+
+
+def listar_resultados(diretorio: str) -> list:
+    """Arquivos `resultado_*.csv` do diretório, em ordem (o nome carrega a data)."""
+    return sorted(
+        os.path.join(diretorio, arquivo)
+        for arquivo in os.listdir(diretorio)
+        if arquivo.startswith('resultado_') and arquivo.endswith('.csv')
+    )
+
+
+def _para_datetime(serie: pd.Series) -> pd.Series:
+    datas = pd.to_datetime(serie, errors='coerce')
+    if getattr(datas.dt, 'tz', None) is not None:
+        datas = datas.dt.tz_convert('America/Sao_Paulo').dt.tz_localize(None)
+    return datas.astype('datetime64[ns]')
+
+
+def tratar_chunk(chunk: pd.DataFrame, mensagens_descartadas=MENSAGENS_DESCARTADAS) -> pd.DataFrame:
+    """Aplica o mapeamento de mensagens, o filtro de ruído e a tipagem a um bloco de consultas."""
+
+    with etapa('consultas.refat_status', len(chunk)):
+        chunk['message_consulta'] = chunk['message_consulta'].map(REFAT_STATUS).astype('string')
+        chunk = chunk[~chunk['message_consulta'].isin(mensagens_descartadas)].copy()
+
+    with etapa('consultas.tipagem', len(chunk)):
+        chunk['CPF_consulta'] = chunk['CPF_consulta'].str.replace(r'\D', '', regex=True).str.zfill(11)
+        for coluna in COLUNAS_DATA:
+            chunk[coluna] = _para_datetime(chunk[coluna])
+
+    return chunk
+
+
+def ler_consultas(diretorio: str, tamanho_chunk: int = TAMANHO_CHUNK, erros: list = None, arquivos: list = None,
+                  mensagens_descartadas=MENSAGENS_DESCARTADAS):
+    """Gera blocos tratados de consultas, arquivo a arquivo, sem concatenar o histórico em memória.
+
+    Arquivos que falham são registrados em `erros` (lista de dicts com arquivo e
+    mensagem) em vez de serem descartados em silêncio. Com
+    `mensagens_descartadas=()` as consultas com falha (ex.: too many requests)
+    são mantidas.
+    """
+
+    if arquivos is None:
+        arquivos = listar_resultados(diretorio)
+
+    for caminho in arquivos:
+        nome = os.path.basename(caminho)
+        try:
+            leitor = pd.read_csv(caminho, sep=';', header=0, names=COLUNAS_CONSULTA,
+                                 dtype=DTYPES_CONSULTA, chunksize=tamanho_chunk)
+            for chunk in leitor:
+                chunk = tratar_chunk(chunk, mensagens_descartadas)
+                chunk['arquivo_origem'] = nome
+                yield chunk
+        except (OSError, ValueError, pd.errors.ParserError) as erro:
+            if erros is None:
+                raise
+            erros.append({'arquivo': nome, 'erro': f'{type(erro).__name__}: {erro}'})
+
+
+def ingerir_consultas(diretorio: str, destino: str, tamanho_chunk: int = TAMANHO_CHUNK, arquivos: list = None) -> dict:
+    """Lê os resultados diários em blocos e grava em um único Parquet, com memória limitada a um bloco.
+
+    Retorna um resumo com linhas gravadas por arquivo e a lista de erros.
+    """
+
+    erros = []
+    linhas_por_arquivo = {}
+
+    os.makedirs(os.path.dirname(os.path.abspath(destino)), exist_ok=True)
+    with pq.ParquetWriter(destino, SCHEMA_CONSULTA) as escritor:
+        for chunk in ler_consultas(diretorio, tamanho_chunk, erros, arquivos):
+            escritor.write_table(pa.Table.from_pandas(chunk, schema=SCHEMA_CONSULTA, preserve_index=False))
+            nome = chunk['arquivo_origem'].iat[0] if len(chunk) else None
+            if nome is not None:
+                linhas_por_arquivo[nome] = linhas_por_arquivo.get(nome, 0) + len(chunk)
+
+    return {
+        'linhas_gravadas': sum(linhas_por_arquivo.values()),
+        'linhas_por_arquivo': linhas_por_arquivo,
+        'erros': erros,
+    }
+
+
+if __name__ == '__main__':
+    resumo = ingerir_consultas('../../input_data/7560/7560/', '../../output_data/datasets/dados_consulta.parquet')
+    print(f"{resumo['linhas_gravadas']} consultas gravadas de {len(resumo['linhas_por_arquivo'])} arquivos")
+    for erro in resumo['erros']:
+        print(f"falha em {erro['arquivo']}: {erro['erro']}")
@@ -0,0 +1,192 @@
+"""Instrumentação opcional das etapas do pipeline: tempo, linhas, linhas/s e pico de memória.
+
+As etapas são marcadas no código com `with etapa('nome', linhas):`. Fora de uma
+`Instrumentacao` ativa isso não faz nada (custo de uma consulta a ContextVar).
+Para medir uma execução:
+
+    with Instrumentacao() as inst:
+        pipeline.atualizar(...)
+    inst.salvar()        # acrescenta uma linha JSON por etapa em metricas/etapas.jsonl
+    inst.tabela()        # DataFrame agregado por etapa
+
+Etapas podem ser aninhadas (o tempo da interna está contido no da externa) e
+repetidas (uma por arquivo ou bloco): a tabela soma tempo e linhas por nome.
+O pico de memória vem do tracemalloc, que cobre objetos Python e buffers do
+NumPy/pandas, mas não a memória do Arrow; com ele ligado a execução fica mais
+lenta, por isso `memoria=False` mede só tempo e linhas.
+"""
+import json
+import os
+import time
+import tracemalloc
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime
+
+import pandas as pd
+
+DIRETORIO_METRICAS = '../../output_data/metricas/'
+ARQUIVO_METRICAS = 'etapas.jsonl'
+
+COLUNAS_METRICAS = ['etapa', 'nivel', 'chamadas', 'segundos', 'linhas', 'linhas_por_s', 'pico_mb']
+
+_ATUAL = ContextVar('instrumentacao', default=None)
+
+
+class Registro:
+    """Medição de uma chamada de etapa; `linhas` pode ser definido dentro do bloco."""
+
+    __slots__ = ('etapa', 'ordem', 'nivel', 'linhas', 'segundos', 'pico_bytes')
+
+    def __init__(self, etapa: str, ordem: int = 0, nivel: int = 0, linhas: int = None):
+        self.etapa = etapa
+        self.ordem = ordem
+        self.nivel = nivel
+        self.linhas = linhas
+        self.segundos = 0.0
+        self.pico_bytes = None
+
+
+class Instrumentacao:
+    """Coleta as etapas executadas enquanto está ativa (`with Instrumentacao():`)."""
+
+    def __init__(self, memoria: bool = True, execucao: str = None):
+        self.memoria = memoria
+        self.execucao = execucao or datetime.now().strftime('%Y%m%dT%H%M%S')
+        self.inicio = None
+        self.registros = []
+        self._pilha = []
+        self._token = None
+        self._iniciou_tracemalloc = False
+
+    def __enter__(self):
+        if self.memoria and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._iniciou_tracemalloc = True
+        self.inicio = datetime.now().isoformat(timespec='seconds')
+        self._token = _ATUAL.set(self)
+        return self
+
+    def __exit__(self, *exc):
+        _ATUAL.reset(self._token)
+        if self._iniciou_tracemalloc:
+            tracemalloc.stop()
+            self._iniciou_tracemalloc = False
+        return False
+
+    @contextmanager
+    def etapa(self, nome: str, linhas: int = None):
+        registro = Registro(nome, len(self.registros) + len(self._pilha), len(self._pilha), linhas)
+        medir_memoria = self.memoria and tracemalloc.is_tracing()
+
+        # o pico do tracemalloc é global: cada etapa zera o pico ao entrar e
+        # repassa o seu à etapa externa ao sair
+        if medir_memoria:
+            if self._pilha:
+                self._pilha[-1][1] = max(self._pilha[-1][1], tracemalloc.get_traced_memory()[1])
+            tracemalloc.reset_peak()
+        self._pilha.append([registro, 0])
+        inicio = time.perf_counter()
+        try:
+            yield registro
+        finally:
+            registro.segundos = time.perf_counter() - inicio
+            _, pico_internas = self._pilha.pop()
+            if medir_memoria:
+                registro.pico_bytes = max(pico_internas, tracemalloc.get_traced_memory()[1])
+                if self._pilha:
+                    self._pilha[-1][1] = max(self._pilha[-1][1], registro.pico_bytes)
+            self.registros.append(registro)
+
+    def tabela(self) -> pd.DataFrame:
+        """Uma linha por etapa (na ordem da primeira chamada): chamadas, tempo, linhas, linhas/s e pico."""
+
+        if not self.registros:
+            return pd.DataFrame(columns=COLUNAS_METRICAS)
+
+        registros = pd.DataFrame({
+            'etapa': [r.etapa for r in self.registros],
+            'ordem': [r.ordem for r in self.registros],
+            'nivel': [r.nivel for r in self.registros],
+            'segundos': [r.segundos for r in self.registros],
+            'linhas': pd.array([r.linhas for r in self.registros], dtype='Int64'),
+            'pico_mb': [None if r.pico_bytes is None else r.pico_bytes / 2 ** 20 for r in self.registros],
+        })
+        tabela = registros.groupby('etapa', sort=False).agg(
+            ordem=('ordem', 'min'),
+            nivel=('nivel', 'min'),
+            chamadas=('segundos', 'size'),
+            segundos=('segundos', 'sum'),
+            linhas=('linhas', lambda linhas: linhas.sum() if linhas.notna().any() else pd.NA),
+            pico_mb=('pico_mb', 'max'),
+        ).reset_index()
+        # os registros entram ao fim de cada etapa; a exibição segue a ordem de início
+        tabela = tabela.sort_values('ordem', ignore_index=True)
+        tabela['linhas_por_s'] = tabela['linhas'].astype('Float64') / tabela['segundos'].where(tabela['segundos'] > 0)
+
+        return tabela[COLUNAS_METRICAS]
+
+    def salvar(self, diretorio: str = DIRETORIO_METRICAS, arquivo: str = ARQUIVO_METRICAS) -> str:
+        """Acrescenta as etapas desta execução ao histórico em JSON lines."""
+
+        os.makedirs(diretorio, exist_ok=True)
+        caminho = os.path.join(diretorio, arquivo)
+        tabela = self.tabela().astype(object).where(lambda df: df.notna(), None)
+
+        with open(caminho, 'a', encoding='utf-8') as saida:
+            for linha in tabela.to_dict('records'):
+                saida.write(json.dumps({'execucao': self.execucao, 'inicio': self.inicio, **linha}, ensure_ascii=False) + '\n')
+
+        return caminho
+
+
+@contextmanager
+def etapa(nome: str, linhas: int = None):
+    """Marca uma etapa da instrumentação ativa; sem instrumentação, não mede nada."""
+
+    instrumentacao = _ATUAL.get()
+    if instrumentacao is None:
+        yield Registro(nome, linhas=linhas)
+        return
+    with instrumentacao.etapa(nome, linhas) as registro:
+        yield registro
+
+
+def ler_metricas(diretorio: str = DIRETORIO_METRICAS, arquivo: str = ARQUIVO_METRICAS) -> pd.DataFrame:
+    """Histórico de métricas (todas as execuções), vazio se ainda não houver arquivo."""
+
+    caminho = os.path.join(diretorio, arquivo)
+    if not os.path.exists(caminho):
+        return pd.DataFrame(columns=['execucao', 'inicio'] + COLUNAS_METRICAS)
+    return pd.read_json(caminho, lines=True, dtype={'execucao': str})
+
+
+def painel_streamlit(historico: pd.DataFrame):
+    """Painel com a última execução (tabela e tempo por etapa) e a evolução das etapas principais."""
+
+    import streamlit as st
+
+    if historico.empty:
+        st.info("Nenhuma execução instrumentada ainda (rode o pipeline com --instrumentar).")
+        return
+
+    ultima = historico[historico['execucao'] == historico['execucao'].iloc[-1]]
+    st.caption(f"Execução {ultima['execucao'].iloc[0]} ({ultima['inicio'].iloc[0]})")
+
+    exibicao = ultima.assign(etapa=['· ' * int(n) + e for n, e in zip(ultima['nivel'], ultima['etapa'])])
+    st.dataframe(
+        exibicao[COLUNAS_METRICAS].drop(columns='nivel'),
+        hide_index=True,
+        use_container_width=True,
+        column_config={
+            'segundos': st.column_config.NumberColumn(format="%.2f s"),
+            'linhas': st.column_config.NumberColumn(format="%d"),
+            'linhas_por_s': st.column_config.NumberColumn("linhas/s", format="%.0f"),
+            'pico_mb': st.column_config.NumberColumn("pico (MB)", format="%.1f"),
+        },
+    )
+    st.bar_chart(ultima[ultima['nivel'] == 0].set_index('etapa')['segundos'])
+
+    if historico['execucao'].nunique() > 1:
+        evolucao = historico[historico['nivel'] == 0].pivot_table(index='inicio', columns='etapa', values='segundos')
+        st.line_chart(evolucao)
@@ -0,0 +1,171 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+# Chave usada para CPFs vazios ou inválidos; nunca casa com nenhum índice
+CHAVE_INVALIDA = np.int64(-1)
+
+# Maior CPF possível (11 dígitos)
+_CPF_MAXIMO = 99_999_999_999
+
+# Colunas mantidas de cada fonte na junção (mesmos nomes dos notebooks)
+COLUNAS_PAGAS = ['id_pagas', 'date_pagas', 'undefined_pagas', 'CPF_pagas', 'provider_pagas', 'contrato_pagas', 'partiner_pagas', 'proventos_pagas', 'tabela']
+COLUNAS_STORM = ['CPF_storm', 'ADE', 'CMSRepassada']
+
+
+def normalizar_cpf(serie: pd.Series) -> np.ndarray:
+    """Converte CPFs (número, texto com pontuação ou zeros à esquerda) em chave int64.
+
+    '012.345.678-90', '1234567890' e 1234567890.0 viram a mesma chave; valores
+    ausentes ou fora do formato viram CHAVE_INVALIDA.
+    """
+
+    if pd.api.types.is_numeric_dtype(serie.dtype) and not pd.api.types.is_bool_dtype(serie.dtype):
+        numeros = pd.to_numeric(serie, errors='coerce').to_numpy(dtype='float64', na_value=np.nan)
+    else:
+        texto = serie.astype('string').str.replace(r'\.0$', '', regex=True).str.replace(r'\D', '', regex=True)
+        texto = texto.where(texto.str.len().between(1, 11))
+        numeros = pd.to_numeric(texto, errors='coerce').to_numpy(dtype='float64', na_value=np.nan)
+
+    valido = np.isfinite(numeros) & (numeros >= 0) & (numeros <= _CPF_MAXIMO) & (numeros == np.floor(numeros))
+    return np.where(valido, np.nan_to_num(numeros), CHAVE_INVALIDA).astype(np.int64)
+
+
+def cpf_texto(chaves) -> pd.Series:
+    """Chave int64 de volta para o CPF com 11 dígitos (NA para chaves inválidas)."""
+    chaves = pd.Series(chaves, dtype='int64')
+    return chaves.astype('string').str.zfill(11).where(chaves != CHAVE_INVALIDA)
+
+
+class IndiceCPF:
+    """Índice hash de uma fonte por chave de CPF, guardando a primeira ocorrência de cada CPF.
+
+    Reutilizável entre execuções: novos registros só entram se o CPF ainda não
+    estiver indexado (mesma regra do drop_duplicates(keep='first') dos notebooks).
+    """
+
+    def __init__(self, colunas: list):
+        self.colunas = list(colunas)
+        self.linhas = pd.DataFrame(columns=self.colunas)
+        self.chaves = pd.Index(np.array([], dtype=np.int64))
+        self._linhas_sonda = None
+
+    def __len__(self):
+        return len(self.chaves)
+
+    def atualizar(self, df: pd.DataFrame, coluna_cpf: str) -> np.ndarray:
+        """Indexa os CPFs ainda desconhecidos de `df`; retorna as chaves novas."""
+
+        chaves = normalizar_cpf(df[coluna_cpf])
+        novas = (
+            (chaves != CHAVE_INVALIDA)
+            & (self.chaves.get_indexer(chaves) == -1)
+            # primeira ocorrência dentro do próprio lote
+            & ~pd.Series(chaves).duplicated().to_numpy()
+        )
+
+        if not novas.any():
+            return np.array([], dtype=np.int64)
+
+        novas_linhas = df.loc[novas, self.colunas].reset_index(drop=True)
+        self.linhas = pd.concat([self.linhas, novas_linhas], ignore_index=True) if len(self.linhas) else novas_linhas
+        self.chaves = self.chaves.append(pd.Index(chaves[novas]))
+        self._linhas_sonda = None
+
+        return chaves[novas]
+
+    def sondar(self, chaves: np.ndarray) -> pd.DataFrame:
+        """Linhas do índice alinhadas às chaves pedidas (NaN onde o CPF não está indexado)."""
+
+        if self._linhas_sonda is None:
+            # linha vazia no fim: get_indexer devolve -1 para chaves ausentes e
+            # iloc[-1] cai exatamente nela
+            vazia = pd.DataFrame([[np.nan] * len(self.colunas)], columns=self.colunas)
+            self._linhas_sonda = pd.concat([self.linhas, vazia], ignore_index=True) if len(self.linhas) else vazia
+
+        posicoes = self.chaves.get_indexer(chaves)
+        return self._linhas_sonda.iloc[posicoes].reset_index(drop=True)
+
+    def salvar(self, caminho: str):
+        os.makedirs(os.path.dirname(os.path.abspath(caminho)), exist_ok=True)
+        linhas = self.linhas.copy()
+        linhas['_chave_cpf'] = self.chaves.to_numpy()
+        linhas.to_parquet(caminho, index=False)
+
+    @classmethod
+    def carregar(cls, caminho: str) -> 'IndiceCPF':
+        linhas = pd.read_parquet(caminho)
+        indice = cls([c for c in linhas.columns if c != '_chave_cpf'])
+        indice.chaves = pd.Index(linhas.pop('_chave_cpf').to_numpy(dtype=np.int64))
+        indice.linhas = linhas
+        return indice
+
+
+class JuncaoCPF:
+    """Junção consulta → pagas → Storm por chave de CPF, com índices reaproveitados entre cargas.
+
+    Equivale aos dois pd.merge de visualizacao_dados (todas as consultas,
+    primeira proposta paga e primeira comissão Storm de cada CPF), mas cada
+    arquivo diário novo apenas sonda os índices em vez de refazer o merge do
+    histórico inteiro.
+    """
+
+    def __init__(self, indice_pagas: IndiceCPF = None, indice_storm: IndiceCPF = None):
+        self.indice_pagas = indice_pagas or IndiceCPF(COLUNAS_PAGAS)
+        self.indice_storm = indice_storm or IndiceCPF(COLUNAS_STORM)
+
+    def atualizar_pagas(self, pagas: pd.DataFrame) -> np.ndarray:
+        return self.indice_pagas.atualizar(pagas, 'CPF_pagas')
+
+    def atualizar_storm(self, storm: pd.DataFrame) -> np.ndarray:
+        return self.indice_storm.atualizar(storm, 'CPF_storm')
+
+    def juntar(self, consultas: pd.DataFrame, coluna_cpf: str = 'CPF_consulta') -> pd.DataFrame:
+        """Junta um lote de consultas às fontes indexadas; uma linha de saída por consulta."""
+
+        chaves = normalizar_cpf(consultas[coluna_cpf])
+        consultas = consultas.reset_index(drop=True)
+
+        resultado = pd.concat([
+            self.indice_pagas.sondar(chaves),
+            consultas,
+            self.indice_storm.sondar(chaves),
+        ], axis=1)
+        resultado[coluna_cpf] = cpf_texto(chaves).fillna(consultas[coluna_cpf].astype('string'))
+        resultado['chave_cpf'] = chaves
+
+        return resultado
+
+    def rejuntar(self, historico: pd.DataFrame, chaves_alteradas: np.ndarray) -> pd.DataFrame:
+        """Refaz a junção só das linhas do histórico cujos CPFs ganharam pagas/Storm novas."""
+
+        afetadas = np.isin(historico['chave_cpf'].to_numpy(), chaves_alteradas)
+        if not afetadas.any():
+            return historico
+
+        historico = historico.copy()
+        chaves = historico.loc[afetadas, 'chave_cpf'].to_numpy()
+        for indice in (self.indice_pagas, self.indice_storm):
+            sondadas = indice.sondar(chaves)
+            # coluna inteira substituída: no histórico lido do dataset, uma coluna
+            # ainda toda vazia vem como float64 e não aceita os valores novos no lugar
+            for coluna in indice.colunas:
+                valores = historico[coluna].to_numpy(dtype=object, na_value=None) if coluna in historico else np.full(len(historico), None, dtype=object)
+                valores[afetadas] = sondadas[coluna].to_numpy(dtype=object)
+                historico[coluna] = pd.Series(valores, index=historico.index).infer_objects()
+
+        return historico
+
+    def salvar(self, diretorio: str):
+        self.indice_pagas.salvar(os.path.join(diretorio, 'indice_pagas.parquet'))
+        self.indice_storm.salvar(os.path.join(diretorio, 'indice_storm.parquet'))
+
+    @classmethod
+    def carregar(cls, diretorio: str) -> 'JuncaoCPF':
+        caminho_pagas = os.path.join(diretorio, 'indice_pagas.parquet')
+        caminho_storm = os.path.join(diretorio, 'indice_storm.parquet')
+        return cls(
+            IndiceCPF.carregar(caminho_pagas) if os.path.exists(caminho_pagas) else None,
+            IndiceCPF.carregar(caminho_storm) if os.path.exists(caminho_storm) else None,
+        )
@@ -0,0 +1,85 @@
+import numpy as np
+import pandas as pd
+
+# Colunas esperadas por calcular_mcu_df (mesma ordem dos argumentos de calcular_mcu)
+COLUNAS_MCU = ['tac', 'spread', 'averbacao', 'formalizacao', 'comissao1', 'comissao2', 'qtd_consulta', 'valor_por_consulta']
+
+
+def calcular_mcu(tac, spread, averbacao, formalizacao, comissao1, comissao2, qtd_consulta, valor_por_consulta):
+    """Calcula a Margem de Contribuição Unitária (MCU).
+
+    Aceita escalares ou arrays; arrays são combinados por broadcasting do NumPy,
+    então uma grade inteira de cenários é avaliada numa única chamada.
+    """
+
+    # 1. Receita Bruta (RB)
+    receita_bruta = np.add(tac, spread)
+
+    # 2. Custos Variáveis (CV)
+    custos_variaveis_fixos = np.add(np.add(averbacao, formalizacao), np.add(comissao1, comissao2))
+    custo_consulta = np.multiply(qtd_consulta, valor_por_consulta)
+    custos_variaveis_total = custos_variaveis_fixos + custo_consulta
+
+    # 3. Margem de Contribuição Unitária (MCU)
+    mcu = receita_bruta - custos_variaveis_total
+
+    # Broadcast para que as três saídas tenham sempre o mesmo formato da grade
+    mcu, receita_bruta, custos_variaveis_total = np.broadcast_arrays(mcu, receita_bruta, custos_variaveis_total)
+
+    if mcu.ndim == 0:
+        return float(mcu), float(receita_bruta), float(custos_variaveis_total)
+
+    return mcu, receita_bruta, custos_variaveis_total
+
+
+def calcular_mcu_df(df: pd.DataFrame, **fixos) -> pd.DataFrame:
+    """Calcula MCU, receita bruta e custo variável para cada linha de um DataFrame.
+
+    Parâmetros ausentes no DataFrame podem ser passados como constantes em `fixos`
+    (ex.: `valor_por_consulta=0.25`).
+    """
+
+    faltando = [c for c in COLUNAS_MCU if c not in df.columns and c not in fixos]
+    if faltando:
+        raise KeyError(f"Parâmetros ausentes para o cálculo da MCU: {faltando}")
+
+    args = [df[c].to_numpy(dtype=float) if c in df.columns else fixos[c] for c in COLUNAS_MCU]
+    mcu, receita_bruta, custos_variaveis_total = calcular_mcu(*args)
+
+    return pd.DataFrame({
+        'mcu': np.broadcast_to(mcu, len(df)),
+        'receita_bruta': np.broadcast_to(receita_bruta, len(df)),
+        'custos_variaveis': np.broadcast_to(custos_variaveis_total, len(df)),
+    }, index=df.index)
+
+
+def grade_cenarios(**parametros) -> pd.DataFrame:
+    """Monta o produto cartesiano dos valores informados para cada parâmetro.
+
+    Ex.: `grade_cenarios(tac=[30, 39.04], comissao1=np.linspace(20, 40, 50))`.
+    """
+
+    nomes = list(parametros)
+    valores = [np.atleast_1d(np.asarray(parametros[n], dtype=float)) for n in nomes]
+    malha = np.meshgrid(*valores, indexing='ij')
+
+    return pd.DataFrame({n: m.ravel() for n, m in zip(nomes, malha)})
+
+
+def calcular_ponto_ruptura(tac, spread, averbacao, formalizacao, comissao1, comissao2, valor_por_consulta):
+    """Retorna o número máximo de consultas com MCU não negativa (Ponto de Ruptura).
+
+    Vetorizado como calcular_mcu; cenários sem margem para consultas retornam NaN.
+    """
+
+    margem_disponivel_para_consulta = np.add(tac, spread) - np.add(np.add(averbacao, formalizacao), np.add(comissao1, comissao2))
+    valor_por_consulta = np.asarray(valor_por_consulta, dtype=float)
+
+    viavel = (margem_disponivel_para_consulta > 0) & (valor_por_consulta > 0)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        ponto_ruptura = np.where(viavel, np.floor(margem_disponivel_para_consulta / valor_por_consulta), np.nan)
+
+    if ponto_ruptura.ndim == 0:
+        return float(ponto_ruptura)
+
+    return ponto_ruptura
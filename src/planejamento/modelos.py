@@ -0,0 +1,206 @@
+import hashlib
+import json
+import os
+import threading
+
+import numpy as np
+
+# Registro de modelos do processo: os módulos importados sobrevivem aos reruns do
+# Streamlit e são compartilhados entre as sessões, então cada arquivo é
+# desserializado uma única vez por worker.
+_registro = {}
+_trava = threading.Lock()
+
+
+# Formato do artefato compacto (JSON): só o necessário para prever
+FORMATO_ARTEFATO = 'modelo_taxa'
+VERSAO_FORMATO = 1
+
+# Inversas das funções de ligação suportadas pelo preditor
+LIGACOES = {
+    'log': np.exp,
+    'identity': lambda linear: linear,
+}
+
+
+class ModeloTaxa:
+    """Modelo de taxa (GLM com exposure) já ajustado, com predição direta pelos parâmetros.
+
+    Pode vir do pickle do statsmodels (`resultado` preenchido) ou do artefato
+    JSON (`resultado` None); a predição é a mesma nos dois casos e só usa NumPy.
+    """
+
+    def __init__(self, artefato: dict, caminho: str, assinatura: tuple, hash_arquivo: str, resultado=None):
+        if artefato['link'] not in LIGACOES:
+            raise ValueError(f"link não suportado: {artefato['link']}. Opções: {list(LIGACOES)}")
+
+        self.artefato = artefato
+        self.resultado = resultado
+        self.caminho = caminho
+        self.assinatura = assinatura
+        self.hash_arquivo = hash_arquivo
+
+        self.nomes = list(artefato['nomes'])
+        self.params = np.asarray(artefato['params'], dtype=float)
+        self.alpha = artefato.get('alpha')
+        self.link = artefato['link']
+
+    @property
+    def intercepto(self) -> float:
+        """Coeficiente do intercepto (ln da taxa média)."""
+        return float(self.params[self.nomes.index('Intercept')]) if 'Intercept' in self.nomes else 0.0
+
+    @property
+    def taxa(self) -> float:
+        """Taxa média de conversão do modelo (exp do intercepto)."""
+        return float(np.exp(self.intercepto))
+
+    def predict(self, exposure, exog=None):
+        """Retorna a média prevista exp(X·β + ln(exposure)) sem passar pelo objeto de resultados.
+
+        Sem `exog`, assume o modelo só com intercepto (caso do negbin_model).
+        """
+
+        exposure = np.asarray(exposure, dtype=float)
+        if exog is None:
+            linear = self.intercepto
+        else:
+            linear = np.asarray(exog, dtype=float) @ self.params
+
+        if self.artefato['offset'] is not None:
+            with np.errstate(divide='ignore'):
+                linear = linear + np.log(exposure)
+
+        return LIGACOES[self.link](linear)
+
+
+def artefato_de_resultado(resultado) -> dict:
+    """Extrai de um resultado GLM do statsmodels só coeficientes, alpha, link e offset."""
+
+    modelo = resultado.model
+    familia = modelo.family
+    formula = getattr(modelo, 'formula', None)
+
+    return {
+        'formato': FORMATO_ARTEFATO,
+        'versao_formato': VERSAO_FORMATO,
+        'familia': type(familia).__name__,
+        'alpha': float(getattr(familia, 'alpha', np.nan)),
+        'link': type(familia.link).__name__.lower(),
+        'formula': formula if isinstance(formula, str) else None,
+        'resposta': modelo.endog_names,
+        'offset': 'log(exposure)' if getattr(modelo, 'exposure', None) is not None else None,
+        'nomes': list(modelo.exog_names),
+        'params': np.asarray(resultado.params, dtype=float).tolist(),
+        'bse': np.asarray(resultado.bse, dtype=float).tolist(),
+        'nobs': int(resultado.nobs),
+    }
+
+
+def artefato_de_ajuste(ajuste: dict) -> dict:
+    """Artefato a partir de um ajuste do bundle de ajuste_segmentos (modelo só com intercepto)."""
+
+    return {
+        'formato': FORMATO_ARTEFATO,
+        'versao_formato': VERSAO_FORMATO,
+        'familia': 'NegativeBinomial',
+        'alpha': float(ajuste['alpha']),
+        'link': 'log',
+        'formula': 'qtd_finalizadas ~ 1',
+        'resposta': 'qtd_finalizadas',
+        'offset': 'log(exposure)',
+        'nomes': ['Intercept'],
+        'params': list(ajuste['params']),
+        'bse': list(ajuste['bse']),
+        'nobs': int(ajuste['nobs']),
+    }
+
+
+def salvar_artefato(artefato: dict, caminho: str):
+    """Grava o artefato JSON (escrita atômica, para não servir um arquivo pela metade)."""
+
+    temporario = caminho + '.tmp'
+    with open(temporario, 'w') as arquivo:
+        json.dump(artefato, arquivo, indent=1, ensure_ascii=False)
+        arquivo.write('\n')
+    os.replace(temporario, caminho)
+
+
+def exportar_modelo(origem: str, destino: str = None) -> str:
+    """Converte um pickle do statsmodels (ex.: negbin_model.pkl) no artefato JSON ao lado dele."""
+
+    destino = destino or os.path.splitext(origem)[0] + '.json'
+    salvar_artefato(artefato_de_resultado(_carregar_resultado(origem)), destino)
+    return destino
+
+
+def _hash_arquivo(caminho: str) -> str:
+    sha = hashlib.sha256()
+    with open(caminho, 'rb') as arquivo:
+        for bloco in iter(lambda: arquivo.read(1 << 20), b''):
+            sha.update(bloco)
+    return sha.hexdigest()
+
+
+def _carregar_resultado(caminho: str):
+    # import tardio: statsmodels só é necessário para pickles, nunca para o artefato JSON
+    import statsmodels.api as sm
+
+    return sm.load(caminho)
+
+
+def _carregar_modelo(caminho: str, assinatura: tuple, hash_arquivo: str) -> ModeloTaxa:
+    if caminho.endswith('.json'):
+        with open(caminho) as arquivo:
+            artefato = json.load(arquivo)
+        if artefato.get('formato') != FORMATO_ARTEFATO:
+            raise ValueError(f"{caminho} não é um artefato {FORMATO_ARTEFATO}")
+        return ModeloTaxa(artefato, caminho, assinatura, hash_arquivo)
+
+    resultado = _carregar_resultado(caminho)
+    return ModeloTaxa(artefato_de_resultado(resultado), caminho, assinatura, hash_arquivo, resultado=resultado)
+
+
+def obter_modelo(caminho: str) -> ModeloTaxa:
+    """Retorna o modelo do registro, recarregando apenas se o arquivo mudou.
+
+    A verificação barata (mtime e tamanho) roda a cada chamada; o hash só é
+    recalculado quando ela acusa mudança, evitando recarga por um simples `touch`.
+    Arquivos `.json` são artefatos compactos e não importam o statsmodels.
+    """
+
+    caminho = os.path.abspath(caminho)
+    info = os.stat(caminho)
+    assinatura = (info.st_mtime_ns, info.st_size)
+
+    modelo = _registro.get(caminho)
+    if modelo is not None and modelo.assinatura == assinatura:
+        return modelo
+
+    with _trava:
+        modelo = _registro.get(caminho)
+        if modelo is not None and modelo.assinatura == assinatura:
+            return modelo
+
+        hash_arquivo = _hash_arquivo(caminho)
+        if modelo is not None and modelo.hash_arquivo == hash_arquivo:
+            modelo.assinatura = assinatura
+            return modelo
+
+        modelo = _carregar_modelo(caminho, assinatura, hash_arquivo)
+        _registro[caminho] = modelo
+
+    return modelo
+
+
+def limpar_registro():
+    """Descarta todos os modelos carregados (útil em notebooks após salvar um novo ajuste)."""
+    with _trava:
+        _registro.clear()
+
+
+if __name__ == '__main__':
+    import sys
+
+    for origem in sys.argv[1:] or ['negbin_model.pkl']:
+        print(f"{origem} -> {exportar_modelo(origem)}")
@@ -0,0 +1,500 @@
+"""Carga incremental diária: consultas → dados_consulta / all_data → agregado.
+
+Cada execução processa apenas os `resultado_*.csv` novos ou alterados
+(comparando nome, tamanho e hash com o manifesto da execução anterior) e
+atualiza no lugar os datasets particionados e as contagens diárias por ciclo
+usadas no modelo de taxa (`agregado` de como_onde) e nos modelos por
+segmento (ver ajuste_segmentos).
+"""
+import hashlib
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+from ajuste_segmentos import DIRETORIO_MODELOS, SEGMENTOS, VALOR_DESCONHECIDO, reajustar_tabelas
+from armazenamento import DIRETORIO_DATASETS, caminho_dataset, gravar_dataset, ler_dataset, remover_origem
+from conversao_agregada import HORAS_NOTURNO
+from estimador_online import CAMINHO_ESTIMADOR, CHAVE_GLOBAL, EstimadorOnline
+from ingestao import ler_consultas, listar_resultados
+from instrumentacao import Instrumentacao, etapa
+from juncao_cpf import COLUNAS_PAGAS, JuncaoCPF, normalizar_cpf
+from previsao import CAMINHO_PREVISAO, HistoricoCurto, atualizar_previsao
+from storm import carregar_storm
+
+DIRETORIO_CONSULTAS = '../../input_data/7560/7560/'
+DIRETORIO_ESTADO = '../../output_data/estado/'
+
+
+def classificar_ciclo(datas: pd.Series) -> pd.Series:
+    return pd.Series(np.where(datas.dt.hour.isin(HORAS_NOTURNO), 'noturno', 'diurno'), index=datas.index)
+
+
+def ler_pagas(caminho: str) -> pd.DataFrame:
+    """Extração de propostas pagas (sem cabeçalho), com os nomes usados nos notebooks."""
+    return pd.read_csv(caminho, header=None, names=COLUNAS_PAGAS)
+
+
+# --- Manifesto ---
+
+def _hash_arquivo(caminho: str) -> str:
+    sha = hashlib.sha256()
+    with open(caminho, 'rb') as arquivo:
+        for bloco in iter(lambda: arquivo.read(1 << 20), b''):
+            sha.update(bloco)
+    return sha.hexdigest()
+
+
+def carregar_manifesto(diretorio_estado: str) -> dict:
+    caminho = os.path.join(diretorio_estado, 'manifesto.json')
+    if not os.path.exists(caminho):
+        return {'arquivos': {}, 'watermark': None}
+    with open(caminho, encoding='utf-8') as arquivo:
+        return json.load(arquivo)
+
+
+def salvar_manifesto(manifesto: dict, diretorio_estado: str):
+    os.makedirs(diretorio_estado, exist_ok=True)
+    caminho = os.path.join(diretorio_estado, 'manifesto.json')
+    temporario = caminho + '.tmp'
+    with open(temporario, 'w', encoding='utf-8') as arquivo:
+        json.dump(manifesto, arquivo, indent=1, ensure_ascii=False)
+    os.replace(temporario, caminho)
+
+
+def arquivos_pendentes(arquivos: list, manifesto: dict) -> tuple:
+    """Separa os arquivos em (novos, alterados, assinaturas).
+
+    Tamanho e mtime iguais ao manifesto dispensam o hash; se só o mtime mudou
+    e o hash confere, o arquivo não é reprocessado.
+    """
+
+    novos, alterados, assinaturas = [], [], {}
+    for caminho in arquivos:
+        nome = os.path.basename(caminho)
+        info = os.stat(caminho)
+        registro = manifesto['arquivos'].get(nome)
+
+        if registro and registro['tamanho'] == info.st_size and registro['mtime'] == info.st_mtime_ns:
+            continue
+
+        hash_arquivo = _hash_arquivo(caminho)
+        assinaturas[nome] = {'tamanho': info.st_size, 'mtime': info.st_mtime_ns, 'sha256': hash_arquivo}
+        if registro is None:
+            novos.append(caminho)
+        elif registro['sha256'] != hash_arquivo:
+            alterados.append(caminho)
+
+    return novos, alterados, assinaturas
+
+
+# --- Estado auxiliar (contagens por arquivo/segmento e primeira consulta por CPF) ---
+
+def _ler_estado(diretorio_estado: str, nome: str, colunas: dict) -> pd.DataFrame:
+    caminho = os.path.join(diretorio_estado, f'{nome}.parquet')
+    if os.path.exists(caminho):
+        return pd.read_parquet(caminho)
+    return pd.DataFrame({c: pd.Series(dtype=t) for c, t in colunas.items()})
+
+
+def _salvar_estado(df: pd.DataFrame, diretorio_estado: str, nome: str):
+    os.makedirs(diretorio_estado, exist_ok=True)
+    df.to_parquet(os.path.join(diretorio_estado, f'{nome}.parquet'), index=False)
+
+
+COLUNAS_CONTAGENS = {'arquivo': 'string', 'data': 'datetime64[ns]', 'ciclo': 'string', 'total': 'int64'}
+COLUNAS_RESUMO_CPF = {'chave_cpf': 'int64', 'primeira_consulta': 'datetime64[ns]', 'ultima_consulta': 'datetime64[ns]', 'tem_completa': 'bool',
+                      'provider_consulta': 'string', 'partiner_consulta': 'string'}
+COLUNAS_CONTAGENS_SEGMENTOS = {'data': 'datetime64[ns]', 'ciclo': 'string', 'provider_consulta': 'string', 'partiner_consulta': 'string', 'total': 'int64'}
+COLUNAS_CONTAGENS_TABELA = {'data': 'datetime64[ns]', 'ciclo': 'string', 'tabela': 'string', 'total': 'int64'}
+
+
+def _valores_segmento(serie: pd.Series) -> pd.Series:
+    return serie.astype('string').fillna(VALOR_DESCONHECIDO)
+
+
+def resumir_cpfs(consultas: pd.DataFrame) -> pd.DataFrame:
+    """Primeira e última consulta de cada CPF, se ele teve alguma consulta `completed`
+    e o provider/parceiro da primeira consulta (onde a conversão é atribuída)."""
+
+    datas = pd.to_datetime(consultas['created_consulta']).to_numpy()
+    resumo = pd.DataFrame({
+        'chave_cpf': normalizar_cpf(consultas['CPF_consulta']),
+        'primeira_consulta': datas,
+        'ultima_consulta': datas,
+        'tem_completa': (consultas['status_consulta'] == 'completed').to_numpy(),
+        'provider_consulta': _valores_segmento(consultas['provider_consulta']).to_numpy(),
+        'partiner_consulta': _valores_segmento(consultas['partiner_consulta']).to_numpy(),
+    })
+    return _agrupar_resumo(resumo[resumo['chave_cpf'] >= 0])
+
+
+def _agrupar_resumo(resumo: pd.DataFrame) -> pd.DataFrame:
+    # ordenado pela data, o 'first' de provider/parceiro é o da primeira consulta
+    resumo = resumo.sort_values('primeira_consulta', kind='mergesort')
+    return resumo.groupby('chave_cpf', as_index=False).agg(primeira_consulta=('primeira_consulta', 'min'), ultima_consulta=('ultima_consulta', 'max'),
+                                                           tem_completa=('tem_completa', 'any'), provider_consulta=('provider_consulta', 'first'),
+                                                           partiner_consulta=('partiner_consulta', 'first'))
+
+
+def combinar_resumos(atual: pd.DataFrame, novo: pd.DataFrame) -> pd.DataFrame:
+    return _agrupar_resumo(pd.concat([atual, novo], ignore_index=True))
+
+
+def datas_dos_cpfs(resumo_cpf: pd.DataFrame, chaves: np.ndarray) -> pd.DatetimeIndex:
+    """Dias entre a primeira e a última consulta dos CPFs pedidos (onde o all_data deles pode estar)."""
+
+    resumo = resumo_cpf[resumo_cpf['chave_cpf'].isin(chaves)]
+    inicio = pd.to_datetime(resumo['primeira_consulta']).dt.normalize().to_numpy(dtype='datetime64[D]')
+    fim = pd.to_datetime(resumo['ultima_consulta']).dt.normalize().to_numpy(dtype='datetime64[D]')
+    dias = (fim - inicio).astype(np.int64) + 1
+    deslocamentos = np.arange(dias.sum()) - np.repeat(np.cumsum(dias) - dias, dias)
+    return pd.DatetimeIndex(np.unique(np.repeat(inicio, dias) + deslocamentos)).as_unit('ns')
+
+
+def contar_por_ciclo(consultas: pd.DataFrame, arquivo: str) -> pd.DataFrame:
+    datas = pd.to_datetime(consultas['created_consulta'])
+    contagens = pd.DataFrame({'data': datas.dt.normalize(), 'ciclo': classificar_ciclo(datas)})
+    contagens = contagens.groupby(['data', 'ciclo']).size().rename('total').reset_index()
+    contagens.insert(0, 'arquivo', arquivo)
+    return contagens.astype(COLUNAS_CONTAGENS)
+
+
+def contar_segmentos(consultas: pd.DataFrame) -> pd.DataFrame:
+    """Consultas por data, ciclo, provider e parceiro."""
+
+    datas = pd.to_datetime(consultas['created_consulta'])
+    contagens = pd.DataFrame({
+        'data': datas.dt.normalize(),
+        'ciclo': classificar_ciclo(datas),
+        'provider_consulta': _valores_segmento(consultas['provider_consulta']),
+        'partiner_consulta': _valores_segmento(consultas['partiner_consulta']),
+    })
+    contagens = contagens.groupby(list(contagens.columns)).size().rename('total').reset_index()
+    return contagens.astype(COLUNAS_CONTAGENS_SEGMENTOS)
+
+
+def contar_tabelas(consultas: pd.DataFrame, juncao: JuncaoCPF) -> pd.DataFrame:
+    """Consultas por data, ciclo e tabela, só dos CPFs que já têm proposta paga indexada.
+
+    As dos demais CPFs são o 'desconhecido' de `montar_tabelas_segmentos`.
+    """
+
+    chaves = normalizar_cpf(consultas['CPF_consulta'])
+    pagantes = juncao.indice_pagas.chaves.get_indexer(chaves) >= 0
+    datas = pd.to_datetime(consultas['created_consulta'])[pagantes]
+    contagens = pd.DataFrame({
+        'data': datas.dt.normalize().to_numpy(),
+        'ciclo': classificar_ciclo(datas).to_numpy(),
+        'tabela': _valores_segmento(juncao.indice_pagas.sondar(chaves[pagantes])['tabela']).to_numpy(),
+    })
+    contagens = contagens.groupby(list(contagens.columns)).size().rename('total').reset_index()
+    return contagens.astype(COLUNAS_CONTAGENS_TABELA)
+
+
+def somar_contagens(contagens: list, colunas: dict) -> pd.DataFrame:
+    contagens = pd.concat(contagens, ignore_index=True)
+    chaves = [c for c in colunas if c != 'total']
+    return contagens.groupby(chaves, as_index=False)['total'].sum().astype(colunas)
+
+
+def montar_agregado(contagens: pd.DataFrame, resumo_cpf: pd.DataFrame, juncao: JuncaoCPF) -> pd.DataFrame:
+    """Tabela `agregado` de como_onde: finalizadas e não finalizadas por data e ciclo.
+
+    Um CPF converte quando teve consulta `completed` e possui proposta paga; a
+    conversão fica na sua primeira consulta (mesma regra de atribuir_conversao).
+    """
+
+    totais = contagens.groupby(['data', 'ciclo'])['total'].sum()
+
+    convertidos = resumo_cpf[resumo_cpf['tem_completa'] & resumo_cpf['chave_cpf'].isin(juncao.indice_pagas.chaves)]
+    datas = pd.to_datetime(convertidos['primeira_consulta'])
+    finalizadas = pd.DataFrame({'data': datas.dt.normalize(), 'ciclo': classificar_ciclo(datas)}).groupby(['data', 'ciclo']).size()
+
+    agregado = pd.DataFrame({'Total_Consultas': totais}).join(finalizadas.rename('qtd_finalizadas'), how='outer').fillna(0)
+    agregado = agregado.astype('int64').reset_index()
+    agregado['qtd_nao_finalizadas'] = agregado['Total_Consultas'] - agregado['qtd_finalizadas']
+    agregado['conversao'] = agregado['qtd_finalizadas'] / agregado['qtd_nao_finalizadas'].where(agregado['qtd_nao_finalizadas'] > 0)
+    agregado = agregado.rename(columns={'data': 'data_f', 'ciclo': 'ciclo_f'})
+
+    return agregado[['data_f', 'ciclo_f', 'qtd_finalizadas', 'qtd_nao_finalizadas', 'conversao', 'Total_Consultas']]
+
+
+def montar_tabelas_segmentos(contagens_segmentos: pd.DataFrame, contagens_tabela: pd.DataFrame, resumo_cpf: pd.DataFrame,
+                             juncao: JuncaoCPF) -> dict:
+    """Tabelas de ajuste_segmentos.tabelas_segmentos montadas das contagens incrementais, sem reler all_data.
+
+    As finalizadas seguem a regra de montar_agregado (primeira consulta do CPF
+    convertido); a tabela de cada CPF vem do índice de pagas e as consultas de
+    CPFs sem pagas ficam em 'desconhecido'.
+    """
+
+    convertidos = resumo_cpf[resumo_cpf['tem_completa'] & resumo_cpf['chave_cpf'].isin(juncao.indice_pagas.chaves)]
+    convertidos = convertidos[convertidos['primeira_consulta'].notna()]
+    datas = pd.to_datetime(convertidos['primeira_consulta'])
+    finalizadas = pd.DataFrame({
+        'data': datas.dt.normalize().to_numpy(),
+        'ciclo': classificar_ciclo(datas).to_numpy(),
+        'provider_consulta': convertidos['provider_consulta'].to_numpy(),
+        'partiner_consulta': convertidos['partiner_consulta'].to_numpy(),
+        'tabela': _valores_segmento(juncao.indice_pagas.sondar(convertidos['chave_cpf'].to_numpy())['tabela']).to_numpy(),
+    })
+
+    # tabela: as contagens só têm os CPFs pagantes; o resto do total é 'desconhecido'
+    globais = contagens_segmentos.groupby(['data', 'ciclo'])['total'].sum()
+    conhecidas = contagens_tabela[contagens_tabela['tabela'] != VALOR_DESCONHECIDO]
+    desconhecidas = globais.sub(conhecidas.groupby(['data', 'ciclo'])['total'].sum(), fill_value=0).reset_index()
+    desconhecidas['tabela'] = VALOR_DESCONHECIDO
+    totais_tabela = pd.concat([conhecidas, desconhecidas], ignore_index=True)
+
+    agrupamentos = [('global', contagens_segmentos.assign(valor='todos'), finalizadas.assign(valor='todos'))]
+    for segmento, coluna in SEGMENTOS.items():
+        totais = totais_tabela if coluna == 'tabela' else contagens_segmentos
+        agrupamentos.append((segmento, totais.assign(valor=totais[coluna]), finalizadas.assign(valor=finalizadas[coluna])))
+
+    tabelas = {}
+    for segmento, totais, pagas in agrupamentos:
+        totais = totais.groupby(['valor', 'data', 'ciclo'])['total'].sum()
+        pagas = pagas.groupby(['valor', 'data', 'ciclo']).size().reindex(totais.index, fill_value=0)
+        tabela = pd.DataFrame({'qtd_finalizadas': pagas, 'Total_Consultas': totais}).astype('int64')
+        tabela = tabela[tabela['Total_Consultas'] > 0].reset_index()
+        for valor, grupo in tabela.groupby('valor', sort=True):
+            tabelas[(segmento, str(valor))] = grupo[['data', 'ciclo', 'qtd_finalizadas', 'Total_Consultas']].reset_index(drop=True)
+
+    return tabelas
+
+
+# --- Execução ---
+
+def atualizar(diretorio_consultas: str = DIRETORIO_CONSULTAS, caminho_pagas: str = None, storm: pd.DataFrame = None,
+              diretorio_datasets: str = DIRETORIO_DATASETS, diretorio_estado: str = DIRETORIO_ESTADO,
+              diretorio_modelos: str = None, diretorio_storm: str = None,
+              caminho_previsao: str = None, caminho_estimador: str = None) -> dict:
+    """Executa a carga incremental e retorna um resumo do que foi processado.
+
+    Com `diretorio_modelos`, reajusta os modelos de taxa por segmento ao final
+    e grava uma nova versão do bundle (ver ajuste_segmentos), a partir das
+    contagens por segmento mantidas no estado. CPFs que ganham
+    pagas/Storm novas têm as suas linhas antigas de all_data refeitas
+    (JuncaoCPF.rejuntar), em qualquer data do histórico. Com
+    `diretorio_storm` (e sem `storm`), os relatórios Storm são lidos por
+    storm.carregar_storm, com cache por arquivo no diretório de estado; as
+    falhas de leitura entram em `erros`. Com `caminho_previsao`, as horas
+    novas de all_data atualizam a previsão horária (ver previsao); com
+    `caminho_estimador`, as linhas novas ou revistas do agregado entram no
+    estimador online da taxa (ver estimador_online). As etapas são
+    medidas quando executado dentro de uma `Instrumentacao` (ver instrumentacao).
+    """
+
+    manifesto = carregar_manifesto(diretorio_estado)
+    juncao = JuncaoCPF.carregar(diretorio_estado)
+    contagens = _ler_estado(diretorio_estado, 'contagens_por_arquivo', COLUNAS_CONTAGENS)
+    resumo_cpf = _ler_estado(diretorio_estado, 'resumo_cpf', COLUNAS_RESUMO_CPF)
+    contagens_segmentos = _ler_estado(diretorio_estado, 'contagens_segmentos', COLUNAS_CONTAGENS_SEGMENTOS)
+    contagens_tabela = _ler_estado(diretorio_estado, 'contagens_tabela', COLUNAS_CONTAGENS_TABELA)
+    # estado gravado antes das colunas novas existirem: refeito uma vez do dataset
+    resumo_incompleto = not set(COLUNAS_RESUMO_CPF).issubset(resumo_cpf.columns)
+    segmentos_ausentes = bool(manifesto['arquivos']) and not all(
+        os.path.exists(os.path.join(diretorio_estado, f'{nome}.parquet')) for nome in ('contagens_segmentos', 'contagens_tabela'))
+
+    # 1. Fontes de referência: só os CPFs ainda não indexados entram
+    erros = []
+    if storm is None and diretorio_storm is not None:
+        with etapa('storm.leitura') as medicao:
+            storm, relatorio_storm = carregar_storm(diretorio_storm, diretorio_cache=os.path.join(diretorio_estado, 'storm'))
+            medicao.linhas = int(relatorio_storm['linhas_lidas'].fillna(0).sum())
+        erros.extend(relatorio_storm.loc[relatorio_storm['erro'].notna(), ['arquivo', 'erro']].to_dict('records'))
+
+    chaves_novas = []
+    chaves_pagas = np.array([], dtype=np.int64)
+    if caminho_pagas is not None:
+        with etapa('pagas.indexacao') as medicao:
+            pagas = ler_pagas(caminho_pagas)
+            medicao.linhas = len(pagas)
+            chaves_pagas = juncao.atualizar_pagas(pagas)
+            chaves_novas.append(chaves_pagas)
+    if storm is not None:
+        with etapa('storm.indexacao', len(storm)):
+            chaves_novas.append(juncao.atualizar_storm(storm))
+    chaves_novas = np.concatenate(chaves_novas) if chaves_novas else np.array([], dtype=np.int64)
+
+    # 2. Consultas novas ou alteradas
+    novos, alterados, assinaturas = arquivos_pendentes(listar_resultados(diretorio_consultas), manifesto)
+    datas_afetadas = set()
+    resumos_lote = []
+    segmentos_lote = []
+    tabelas_lote = []
+    linhas = 0
+    watermark = pd.Timestamp(manifesto['watermark']) if manifesto['watermark'] else None
+
+    for caminho in novos + alterados:
+        nome = os.path.basename(caminho)
+        prefixo = os.path.splitext(nome)[0]
+
+        if caminho in alterados:
+            remover_origem('dados_consulta', prefixo, diretorio_datasets)
+            contagens = contagens[contagens['arquivo'] != nome]
+
+        erros_arquivo = []
+        with etapa('consultas.leitura') as medicao:
+            blocos = list(ler_consultas(diretorio_consultas, erros=erros_arquivo, arquivos=[caminho]))
+            medicao.linhas = sum(len(bloco) for bloco in blocos)
+        if erros_arquivo:
+            # fica fora do manifesto para ser tentado de novo na próxima execução
+            erros.extend(erros_arquivo)
+            assinaturas.pop(nome, None)
+            continue
+        consultas = pd.concat(blocos, ignore_index=True) if blocos else pd.DataFrame()
+        manifesto['arquivos'][nome] = {**assinaturas[nome], 'linhas': len(consultas)}
+        if consultas.empty:
+            continue
+
+        with etapa('dados_consulta.gravacao', len(consultas)):
+            gravar_dataset(consultas, 'dados_consulta', diretorio_datasets, prefixo_arquivo=prefixo)
+        with etapa('consultas.contagens', len(consultas)):
+            contagens = pd.concat([contagens, contar_por_ciclo(consultas, nome)], ignore_index=True)
+            resumos_lote.append(resumir_cpfs(consultas))
+            segmentos_lote.append(contar_segmentos(consultas))
+            # o índice de pagas já está atualizado: entram também os CPFs que pagaram agora
+            tabelas_lote.append(contar_tabelas(consultas, juncao))
+
+        datas_afetadas.update(pd.to_datetime(consultas['created_consulta']).dt.normalize().dropna().unique())
+        maior = pd.to_datetime(consultas['created_consulta']).max()
+        watermark = maior if watermark is None or maior > watermark else watermark
+        linhas += len(consultas)
+
+    # arquivos só "tocados" (mesmo hash, mtime novo) apenas atualizam a assinatura
+    for nome, assinatura in assinaturas.items():
+        if nome in manifesto['arquivos']:
+            manifesto['arquivos'][nome].update(assinatura)
+
+    # 3. Primeira consulta por CPF: incremental, ou refeita do dataset se algum arquivo mudou
+    with etapa('resumo_cpf'):
+        if alterados or resumo_incompleto:
+            resumo_cpf = resumir_cpfs(ler_dataset('dados_consulta', colunas=['CPF_consulta', 'created_consulta', 'status_consulta', 'provider_consulta',
+                                                                             'partiner_consulta'], raiz=diretorio_datasets))
+        elif resumos_lote:
+            resumo_cpf = combinar_resumos(resumo_cpf, pd.concat(resumos_lote, ignore_index=True))
+
+    # 4. all_data: junta as datas novas e refaz as linhas antigas dos CPFs com pagas/Storm novas;
+    # o histórico desses CPFs é lido antes da gravação, ainda sem as linhas deste lote
+    historico = None
+    datas_historico = datas_dos_cpfs(resumo_cpf, chaves_novas) if len(chaves_novas) else []
+    if len(datas_historico) and os.path.isdir(caminho_dataset('all_data', diretorio_datasets)):
+        with etapa('all_data.historico') as medicao:
+            historico = ler_dataset('all_data', raiz=diretorio_datasets, datas=datas_historico)
+            medicao.linhas = len(historico)
+
+    if datas_afetadas:
+        with etapa('all_data.juncao') as medicao:
+            consultas = ler_dataset('dados_consulta', raiz=diretorio_datasets, datas=sorted(datas_afetadas))
+            consultas = consultas.drop(columns=['data', 'provider'])
+            medicao.linhas = len(consultas)
+            if not consultas.empty:
+                gravar_dataset(juncao.juntar(consultas), 'all_data', diretorio_datasets)
+
+    linhas_rejuntadas = 0
+    if historico is not None:
+        # as datas afetadas já foram refeitas pela junção acima
+        afetadas = {data.strftime('%Y-%m-%d') for data in datas_afetadas}
+        antigas = historico[~historico['data'].isin(afetadas)].drop(columns=['data', 'provider'])
+        with etapa('all_data.rejuncao', len(antigas)):
+            linhas_rejuntadas = int(np.isin(antigas['chave_cpf'].to_numpy(), chaves_novas).sum())
+            if linhas_rejuntadas:
+                gravar_dataset(juncao.rejuntar(antigas, chaves_novas), 'all_data', diretorio_datasets)
+
+    # Contagens por segmento: somadas lote a lote, ou refeitas do dataset se algum arquivo mudou
+    with etapa('contagens_segmentos'):
+        if alterados or segmentos_ausentes:
+            dados = ler_dataset('dados_consulta', colunas=['CPF_consulta', 'created_consulta', 'provider_consulta', 'partiner_consulta'], raiz=diretorio_datasets)
+            contagens_segmentos = contar_segmentos(dados)
+            contagens_tabela = contar_tabelas(dados, juncao)
+        else:
+            contagens_segmentos = somar_contagens([contagens_segmentos, *segmentos_lote], COLUNAS_CONTAGENS_SEGMENTOS)
+            # CPFs que pagaram agora: as consultas antigas deles saem de 'desconhecido' para a tabela
+            if historico is not None:
+                tabelas_lote.append(contar_tabelas(historico[historico['chave_cpf'].isin(chaves_pagas)], juncao))
+            contagens_tabela = somar_contagens([contagens_tabela, *tabelas_lote], COLUNAS_CONTAGENS_TABELA)
+
+    # 5. Contagens diárias por ciclo
+    with etapa('agregado', len(contagens)):
+        agregado = montar_agregado(contagens, resumo_cpf, juncao)
+        os.makedirs(diretorio_datasets, exist_ok=True)
+        agregado.to_parquet(os.path.join(diretorio_datasets, 'agregado.parquet'), index=False)
+
+    estimativa = None
+    if caminho_estimador is not None:
+        with etapa('estimador.sincronizacao', len(agregado)):
+            estimador = EstimadorOnline.carregar(caminho_estimador)
+            estimador.sincronizar({CHAVE_GLOBAL: agregado})
+            estimador.salvar(caminho_estimador)
+            estimativa = estimador.estimativa()
+
+    with etapa('estado.gravacao'):
+        manifesto['watermark'] = watermark.isoformat() if watermark is not None else None
+        juncao.salvar(diretorio_estado)
+        _salvar_estado(contagens, diretorio_estado, 'contagens_por_arquivo')
+        _salvar_estado(resumo_cpf, diretorio_estado, 'resumo_cpf')
+        _salvar_estado(contagens_segmentos, diretorio_estado, 'contagens_segmentos')
+        _salvar_estado(contagens_tabela, diretorio_estado, 'contagens_tabela')
+        salvar_manifesto(manifesto, diretorio_estado)
+
+    # 6. Modelos de taxa por segmento (warm start a partir do bundle anterior)
+    bundle = None
+    if diretorio_modelos is not None and (linhas or len(chaves_novas)):
+        with etapa('modelos.tabelas') as medicao:
+            tabelas = montar_tabelas_segmentos(contagens_segmentos, contagens_tabela, resumo_cpf, juncao)
+            medicao.linhas = sum(len(tabela) for tabela in tabelas.values())
+        with etapa('modelos.ajuste', medicao.linhas):
+            bundle = reajustar_tabelas(tabelas, diretorio_modelos)
+
+    # 7. Previsão horária de consultas e pagas
+    previsor = None
+    if caminho_previsao is not None and linhas:
+        with etapa('previsao.atualizacao'):
+            try:
+                previsor = atualizar_previsao(diretorio_datasets, caminho_previsao)
+            except HistoricoCurto as erro:  # histórico ainda menor que uma semana
+                erros.append({'arquivo': os.path.basename(caminho_previsao), 'erro': str(erro)})
+
+    return {
+        'novos': [os.path.basename(c) for c in novos],
+        'alterados': [os.path.basename(c) for c in alterados],
+        'linhas': linhas,
+        'chaves_novas': len(chaves_novas),
+        'linhas_rejuntadas': linhas_rejuntadas,
+        'watermark': manifesto['watermark'],
+        'erros': erros,
+        'bundle': bundle,
+        'previsor': previsor,
+        'estimativa': estimativa,
+    }
+
+
+if __name__ == '__main__':
+    import sys
+    from contextlib import nullcontext
+
+    # uso: python pipeline.py [caminho_pagas] [diretorio_storm] [--instrumentar]
+    instrumentar = '--instrumentar' in sys.argv
+    argumentos = [arg for arg in sys.argv[1:] if arg != '--instrumentar']
+
+    instrumentacao = Instrumentacao() if instrumentar else None
+    with instrumentacao or nullcontext():
+        resumo = atualizar(caminho_pagas=argumentos[0] if argumentos else None, diretorio_modelos=DIRETORIO_MODELOS,
+                           diretorio_storm=argumentos[1] if len(argumentos) > 1 else None, caminho_previsao=CAMINHO_PREVISAO,
+                           caminho_estimador=CAMINHO_ESTIMADOR)
+    print(f"novos: {len(resumo['novos'])} | alterados: {len(resumo['alterados'])} | linhas: {resumo['linhas']} | watermark: {resumo['watermark']}")
+    if resumo['bundle']:
+        print(f"modelos por segmento: {resumo['bundle']}")
+    if resumo['estimativa'] is not None:
+        estimativa = resumo['estimativa']
+        print(f"taxa online: {estimativa['taxa']:.5f} [{estimativa['inferior']:.5f}, {estimativa['superior']:.5f}] alpha={estimativa['alpha']:.3f}")
+    if resumo['previsor'] is not None:
+        print(resumo['previsor'].resumo_planejamento().head(1).to_string(index=False))
+    for erro in resumo['erros']:
+        print(f"falha em {erro['arquivo']}: {erro['erro']}")
+    if instrumentacao is not None:
+        print(instrumentacao.tabela().to_string(index=False))
+        print(f"métricas em {instrumentacao.salvar()}")
@@ -0,0 +1,334 @@
+"""Previsão horária de consultas e contratos pagos (Holt-Winters com dupla sazonalidade).
+
+conversao.ipynb reamostra `total_consultas` e `count_pagas` por hora e olha
+ACF e STL(period=24) só em gráfico. Aqui cada série horária (consultas e pagas
+por parceiro × provider, mais o total) recebe um Holt-Winters aditivo com ciclo
+diário (24h) e semanal (168h), na forma de correção de erro:
+
+    previsto  ŷ_t = l + d[t mod 24] + w[t mod 168]
+    erro      e_t = y_t - ŷ_t
+    l += α·e_t    d[t mod 24] += δ·e_t    w[t mod 168] += ω·e_t
+
+O estado de cada série (nível, 24 + 168 sazonais e a próxima hora esperada)
+fica salvo, então cada hora nova é uma atualização O(1) em vez de um reajuste
+do histórico. No ajuste, todas as séries e todas as combinações da grade de
+(α, δ, ω) são filtradas juntas em arrays NumPy, numa única passada pelo
+histórico; cada série fica com a combinação de menor erro um passo à frente.
+
+As pagas de uma hora já absorvida não são revisadas quando chegam propostas
+atrasadas; `--reajustar` refaz o ajuste a partir de all_data.
+"""
+import itertools
+import os
+
+import numpy as np
+import pandas as pd
+
+from armazenamento import DIRETORIO_DATASETS, ler_dataset
+from conversao_agregada import NS_HORA, epoch_ns, marcar_pagas
+
+CAMINHO_PREVISAO = '../../output_data/estado/previsao.parquet'
+
+CHAVES_SERIE = ['partiner_consulta', 'provider_consulta']
+COLUNAS_PREVISAO = ['created_consulta', 'status_consulta', 'CPF_pagas'] + CHAVES_SERIE
+METRICAS = ('consultas', 'pagas')
+
+# Valor das chaves na série agregada (todas as consultas) e em chaves nulas
+TOTAL = 'todos'
+VALOR_DESCONHECIDO = 'desconhecido'
+
+HORAS_DIA = 24
+HORAS_SEMANA = 168
+
+# Grade de suavização avaliada no ajuste (nível, ciclo diário, ciclo semanal)
+ALFAS = (0.02, 0.05, 0.1, 0.2)
+DELTAS = (0.0, 0.05, 0.15)
+OMEGAS = (0.0, 0.05, 0.15)
+
+VERSAO_ESTADO = 1
+
+
+# --- 1. Séries horárias ---
+
+def series_horarias(dados: pd.DataFrame, chaves: list = CHAVES_SERIE, inicio: int = None, fim: int = None) -> tuple:
+    """Matriz (série × hora) de consultas e pagas a partir de linhas de all_data.
+
+    Retorna `(rotulos, inicio, valores)`: `rotulos` tem `metrica` e as chaves de
+    cada linha de `valores`; as colunas são as horas `inicio` .. `fim - 1`
+    (horas desde a época), com zero nas horas sem consulta. A série com as
+    chaves iguais a TOTAL soma todos os segmentos.
+    """
+
+    ns = epoch_ns(dados['created_consulta'])
+    validos = ns != np.iinfo(np.int64).min
+    horas = ns[validos] // NS_HORA
+    pagas = marcar_pagas(dados)[validos]
+
+    if inicio is None:
+        inicio = int(horas.min()) if len(horas) else 0
+    if fim is None:
+        fim = int(horas.max()) + 1 if len(horas) else inicio
+    dentro = (horas >= inicio) & (horas < fim)
+
+    # código do segmento: fatoração de cada chave combinada em um inteiro
+    combinados = np.zeros(int(dentro.sum()), dtype=np.int64)
+    niveis = []
+    for chave in chaves:
+        coluna = dados[chave].to_numpy()[validos][dentro]
+        codigos, unicos = pd.factorize(coluna, sort=True)
+        unicos = [VALOR_DESCONHECIDO] + [str(valor) for valor in unicos]
+        combinados = combinados * len(unicos) + (codigos + 1)  # -1 (nulo) vira 0
+        niveis.append(unicos)
+    presentes, codigos = np.unique(combinados, return_inverse=True)
+    horas, pagas = horas[dentro], pagas[dentro]
+
+    n_segmentos, n_horas = len(presentes), fim - inicio
+    posicoes = codigos * n_horas + (horas - inicio)
+    consultas = np.bincount(posicoes, minlength=n_segmentos * n_horas).reshape(n_segmentos, n_horas)
+    pagas = np.bincount(posicoes, weights=pagas, minlength=n_segmentos * n_horas).reshape(n_segmentos, n_horas)
+
+    segmentos = {}
+    for chave, unicos in zip(reversed(chaves), reversed(niveis)):
+        presentes, posicao = np.divmod(presentes, len(unicos))
+        segmentos[chave] = np.asarray(unicos, dtype=object)[posicao]
+    segmentos = pd.DataFrame({chave: segmentos[chave] for chave in chaves})
+    segmentos = pd.concat([pd.DataFrame([[TOTAL] * len(chaves)], columns=chaves), segmentos], ignore_index=True)
+    consultas = np.vstack([consultas.sum(axis=0, keepdims=True), consultas])
+    pagas = np.vstack([pagas.sum(axis=0, keepdims=True), pagas])
+
+    rotulos = pd.concat([segmentos.assign(metrica=metrica) for metrica in METRICAS], ignore_index=True)
+    rotulos = rotulos[['metrica'] + chaves]
+    valores = np.vstack([consultas, pagas]).astype(np.float64)
+
+    return rotulos, inicio, valores
+
+
+# --- 2. Filtro ---
+
+def _filtrar(valores, inicio, nivel, diario, semanal, alfa, delta, omega, inicio_erro: int = 0):
+    """Aplica as horas de `valores` ao estado (alterado no lugar) e retorna a soma dos erros².
+
+    O estado tem uma dimensão extra para as combinações de parâmetros:
+    nivel (n, g), diario (n, g, 24), semanal (n, g, 168); alfa/delta/omega
+    são (g,) no ajuste ou (n, 1) na atualização.
+    """
+
+    sse = np.zeros_like(nivel)
+    for t in range(valores.shape[1]):
+        hora = inicio + t
+        d, w = hora % HORAS_DIA, hora % HORAS_SEMANA
+        erro = valores[:, t, None] - (nivel + diario[..., d] + semanal[..., w])
+        nivel += alfa * erro
+        diario[..., d] += delta * erro
+        semanal[..., w] += omega * erro
+        if t >= inicio_erro:
+            sse += erro * erro
+    return sse
+
+
+def _inicializar(valores: np.ndarray, inicio: int) -> tuple:
+    """Nível e sazonais iniciais a partir das primeiras semanas (até duas)."""
+
+    janela = valores[:, :min(valores.shape[1], 2 * HORAS_SEMANA)]
+    nivel = janela[:, :HORAS_SEMANA].mean(axis=1)
+
+    posicoes = (inicio + np.arange(janela.shape[1])) % HORAS_SEMANA
+    indicadora = np.zeros((janela.shape[1], HORAS_SEMANA))
+    indicadora[np.arange(janela.shape[1]), posicoes] = 1.0
+    semanal = (janela - nivel[:, None]) @ indicadora / indicadora.sum(axis=0)
+
+    diario = semanal.reshape(len(valores), HORAS_SEMANA // HORAS_DIA, HORAS_DIA).mean(axis=1)
+    semanal = semanal - np.tile(diario, HORAS_SEMANA // HORAS_DIA)
+
+    return nivel, diario, semanal
+
+
+# --- 3. Previsor ---
+
+class HistoricoCurto(ValueError):
+    """all_data ainda não tem a semana mínima para o ajuste."""
+
+
+class PrevisorHorario:
+    """Estado do Holt-Winters de todas as séries; `rotulos` identifica cada linha."""
+
+    def __init__(self, rotulos: pd.DataFrame, proxima_hora: int, nivel, diario, semanal, parametros, rmse):
+        self.rotulos = rotulos.reset_index(drop=True)
+        self.proxima_hora = int(proxima_hora)
+        # cópias próprias: o estado é alterado no lugar em `atualizar`, e os arrays
+        # vindos de um DataFrame (ex.: `carregar`) podem ser só leitura no copy-on-write
+        self.nivel = np.array(nivel, dtype=np.float64, copy=True)
+        self.diario = np.array(diario, dtype=np.float64, copy=True)
+        self.semanal = np.array(semanal, dtype=np.float64, copy=True)
+        self.parametros = np.array(parametros, dtype=np.float64, copy=True)  # (n, 3): alfa, delta, omega
+        self.rmse = np.array(rmse, dtype=np.float64, copy=True)
+
+    @property
+    def chaves(self) -> list:
+        return [coluna for coluna in self.rotulos.columns if coluna != 'metrica']
+
+    @classmethod
+    def ajustar(cls, rotulos: pd.DataFrame, inicio: int, valores: np.ndarray, grade: list = None) -> 'PrevisorHorario':
+        """Escolhe (α, δ, ω) por série na grade e deixa o estado na última hora do histórico."""
+
+        if valores.shape[1] < HORAS_SEMANA:
+            raise HistoricoCurto(f"histórico curto: {valores.shape[1]} horas (mínimo {HORAS_SEMANA})")
+
+        grade = np.array(grade if grade is not None else list(itertools.product(ALFAS, DELTAS, OMEGAS)), dtype=np.float64)
+        n, g = len(valores), len(grade)
+
+        nivel, diario, semanal = _inicializar(valores, inicio)
+        nivel = np.repeat(nivel[:, None], g, axis=1)
+        diario = np.repeat(diario[:, None, :], g, axis=1)
+        semanal = np.repeat(semanal[:, None, :], g, axis=1)
+
+        # a primeira semana serve de aquecimento e não entra no erro
+        sse = _filtrar(valores, inicio, nivel, diario, semanal, grade[:, 0], grade[:, 1], grade[:, 2], inicio_erro=HORAS_SEMANA)
+        melhor = sse.argmin(axis=1)
+        linhas = np.arange(n)
+        avaliadas = max(valores.shape[1] - HORAS_SEMANA, 1)
+
+        return cls(rotulos, inicio + valores.shape[1], nivel[linhas, melhor], diario[linhas, melhor], semanal[linhas, melhor],
+                   grade[melhor], np.sqrt(sse[linhas, melhor] / avaliadas))
+
+    def atualizar(self, valores: np.ndarray):
+        """Incorpora as horas seguintes a `proxima_hora` (colunas de `valores`, linhas na ordem de `rotulos`)."""
+
+        if valores.shape[1] == 0:
+            return self
+        nivel, diario, semanal = self.nivel[:, None], self.diario[:, None, :], self.semanal[:, None, :]
+        _filtrar(valores, self.proxima_hora, nivel, diario, semanal, *(self.parametros[:, [i]] for i in range(3)))
+        self.nivel, self.diario, self.semanal = nivel[:, 0], diario[:, 0], semanal[:, 0]
+        self.proxima_hora += valores.shape[1]
+        return self
+
+    def atualizar_dados(self, dados: pd.DataFrame, fim: int = None) -> 'PrevisorHorario':
+        """Atualiza com linhas de all_data; usa só as horas entre `proxima_hora` e `fim`.
+
+        Sem `fim`, vai até a última hora presente em `dados` (que deve estar
+        completa). Segmentos que não existiam no ajuste são ignorados.
+        """
+
+        rotulos, inicio, valores = series_horarias(dados, self.chaves, inicio=self.proxima_hora, fim=fim)
+        posicoes = self.rotulos.merge(rotulos.reset_index(), on=['metrica'] + self.chaves, how='left')['index']
+        alinhados = np.zeros((len(self.rotulos), valores.shape[1]))
+        encontrados = posicoes.notna().to_numpy()
+        alinhados[encontrados] = valores[posicoes[encontrados].astype(np.int64)]
+        return self.atualizar(alinhados)
+
+    def prever(self, horizonte: int = HORAS_DIA) -> np.ndarray:
+        """Previsão (n, horizonte) das próximas horas, sem valores negativos."""
+
+        horas = self.proxima_hora + np.arange(horizonte)
+        previsto = self.nivel[:, None] + self.diario[:, horas % HORAS_DIA] + self.semanal[:, horas % HORAS_SEMANA]
+        return np.clip(previsto, 0, None)
+
+    def previsao(self, horizonte: int = HORAS_DIA, z: float = 1.96) -> pd.DataFrame:
+        """Previsão hora a hora em formato longo, com faixa aproximada de ±z desvios."""
+
+        previsto = self.prever(horizonte)
+        passos = np.arange(1, horizonte + 1)
+        # variância do erro h passos à frente do nível local: σ²·(1 + (h-1)·α²)
+        desvio = self.rmse[:, None] * np.sqrt(1 + (passos - 1) * self.parametros[:, [0]] ** 2)
+
+        horas = pd.to_datetime((self.proxima_hora + passos - 1) * NS_HORA)
+        previsao = self.rotulos.loc[self.rotulos.index.repeat(horizonte)].reset_index(drop=True)
+        previsao['hora'] = np.tile(horas, len(self.rotulos))
+        previsao['previsto'] = previsto.ravel()
+        previsao['inferior'] = np.clip(previsto - z * desvio, 0, None).ravel()
+        previsao['superior'] = (previsto + z * desvio).ravel()
+        return previsao
+
+    def resumo_planejamento(self) -> pd.DataFrame:
+        """Consultas e pagas previstas para o próximo dia e a próxima semana, por segmento."""
+
+        semana = self.prever(HORAS_SEMANA)
+        totais = self.rotulos.assign(proximo_dia=semana[:, :HORAS_DIA].sum(axis=1), proxima_semana=semana.sum(axis=1))
+        resumo = totais.pivot_table(index=self.chaves, columns='metrica', values=['proximo_dia', 'proxima_semana'], sort=False)
+        resumo.columns = [f'{metrica}_{periodo}' for periodo, metrica in resumo.columns]
+        colunas = [f'{metrica}_{periodo}' for metrica in METRICAS for periodo in ('proximo_dia', 'proxima_semana')]
+        return resumo[colunas].reset_index()
+
+    # --- persistência ---
+
+    def salvar(self, caminho: str = CAMINHO_PREVISAO):
+        estado = self.rotulos.copy()
+        estado['nivel'] = self.nivel
+        estado[['alfa', 'delta', 'omega']] = self.parametros
+        estado['rmse'] = self.rmse
+        diario = pd.DataFrame(self.diario, columns=[f'd{h:02d}' for h in range(HORAS_DIA)])
+        semanal = pd.DataFrame(self.semanal, columns=[f'w{h:03d}' for h in range(HORAS_SEMANA)])
+        estado = pd.concat([estado, diario, semanal], axis=1)
+        estado.attrs = {'proxima_hora': self.proxima_hora, 'chaves': self.chaves, 'versao': VERSAO_ESTADO}
+
+        os.makedirs(os.path.dirname(os.path.abspath(caminho)), exist_ok=True)
+        estado.to_parquet(caminho, index=False)
+
+    @classmethod
+    def carregar(cls, caminho: str = CAMINHO_PREVISAO) -> 'PrevisorHorario':
+        estado = pd.read_parquet(caminho)
+        chaves = list(estado.attrs['chaves'])
+        return cls(
+            estado[['metrica'] + chaves],
+            estado.attrs['proxima_hora'],
+            estado['nivel'].to_numpy(),
+            estado[[f'd{h:02d}' for h in range(HORAS_DIA)]].to_numpy(),
+            estado[[f'w{h:03d}' for h in range(HORAS_SEMANA)]].to_numpy(),
+            estado[['alfa', 'delta', 'omega']].to_numpy(),
+            estado['rmse'].to_numpy(),
+        )
+
+
+# --- 4. Carga a partir dos datasets ---
+
+def _ultima_hora(dados: pd.DataFrame):
+    # hora (desde a época) da consulta mais recente; None sem datas válidas
+    ns = epoch_ns(dados['created_consulta'])
+    ns = ns[ns != np.iinfo(np.int64).min]
+    return int(ns.max() // NS_HORA) if len(ns) else None
+
+
+def atualizar_previsao(diretorio_datasets: str = DIRETORIO_DATASETS, caminho: str = CAMINHO_PREVISAO,
+                       reajustar: bool = False, chaves: list = CHAVES_SERIE) -> PrevisorHorario:
+    """Carrega o estado salvo e aplica as horas novas de all_data (ou ajusta do zero).
+
+    Só lê as partições a partir do dia da próxima hora esperada. Sem estado
+    salvo, ou com `reajustar`, lê o all_data inteiro e escolhe os parâmetros.
+    A última hora presente em all_data fica de fora: numa carga no meio do dia
+    ela ainda está incompleta e entra na execução seguinte.
+    """
+
+    if reajustar or not os.path.exists(caminho):
+        dados = ler_dataset('all_data', colunas=COLUNAS_PREVISAO, raiz=diretorio_datasets)
+        previsor = PrevisorHorario.ajustar(*series_horarias(dados, chaves, fim=_ultima_hora(dados)))
+    else:
+        previsor = PrevisorHorario.carregar(caminho)
+        dia = pd.Timestamp(previsor.proxima_hora * NS_HORA).normalize()
+        dados = ler_dataset('all_data', colunas=COLUNAS_PREVISAO, raiz=diretorio_datasets, data_inicio=dia.strftime('%Y-%m-%d'))
+        ultima = _ultima_hora(dados)
+        previsor.atualizar_dados(dados, fim=previsor.proxima_hora if ultima is None else max(ultima, previsor.proxima_hora))
+
+    previsor.salvar(caminho)
+    return previsor
+
+
+def consultas_previstas_dia(caminho: str = CAMINHO_PREVISAO):
+    """Total de consultas previsto para as próximas 24h (série TOTAL), ou None sem estado salvo.
+
+    Usado como valor inicial de MEAN_CONSULTA nos dashboards.
+    """
+
+    if not os.path.exists(caminho):
+        return None
+    previsor = PrevisorHorario.carregar(caminho)
+    total = (previsor.rotulos['metrica'] == 'consultas') & (previsor.rotulos[previsor.chaves] == TOTAL).all(axis=1)
+    return float(previsor.prever(HORAS_DIA)[total.to_numpy()].sum())
+
+
+if __name__ == '__main__':
+    import sys
+
+    # uso: python previsao.py [--reajustar]
+    previsor = atualizar_previsao(reajustar='--reajustar' in sys.argv)
+    print(f"{len(previsor.rotulos)} séries; próxima hora: {pd.Timestamp(previsor.proxima_hora * NS_HORA)}")
+    print(previsor.resumo_planejamento().to_string(index=False))
@@ -0,0 +1,113 @@
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from instrumentacao import etapa
+
+try:
+    import orjson
+
+    _loads = orjson.loads
+    _ERROS_JSON = (orjson.JSONDecodeError, TypeError)
+except ImportError:  # backend padrão quando orjson não está instalado
+    _loads = json.loads
+    _ERROS_JSON = (json.JSONDecodeError, TypeError)
+
+# Campos extraídos de `proventos_pagas` por padrão
+CAMPOS_PROVENTOS = ['tac', 'tac_total', 'spread', 'spread_total', 'iof_rate', 'iof_total', 'disbursed_issue_amount']
+
+# Campos que vêm como objeto sem 'Percentual' (ex.: "iof_rate": {"annual": 3.0, "mensal": 0.38}):
+# cada chave vira uma coluna `<campo>_<chave>`
+SUBCAMPOS_PROVENTOS = {'iof_rate': ('annual', 'mensal')}
+
+# Abaixo deste tamanho o custo de subir processos supera o ganho
+MINIMO_PARALELO = 200_000
+
+
+def colunas_proventos(campos: list = None) -> list:
+    """Colunas devolvidas por `decodificar_proventos` para os `campos` pedidos."""
+    colunas = []
+    for campo in campos or CAMPOS_PROVENTOS:
+        colunas += [f'{campo}_{chave}' for chave in SUBCAMPOS_PROVENTOS[campo]] if campo in SUBCAMPOS_PROVENTOS else [campo]
+    return colunas
+
+
+def _para_float(valor) -> float:
+    # estruturas como {"Percentual": 1.5, ...} são achatadas para o percentual
+    if isinstance(valor, dict):
+        valor = valor.get('Percentual')
+    if valor is None or isinstance(valor, (list, dict)):
+        return np.nan
+    try:
+        return float(valor)
+    except (TypeError, ValueError):
+        return np.nan
+
+
+def _decodificar_bloco(args):
+    registros, campos = args
+
+    colunas = {coluna: np.full(len(registros), np.nan) for coluna in colunas_proventos(campos)}
+    invalidos = 0
+
+    for i, registro in enumerate(registros):
+        if not isinstance(registro, (str, bytes)):
+            continue
+        try:
+            proventos = _loads(registro)
+        except _ERROS_JSON:
+            invalidos += 1
+            continue
+        if not isinstance(proventos, dict):
+            invalidos += 1
+            continue
+        for campo in campos:
+            if campo not in proventos:
+                continue
+            if campo in SUBCAMPOS_PROVENTOS:
+                valor = proventos[campo]
+                for chave in SUBCAMPOS_PROVENTOS[campo]:
+                    colunas[f'{campo}_{chave}'][i] = _para_float(valor.get(chave) if isinstance(valor, dict) else None)
+            else:
+                colunas[campo][i] = _para_float(proventos[campo])
+
+    return colunas, invalidos
+
+
+def decodificar_proventos(serie: pd.Series, campos: list = None, processos: int = None,
+                          tamanho_bloco: int = 50_000) -> pd.DataFrame:
+    """Decodifica a coluna JSON `proventos_pagas` uma única vez por registro.
+
+    Retorna um DataFrame float64 (mesmo índice da série) com um campo por coluna;
+    valores `{"Percentual": ...}` viram o próprio percentual, os campos de
+    SUBCAMPOS_PROVENTOS viram uma coluna por chave (`iof_rate_annual`,
+    `iof_rate_mensal`; ver `colunas_proventos`) e registros ausentes ou
+    inválidos ficam NaN. Séries grandes são processadas em blocos paralelos.
+    O total de registros inválidos fica em `df.attrs['registros_invalidos']`.
+    """
+
+    campos = list(campos or CAMPOS_PROVENTOS)
+    registros = serie.to_numpy(dtype=object)
+    blocos = [(registros[i:i + tamanho_bloco], campos) for i in range(0, len(registros), tamanho_bloco)]
+
+    if processos is None:
+        processos = (os.cpu_count() or 1) if len(registros) >= MINIMO_PARALELO else 1
+
+    with etapa('proventos.decodificacao', len(registros)):
+        if processos > 1 and len(blocos) > 1:
+            with ProcessPoolExecutor(max_workers=processos) as executor:
+                resultados = list(executor.map(_decodificar_bloco, blocos))
+        else:
+            resultados = [_decodificar_bloco(bloco) for bloco in blocos]
+
+    df = pd.DataFrame(
+        {coluna: np.concatenate([r[0][coluna] for r in resultados]) if resultados else np.array([], dtype=float)
+         for coluna in colunas_proventos(campos)},
+        index=serie.index,
+    )
+    df.attrs['registros_invalidos'] = sum(r[1] for r in resultados)
+
+    return df
@@ -0,0 +1,153 @@
+"""Análise de sensibilidade da MCU e do ponto de ruptura.
+
+No teste.py cada parâmetro é mexido um de cada vez. Aqui todos variam numa
+faixa ±`variacao` em torno do cenário atual, numa única chamada vetorizada de
+`calcular_mcu` / `calcular_ponto_ruptura`:
+
+- `varredura`: uma linha da matriz por parâmetro (só ele varia, os demais no
+  cenário atual), com MCU e ponto de ruptura em cada ponto;
+- `tornado`: amplitude e elasticidade de cada parâmetro, ordenados pelo
+  impacto, para o gráfico de tornado;
+- `mapa_calor`: grade 2-D de um par de parâmetros (ex.: spread × comissão 1),
+  calculada por broadcasting (200 × 200 = 40 mil pontos em milissegundos).
+
+A elasticidade é a variação relativa da saída sobre a variação relativa do
+parâmetro entre as pontas da faixa. A da MCU é exata (a MCU é linear nos
+parâmetros); a do ponto de ruptura usa a razão margem / custo por consulta
+sem o arredondamento para baixo, que deixaria a elasticidade em degraus.
+"""
+import numpy as np
+import pandas as pd
+
+from mcu import COLUNAS_MCU, calcular_mcu, calcular_ponto_ruptura
+
+# Rótulos dos parâmetros, como na barra lateral do teste.py
+PARAMETROS = {
+    'tac': 'TAC',
+    'spread': 'Spread',
+    'averbacao': 'Averbação',
+    'formalizacao': 'Formalização',
+    'comissao1': 'Comissão 1',
+    'comissao2': 'Comissão 2',
+    'qtd_consulta': 'Consultas por contrato',
+    'valor_por_consulta': 'Custo por consulta',
+}
+
+METRICAS = {'mcu': 'MCU (R$)', 'ponto_ruptura': 'Ponto de ruptura (consultas)'}
+
+VARIACAO_PADRAO = 0.2
+PONTOS_VARREDURA = 41
+PONTOS_MAPA = 200
+
+COLUNAS_TORNADO = ['parametro', 'rotulo', 'base', 'inferior', 'superior', 'mcu_base', 'mcu_inferior', 'mcu_superior', 'amplitude_mcu',
+                   'elasticidade_mcu', 'ruptura_base', 'ruptura_inferior', 'ruptura_superior', 'amplitude_ruptura', 'elasticidade_ruptura']
+
+
+def _argumentos(base: dict, variaveis: dict) -> list:
+    faltando = [c for c in COLUNAS_MCU if c not in base and c not in variaveis]
+    if faltando:
+        raise KeyError(f"Parâmetros ausentes para o cálculo da MCU: {faltando}")
+    return [variaveis[c] if c in variaveis else float(base[c]) for c in COLUNAS_MCU]
+
+
+def _avaliar(base: dict, variaveis: dict) -> tuple:
+    """MCU, ponto de ruptura e ponto de ruptura sem arredondamento, por broadcasting de `variaveis` sobre `base`."""
+
+    args = _argumentos(base, variaveis)
+    mcu, _, _ = calcular_mcu(*args)
+
+    # o ponto de ruptura não depende da quantidade de consultas (índice 6)
+    sem_consultas = args[:6] + [args[7]]
+    ruptura = np.broadcast_to(calcular_ponto_ruptura(*sem_consultas), np.shape(mcu))
+    margem, _, _ = calcular_mcu(*args[:6], 0, 0)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        continua = np.where(np.isnan(ruptura), np.nan, margem / np.asarray(args[7], dtype=float))
+
+    return mcu, ruptura, np.broadcast_to(continua, np.shape(mcu))
+
+
+def _faixa(valor: float, variacao: float, pontos: int) -> np.ndarray:
+    return float(valor) * (1 + np.linspace(-variacao, variacao, int(pontos)))
+
+
+def varredura(base: dict, variacao: float = VARIACAO_PADRAO, pontos: int = PONTOS_VARREDURA, parametros: list = None) -> pd.DataFrame:
+    """MCU e ponto de ruptura com cada parâmetro variando sozinho em ±`variacao` do valor em `base`.
+
+    `base` tem os argumentos de `calcular_mcu` (COLUNAS_MCU). Uma linha por
+    (parâmetro, ponto), com a variação relativa em `fator`.
+    """
+
+    parametros = list(parametros or PARAMETROS)
+    fatores = np.linspace(-variacao, variacao, int(pontos))
+
+    # matriz parâmetros × pontos de cada argumento: a linha i varia só o parâmetro i
+    linha = np.arange(len(parametros))[:, None]
+    variaveis = {
+        nome: np.where(linha == parametros.index(nome), float(base[nome]) * (1 + fatores), float(base[nome]))
+        for nome in parametros
+    }
+    mcu, ruptura, _ = _avaliar(base, variaveis)
+
+    return pd.DataFrame({
+        'parametro': np.repeat(parametros, len(fatores)),
+        'fator': np.tile(fatores, len(parametros)),
+        'valor': np.concatenate([variaveis[nome][i] for i, nome in enumerate(parametros)]) if parametros else [],
+        'mcu': mcu.ravel(),
+        'ponto_ruptura': ruptura.ravel(),
+    })
+
+
+def tornado(base: dict, variacao: float = VARIACAO_PADRAO, parametros: list = None, metrica: str = 'mcu') -> pd.DataFrame:
+    """Impacto de cada parâmetro nas pontas de ±`variacao`, do maior para o menor pela amplitude de `metrica`.
+
+    Parâmetros com valor base zero não variam e ficam com elasticidade NaN.
+    """
+
+    parametros = list(parametros or PARAMETROS)
+    variaveis = {nome: np.full((len(parametros), 3), float(base[nome])) for nome in parametros}
+    for i, nome in enumerate(parametros):
+        variaveis[nome][i] = _faixa(base[nome], variacao, 3)
+    mcu, ruptura, continua = _avaliar(base, variaveis)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        elasticidade_mcu = (mcu[:, 2] - mcu[:, 0]) / (2 * variacao * mcu[:, 1])
+        elasticidade_ruptura = (continua[:, 2] - continua[:, 0]) / (2 * variacao * continua[:, 1])
+    nulos = np.array([float(base[nome]) == 0 for nome in parametros], dtype=bool)
+
+    tabela = pd.DataFrame({
+        'parametro': parametros,
+        'rotulo': [PARAMETROS.get(nome, nome) for nome in parametros],
+        'base': [float(base[nome]) for nome in parametros],
+        'inferior': [variaveis[nome][i, 0] for i, nome in enumerate(parametros)],
+        'superior': [variaveis[nome][i, 2] for i, nome in enumerate(parametros)],
+        'mcu_base': mcu[:, 1],
+        'mcu_inferior': mcu[:, 0],
+        'mcu_superior': mcu[:, 2],
+        'amplitude_mcu': np.abs(mcu[:, 2] - mcu[:, 0]),
+        'elasticidade_mcu': np.where(nulos, np.nan, elasticidade_mcu),
+        'ruptura_base': ruptura[:, 1],
+        'ruptura_inferior': ruptura[:, 0],
+        'ruptura_superior': ruptura[:, 2],
+        'amplitude_ruptura': np.abs(ruptura[:, 2] - ruptura[:, 0]),
+        'elasticidade_ruptura': np.where(nulos, np.nan, elasticidade_ruptura),
+    }, columns=COLUNAS_TORNADO)
+
+    amplitude = 'amplitude_mcu' if metrica == 'mcu' else 'amplitude_ruptura'
+    return tabela.sort_values(amplitude, ascending=False, kind='stable', na_position='last').reset_index(drop=True)
+
+
+def mapa_calor(base: dict, parametro_x: str, parametro_y: str, variacao: float = VARIACAO_PADRAO, pontos: int = PONTOS_MAPA) -> tuple:
+    """Grade `pontos` × `pontos` de um par de parâmetros em ±`variacao`.
+
+    Retorna (valores_x, valores_y, mcu, ponto_ruptura), com as matrizes no
+    formato (len(valores_y), len(valores_x)), como espera o imshow/pcolormesh.
+    """
+
+    if parametro_x == parametro_y:
+        raise ValueError("o mapa de calor precisa de dois parâmetros diferentes")
+
+    valores_x = _faixa(base[parametro_x], variacao, pontos)
+    valores_y = _faixa(base[parametro_y], variacao, pontos)
+    mcu, ruptura, _ = _avaliar(base, {parametro_x: valores_x[None, :], parametro_y: valores_y[:, None]})
+
+    return valores_x, valores_y, mcu, ruptura
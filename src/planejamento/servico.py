@@ -0,0 +1,126 @@
+"""Cálculos dos dashboards em lote, sem Streamlit: MCU, Ponto de Ruptura e platô.
+
+Cada função recebe uma lista de cenários (dicts com os parâmetros por nome) e
+devolve uma lista de resultados na mesma ordem, prontos para JSON (NaN vira
+None). Os cenários são convertidos em colunas e avaliados de uma vez pelas
+versões vetorizadas de mcu.py e solver_plato.py. É a camada usada pela API
+HTTP (api.py).
+"""
+import numpy as np
+
+from mcu import COLUNAS_MCU, calcular_mcu, calcular_ponto_ruptura
+from solver_plato import CONSULTA_MAX, CONSULTA_MIN, PASSO_PADRAO, resolver_plato_lote
+
+CAMPOS_RUPTURA = ['tac', 'spread', 'averbacao', 'formalizacao', 'comissao1', 'comissao2', 'valor_por_consulta']
+CAMPOS_PLATO = ['taxa_conversao', 'mcu', 'custo_consulta', 'limiar']
+
+# Campos opcionais do platô e seus padrões (os mesmos dos dashboards)
+OPCIONAIS_PLATO = {'consulta_min': CONSULTA_MIN, 'consulta_max': CONSULTA_MAX, 'passo': PASSO_PADRAO}
+
+
+class ErroValidacao(ValueError):
+    """Cenário com campo ausente ou não numérico; a mensagem indica o índice do cenário."""
+
+
+def _colunas(cenarios, campos: list, opcionais: dict = None) -> dict:
+    if not isinstance(cenarios, list):
+        raise ErroValidacao("esperada uma lista de cenários")
+
+    opcionais = opcionais or {}
+    todos = campos + list(opcionais)
+    matriz = np.empty((len(cenarios), len(todos)))
+
+    for i, cenario in enumerate(cenarios):
+        if not isinstance(cenario, dict):
+            raise ErroValidacao(f"cenário {i}: esperado um objeto")
+        linha = [cenario.get(campo, opcionais.get(campo)) for campo in todos]
+        # o NumPy aceitaria None (NaN), bool e texto numérico; aqui são erros
+        if any(valor is None or isinstance(valor, (bool, str)) for valor in linha):
+            raise ErroValidacao(_motivo(i, todos, linha))
+        try:
+            matriz[i] = linha
+        except (TypeError, ValueError, OverflowError):
+            raise ErroValidacao(_motivo(i, todos, linha)) from None
+
+    return {campo: matriz[:, j] for j, campo in enumerate(todos)}
+
+
+def _motivo(i: int, campos: list, linha: list) -> str:
+    for campo, valor in zip(campos, linha):
+        if valor is None:
+            return f"cenário {i}: campo obrigatório ausente: {campo}"
+        if isinstance(valor, (bool, str)) or not isinstance(valor, (int, float)):
+            return f"cenário {i}: campo {campo} deve ser numérico"
+        try:
+            float(valor)
+        except OverflowError:
+            return f"cenário {i}: campo {campo} não é finito (fora do intervalo do float64)"
+    return f"cenário {i}: valores inválidos"
+
+
+def _ou_none(valores) -> list:
+    # NaN != NaN
+    return [None if v != v else v for v in np.asarray(valores, dtype=float).tolist()]
+
+
+def lote_mcu(cenarios: list) -> list:
+    """MCU, receita bruta e custos variáveis de cada cenário (campos de COLUNAS_MCU)."""
+
+    colunas = _colunas(cenarios, COLUNAS_MCU)
+    if not cenarios:
+        return []
+    mcu, receita_bruta, custos_variaveis = calcular_mcu(*(colunas[c] for c in COLUNAS_MCU))
+
+    return [
+        {'mcu': m, 'receita_bruta': r, 'custos_variaveis': c}
+        for m, r, c in zip(mcu.tolist(), receita_bruta.tolist(), custos_variaveis.tolist())
+    ]
+
+
+def lote_ruptura(cenarios: list) -> list:
+    """Ponto de Ruptura e MCU no limite de cada cenário; None quando não há margem para consultas."""
+
+    colunas = _colunas(cenarios, CAMPOS_RUPTURA)
+    if not cenarios:
+        return []
+    args = [colunas[c] for c in CAMPOS_RUPTURA]
+
+    ponto = calcular_ponto_ruptura(*args)
+    mcu_ruptura, _, _ = calcular_mcu(*args[:6], np.nan_to_num(ponto), args[6])
+    mcu_ruptura = np.where(np.isnan(ponto), np.nan, mcu_ruptura)
+
+    return [
+        {'ponto_ruptura': None if p is None else int(p), 'mcu_ruptura': m}
+        for p, m in zip(_ou_none(ponto), _ou_none(mcu_ruptura))
+    ]
+
+
+def lote_plato(cenarios: list) -> list:
+    """Ponto de platô, dif no platô, regime e polo de cada cenário (solução analítica)."""
+
+    colunas = _colunas(cenarios, CAMPOS_PLATO, OPCIONAIS_PLATO)
+    if not cenarios:
+        return []
+    # mesmas faixas que resolver_plato_lote recusa, mas apontando o primeiro cenário inválido
+    faixas = [
+        (colunas['limiar'] <= 0, "limiar deve ser positivo"),
+        (colunas['passo'] <= 0, "passo deve ser positivo"),
+        (colunas['consulta_max'] < colunas['consulta_min'], "consulta_max deve ser >= consulta_min"),
+    ]
+    for invalidos, motivo in faixas:
+        if invalidos.any():
+            raise ErroValidacao(f"cenário {np.flatnonzero(invalidos)[0]}: {motivo}")
+    plato = resolver_plato_lote(*(colunas[c] for c in CAMPOS_PLATO + list(OPCIONAIS_PLATO)))
+
+    regimes = np.where(plato['eficiencia'], 'eficiencia', 'ineficiencia').tolist()
+    return [
+        {'ponto_plato': p, 'dif_no_plato': d, 'regime': None if p is None else r, 'polo': polo}
+        for p, d, r, polo in zip(_ou_none(plato['ponto_plato']), _ou_none(plato['dif_no_plato']), regimes, _ou_none(plato['polo']))
+    ]
+
+
+OPERACOES = {
+    'mcu': lote_mcu,
+    'ruptura': lote_ruptura,
+    'plato': lote_plato,
+}
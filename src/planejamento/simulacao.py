@@ -0,0 +1,125 @@
+"""Simulação Monte Carlo do lucro usando o modelo binomial negativo de conversão.
+
+Para um volume de V consultas, o número de contratos pagos segue a binomial
+negativa do modelo de taxa (média taxa·V, dispersão alpha). O lucro é
+
+    lucro = pagas · margem_por_contrato - V · custo_consulta
+
+Os sorteios usam a inversa da CDF: um único vetor de uniformes (gerador com
+semente), ordenado, é levado à CDF de cada volume. Cada volume recebe uma
+amostra exata da sua binomial negativa, guardada como contagem por valor do
+suporte: média, quantis e probabilidade de prejuízo saem em O(suporte), sem
+materializar os sorteios. Os mesmos uniformes em todos os volumes (números
+aleatórios comuns) deixam as curvas suaves ao longo da grade.
+"""
+import numpy as np
+import pandas as pd
+
+from mcu import calcular_mcu
+from solver_plato import CONSULTA_MAX, CONSULTA_MIN
+
+QUANTIS_PADRAO = (0.05, 0.5, 0.95)
+
+# Desvios-padrão acima da média em que a CDF é truncada (cauda restante < 1e-9)
+DESVIOS_CAUDA = 20
+
+
+def margem_por_contrato(tac, spread, averbacao, formalizacao, comissao1, comissao2):
+    """Receita menos custos variáveis de um contrato pago, sem o custo das consultas."""
+
+    mcu, _, _ = calcular_mcu(tac, spread, averbacao, formalizacao, comissao1, comissao2, 0, 0)
+    return mcu
+
+
+def cdf_negbin(media: float, alpha: float) -> np.ndarray:
+    """CDF da binomial negativa (NB2: variância μ + αμ²) de 0 até a cauda desprezível.
+
+    Calculada pela recorrência dos log-pmf, sem gammaln; alpha 0 ou None é Poisson.
+    """
+
+    media = float(media)
+    alpha = alpha if alpha is not None and np.isfinite(alpha) and alpha > 0 else 0.0
+    if media <= 0:
+        return np.ones(1)
+
+    variancia = media + alpha * media ** 2
+    limite = int(np.ceil(media + DESVIOS_CAUDA * np.sqrt(variancia))) + 20
+    k = np.arange(limite, dtype=float)
+
+    if alpha:
+        r = 1 / alpha
+        log_q = np.log(alpha * media / (1 + alpha * media))
+        log_p0 = -r * np.log1p(alpha * media)
+        passos = np.log((k[:-1] + r) / (k[:-1] + 1)) + log_q
+    else:
+        log_p0 = -media
+        passos = np.log(media) - np.log(k[:-1] + 1)
+
+    log_pmf = np.concatenate([[log_p0], log_p0 + np.cumsum(passos)])
+    cdf = np.cumsum(np.exp(log_pmf))
+    cdf[-1] = 1.0  # a massa residual da cauda fica no último ponto
+
+    return cdf
+
+
+def sortear_pagas(media: float, alpha: float, uniformes: np.ndarray) -> np.ndarray:
+    """Contratos pagos pela inversa da CDF; uniformes ordenados geram contagens ordenadas."""
+    return np.searchsorted(cdf_negbin(media, alpha), uniformes, side='left')
+
+
+def _acumulado_sorteios(cdf: np.ndarray, uniformes: np.ndarray) -> np.ndarray:
+    # quantos sorteios têm pagas <= k, para cada k do suporte; equivale a
+    # sortear_pagas + contagem, mas custa O(suporte) em vez de O(sorteios)
+    return np.searchsorted(uniformes, cdf, side='right')
+
+
+def simular_lucro(taxa: float, alpha: float, margem_contrato: float, custo_consulta: float, volumes=None,
+                  sorteios: int = 100_000, semente: int = 42, quantis=QUANTIS_PADRAO) -> pd.DataFrame:
+    """Distribuição do lucro por volume de consultas: média, quantis e probabilidade de prejuízo.
+
+    `taxa` e `alpha` vêm do modelo (`ModeloTaxa.taxa` / `.alpha`). Retorna uma
+    linha por volume com `pagas_media`, `lucro_medio`, `lucro_p5`/`p50`/`p95`
+    (conforme `quantis`) e `prob_prejuizo`, todos calculados sobre os sorteios.
+    """
+
+    volumes = np.linspace(CONSULTA_MIN, CONSULTA_MAX, 200) if volumes is None else np.asarray(volumes, dtype=float)
+    sorteios = int(sorteios)
+    gerador = np.random.default_rng(semente)
+    uniformes = np.sort(gerador.random(sorteios))
+
+    # posições (na amostra ordenada) usadas pela interpolação linear de np.quantile;
+    # com margem negativa o lucro é decrescente nas pagas e a ordem se inverte
+    posicoes = (sorteios - 1) * np.asarray(quantis, dtype=float)
+    if margem_contrato < 0:
+        posicoes = (sorteios - 1) - posicoes
+    baixo = np.floor(posicoes).astype(int)
+    alto = np.minimum(np.ceil(posicoes).astype(int), sorteios - 1)
+    fracao = np.abs(posicoes - baixo)
+
+    pagas_media = np.empty(len(volumes))
+    lucro_quantis = np.empty((len(volumes), len(quantis)))
+    prob_prejuizo = np.empty(len(volumes))
+
+    for i, volume in enumerate(volumes):
+        acumulado = _acumulado_sorteios(cdf_negbin(taxa * volume, alpha), uniformes)
+        contagens = np.diff(acumulado, prepend=0)
+        suporte = np.arange(len(acumulado))
+        lucro = suporte * margem_contrato - volume * custo_consulta
+
+        pagas_media[i] = contagens @ suporte / sorteios
+        # pagas do j-ésimo sorteio ordenado = primeiro k com acumulado[k] > j
+        lucro_baixo = lucro[np.searchsorted(acumulado, baixo, side='right')]
+        lucro_alto = lucro[np.searchsorted(acumulado, alto, side='right')]
+        lucro_quantis[i] = lucro_baixo + fracao * (lucro_alto - lucro_baixo)
+        prob_prejuizo[i] = contagens[lucro < 0].sum() / sorteios
+
+    resultado = pd.DataFrame({
+        'consultas': volumes,
+        'pagas_media': pagas_media,
+        'lucro_medio': pagas_media * margem_contrato - volumes * custo_consulta,
+    })
+    for j, quantil in enumerate(quantis):
+        resultado[f'lucro_p{round(quantil * 100):g}'] = lucro_quantis[:, j]
+    resultado['prob_prejuizo'] = prob_prejuizo
+
+    return resultado
@@ -0,0 +1,444 @@
+"""Massa de dados sintética em escala de produção: consultas, propostas pagas e Storm.
+
+Versão vetorizada do gerador de planejamento_sinteticos, nos esquemas reais:
+resultado diário das consultas (`resultado_AAAA_MM_DD.csv`, lido por
+ingestao.ler_consultas), extração de propostas pagas sem cabeçalho
+(COLUNAS_PAGAS) e relatório de comissões Storm. As proporções seguem setembro/2025
+do parceiro 7560: ~2,2 consultas por CPF com cauda longa, mais volume no ciclo
+noturno e ~0,7% de propostas pagas por consulta.
+
+Tudo sai de `numpy.random.Generator` (um por dia, derivado da semente) e de hashes
+por linha/CPF, então o resultado depende só de `linhas`, `dias` e `semente`; o
+tamanho do bloco controla apenas a memória. Os CPFs têm o dígito verificador
+trocado de propósito: nenhum coincide com um CPF real.
+
+Uso: python sinteticos.py [--linhas N] [--semente S] [--formato parquet|csv] [--storm-html] [--destino dir]
+"""
+import argparse
+import os
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.csv as pacsv
+import pyarrow.parquet as pq
+from scipy.special import ndtr, ndtri
+
+from conversao_agregada import HORAS_NOTURNO
+from ingestao import REFAT_STATUS
+
+DIRETORIO_SINTETICOS = '../../output_data/sinteticos/'
+
+INICIO = '2025-09-01'
+DIAS = 28
+TAMANHO_CHUNK = 1_000_000
+FORMATOS = ('parquet', 'csv')
+
+# Esquemas dos arquivos de origem: resultado diário, extração de pagas e relatório Storm
+SCHEMAS = {
+    'consultas': pa.schema([
+        ('id', pa.string()),
+        ('provider', pa.string()),
+        ('document_number', pa.int64()),
+        ('status', pa.string()),
+        ('provider_key', pa.string()),
+        ('created_at', pa.timestamp('us')),
+        ('updated_at', pa.timestamp('us')),
+        ('partner_id', pa.string()),
+        ('message', pa.string()),
+    ]),
+    'pagas': pa.schema([
+        ('id_pagas', pa.string()),
+        ('date_pagas', pa.string()),
+        ('undefined_pagas', pa.int64()),
+        ('CPF_pagas', pa.int64()),
+        ('provider_pagas', pa.string()),
+        ('contrato_pagas', pa.string()),
+        ('partiner_pagas', pa.string()),
+        ('proventos_pagas', pa.string()),
+        ('tabela', pa.string()),
+    ]),
+    'storm': pa.schema([
+        ('CPFCliente', pa.string()),
+        ('ADE', pa.int64()),
+        ('CMSRepassada', pa.float64()),
+        ('ValorBase', pa.float64()),
+        ('Numero_Corretor', pa.string()),
+    ]),
+}
+
+# --- Proporções (setembro/2025, parceiro 7560) ---
+
+CONSULTAS_POR_CPF = 2.2
+TAXA_CONVERSAO = 0.007
+
+# Peso de cada CPF ~ lognormal(DISPERSAO_CPF); com SORTEIOS_POR_CPF sorteios por CPF
+# do universo, sobram ~CONSULTAS_POR_CPF consultas por CPF distinto e máximo ~150
+DISPERSAO_CPF = 0.9
+SORTEIOS_POR_CPF = 1.26
+
+# Consultas por hora no ciclo noturno em relação ao diurno
+PESO_NOTURNO = 1.19
+
+PROVIDERS = {'bms': 0.85, 'cartos': 0.15}
+PROPORCAO_COMPLETED = 0.2
+PROPORCAO_ATUALIZADA = 0.1
+ATRASO_ATUALIZACAO_S = 30
+
+# Categorias de ingestao.REFAT_STATUS nas consultas com falha (None: sem mensagem)
+MENSAGENS_FALHA = {
+    None: 0.72,
+    'too many requests': 0.12,
+    'falta autorizacao': 0.06,
+    'Já existe operação': 0.06,
+    'timeout': 0.03,
+    'sem adesão ao SA': 0.01,
+}
+# texto original (como no resultado diário) de cada categoria
+_TEXTO_MENSAGEM = {categoria: texto for texto, categoria in reversed(REFAT_STATUS.items())}
+
+TABELAS = {'9af29ed0-dabd-44ec-b6ed-c70f6f03224c': 0.8, '6f5131ce-801b-4621-b65a-e73b7b34a3ff': 0.2}
+TAC_PERCENTUAL = {20.0: 0.1, 32.0: 0.5, 35.0: 0.3, 44.0: 0.1}
+PARCELAS = [5, 6, 7, 8, 9, 10]
+
+# Valor liberado ~ lognormal (mediana em R$); demais valores proporcionais a ele
+MEDIANA_LIBERADO = 70.0
+DISPERSAO_LIBERADO = 0.9
+FATOR_TAC = 1.6
+FATOR_IOF = 0.045
+FATOR_CMS_REPASSADA = 0.46
+ATRASO_PAGAMENTO_DIAS = 1.5
+
+# Pagas com linha no Storm e linhas de outros corretores (descartadas pelo filtro 7560)
+COBERTURA_STORM = 0.93
+PROPORCAO_EXTERNOS = 0.2
+
+SUBPARCEIROS = (['7560.01'] + [f'7560.01_D{i:03d}' for i in range(1, 111)]
+                + [f'7560_{loja}_D{i:03d}' for loja in (7576, 7589, 7715) for i in range(1, 21)])
+CORRETORES_EXTERNOS = [f'{corretor}.01_D{i:03d}' for corretor in (8123, 9045) for i in range(1, 21)]
+
+# Fluxos independentes dos hashes por linha/CPF
+_FLUXO_ID, _FLUXO_CHAVE, _FLUXO_CPF, _FLUXO_PAGA, _FLUXO_PARCEIRO, _FLUXO_STORM, _FLUXO_CONTRATO = range(7)
+
+_HEX = np.frombuffer(b'0123456789abcdef', dtype=np.uint8)
+_LIMITE_CPFS = 10 ** 9 // 2
+_MULTIPLICADOR_CPF = 387_420_489  # 3^18, primo com 10^9: base do CPF é uma permutação do índice
+_US_DIA = 86_400_000_000
+_US_HORA = 3_600_000_000
+
+
+# --- Hashes e textos vetorizados ---
+
+def _embaralhar(z: np.ndarray) -> np.ndarray:
+    # finalizador do splitmix64 (bijeção de 64 bits)
+    z = (z ^ (z >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+    z = (z ^ (z >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+    return z ^ (z >> np.uint64(31))
+
+
+def _misturar(valores, semente: int, fluxo: int) -> np.ndarray:
+    # 64 bits pseudoaleatórios sem estado, os mesmos para a mesma linha/CPF
+    # qualquer que seja a ordem ou o tamanho dos blocos
+    sal = _embaralhar(np.array([(semente << 8 | fluxo) % 2 ** 64], dtype=np.uint64))
+    return _embaralhar(np.asarray(valores, dtype=np.uint64) * np.uint64(0x9E3779B97F4A7C15) + sal)
+
+
+def _uniforme(valores, semente: int, fluxo: int) -> np.ndarray:
+    return (_misturar(valores, semente, fluxo) >> np.uint64(11)) * 2.0 ** -53
+
+
+def _texto(matriz: np.ndarray) -> pa.Array:
+    # matriz (n, largura) de bytes ASCII -> coluna string do Arrow, sem objetos Python
+    n, largura = matriz.shape
+    binario = pa.FixedSizeBinaryArray.from_buffers(pa.binary(largura), n, [None, pa.py_buffer(np.ascontiguousarray(matriz))])
+    return binario.cast(pa.binary()).cast(pa.string())
+
+
+def _categorias(codigos: np.ndarray, valores: list) -> pa.Array:
+    # códigos -> strings via dicionário do Arrow; código -1 ou valor None vira nulo
+    valores = list(valores)
+    nulos = np.asarray([valor is None for valor in valores] + [True])[codigos]
+    dicionario = pa.array(['' if valor is None else valor for valor in valores], pa.string())
+    indices = pa.array(np.asarray(codigos, dtype=np.int32), mask=nulos)
+    return pa.DictionaryArray.from_arrays(indices, dicionario).cast(pa.string())
+
+
+def _digitos(valores, largura: int) -> np.ndarray:
+    potencias = 10 ** np.arange(largura - 1, -1, -1, dtype=np.int64)
+    return (np.asarray(valores, dtype=np.int64)[:, None] // potencias % 10).astype(np.uint8) + ord('0')
+
+
+def _uuid(chaves, semente: int, fluxo: int) -> pa.Array:
+    chaves = np.asarray(chaves, dtype=np.uint64) * np.uint64(2)
+    bytes_ = np.stack([_misturar(chaves, semente, fluxo), _misturar(chaves + np.uint64(1), semente, fluxo)], axis=1)
+    bytes_ = bytes_.view(np.uint8).copy()
+    bytes_[:, 6] = bytes_[:, 6] & 0x0F | 0x40  # versão 4
+    bytes_[:, 8] = bytes_[:, 8] & 0x3F | 0x80
+    hexa = np.empty((len(chaves), 32), dtype=np.uint8)
+    hexa[:, 0::2] = _HEX[bytes_ >> 4]
+    hexa[:, 1::2] = _HEX[bytes_ & 0x0F]
+    return _texto(np.insert(hexa, [8, 12, 16, 20], ord('-'), axis=1))
+
+
+def cpf_sintetico(indices, semente: int = 0) -> np.ndarray:
+    """CPFs (int64) distintos por índice, com o segundo dígito verificador sempre errado."""
+
+    deslocamento = int(_misturar([0], semente, _FLUXO_CPF)[0] % np.uint64(10 ** 9))
+    base = (np.asarray(indices, dtype=np.int64) * _MULTIPLICADOR_CPF + deslocamento) % 10 ** 9
+    digitos = base[:, None] // 10 ** np.arange(8, -1, -1, dtype=np.int64) % 10
+
+    dv1 = digitos @ np.arange(10, 1, -1) * 10 % 11 % 10
+    dv2 = (digitos @ np.arange(11, 2, -1) + dv1 * 2) * 10 % 11 % 10
+
+    return base * 100 + dv1 * 10 + (dv2 + 1) % 10
+
+
+def _cpf_formatado(cpfs: np.ndarray) -> pa.Array:
+    # 000.000.000-00, como CPFCliente no Storm
+    return _texto(np.insert(_digitos(cpfs, 11), [3, 6, 9], np.array([46, 46, 45], dtype=np.uint8), axis=1))
+
+
+def _contrato(chaves, semente: int) -> pa.Array:
+    # C25 + 4 dígitos + 7 letras, como contrato_pagas
+    hash_ = _misturar(chaves, semente, _FLUXO_CONTRATO)
+    letras = (hash_[:, None] >> (np.arange(7, dtype=np.uint64) * np.uint64(5))) % np.uint64(26)
+    numeros = (hash_ >> np.uint64(40)) % np.uint64(10_000)
+    prefixo = np.broadcast_to(np.frombuffer(b'C25', dtype=np.uint8), (len(hash_), 3))
+    return _texto(np.hstack([prefixo, _digitos(numeros.astype(np.int64), 4), (letras + np.uint64(ord('A'))).astype(np.uint8)]))
+
+
+def _sortear(gerador: np.random.Generator, pesos: dict, n: int) -> np.ndarray:
+    probabilidades = np.asarray(list(pesos.values()), dtype=float)
+    return gerador.choice(len(pesos), n, p=probabilidades / probabilidades.sum())
+
+
+# --- Geração ---
+
+def _proventos(gerador: np.random.Generator, n: int, datas: np.ndarray) -> tuple:
+    liberado = np.round(MEDIANA_LIBERADO * gerador.lognormal(0, DISPERSAO_LIBERADO, n), 2)
+    tac = np.asarray(list(TAC_PERCENTUAL))[_sortear(gerador, TAC_PERCENTUAL, n)]
+    tac_total = np.round(liberado * tac / 100 * FATOR_TAC * gerador.lognormal(0, 0.05, n), 2)
+    iof_total = np.round(liberado * FATOR_IOF * gerador.lognormal(0, 0.05, n), 2)
+    parcelas = gerador.choice(PARCELAS, n)
+    emissao = liberado + tac_total + iof_total
+
+    proventos = [
+        f'{{"tac": {{"Percentual": {t:.1f}}}, "spread": {{"Percentual": 0.0}}, "cet_rate": {1.79 + t / 100:.2f}, '
+        f'"iof_rate": {{"annual": 3.0, "mensal": 0.38}}, "iof_total": {i:.2f}, "tac_total": {tt:.2f}, '
+        f'"installments": {p}, "issue_amount": {e:.2f}, "spread_total": 0.0, "interest_rate": 1.79, '
+        f'"disbursement_date": "{d}", "disbursed_issue_amount": {lib:.2f}}}'
+        for t, i, tt, p, e, d, lib in zip(tac.tolist(), iof_total.tolist(), tac_total.tolist(), parcelas.tolist(),
+                                          emissao.tolist(), datas.tolist(), liberado.tolist())
+    ]
+    return proventos, liberado
+
+
+def _pagas_e_storm(gerador, semente: int, indices, instantes, providers, parceiros, pool: int) -> tuple:
+    # propostas pagas dos CPFs que converteram (no instante da consulta que as originou)
+    # e as linhas correspondentes do Storm, mais linhas de outros corretores
+    n = len(indices)
+    pagamento = instantes + (gerador.exponential(ATRASO_PAGAMENTO_DIAS, n) * _US_DIA).astype(np.int64)
+    datas = pagamento.astype('datetime64[us]').astype('datetime64[D]').astype(str)
+    proventos, liberado = _proventos(gerador, n, datas)
+    cpfs = cpf_sintetico(indices, semente)
+
+    pagas = pa.table([
+        _uuid(indices, semente, _FLUXO_PAGA),
+        pa.array(datas, pa.string()),
+        pa.array(pagamento // 1_000_000),
+        pa.array(cpfs),
+        _categorias(providers, [provider.upper() for provider in PROVIDERS]),
+        _contrato(indices, semente),
+        _categorias(parceiros, SUBPARCEIROS),
+        pa.array(proventos, pa.string()),
+        _categorias(_sortear(gerador, TABELAS, n), TABELAS),
+    ], schema=SCHEMAS['pagas'])
+
+    cobertos = _uniforme(indices, semente, _FLUXO_STORM) < COBERTURA_STORM
+    externos = gerador.poisson(PROPORCAO_EXTERNOS * cobertos.sum())
+    valor_base = np.concatenate([liberado[cobertos], np.round(MEDIANA_LIBERADO * gerador.lognormal(0, DISPERSAO_LIBERADO, externos), 2)])
+    cms = np.round(valor_base * FATOR_CMS_REPASSADA * gerador.lognormal(0, 0.1, len(valor_base)), 2)
+    corretores = np.concatenate([parceiros[cobertos], len(SUBPARCEIROS) + gerador.integers(0, len(CORRETORES_EXTERNOS), externos)])
+    cpfs_storm = np.concatenate([cpfs[cobertos], cpf_sintetico(pool + gerador.integers(0, max(pool, 1), externos), semente)])
+
+    ordem = gerador.permutation(len(valor_base))
+    storm = pa.table([
+        _cpf_formatado(cpfs_storm[ordem]),
+        pa.array(100_000_000 + (_misturar(cpfs_storm[ordem], semente, _FLUXO_CONTRATO) % np.uint64(900_000_000)).astype(np.int64)),
+        pa.array(cms[ordem]),
+        pa.array(valor_base[ordem]),
+        _categorias(corretores[ordem], SUBPARCEIROS + CORRETORES_EXTERNOS),
+    ], schema=SCHEMAS['storm'])
+
+    return pagas, storm
+
+
+def gerar_blocos(linhas: int, semente: int = 0, dias: int = DIAS, inicio: str = INICIO,
+                 taxa_conversao: float = TAXA_CONVERSAO, tamanho_chunk: int = TAMANHO_CHUNK):
+    """Gera `(dia, conjunto, tabela Arrow)` em ordem cronológica, com memória limitada a um dia.
+
+    `conjunto` é 'consultas' (blocos de até `tamanho_chunk` linhas), 'pagas' ou
+    'storm'. Cada CPF que converte gera uma proposta paga na primeira consulta em
+    que aparece (forçada `completed`); a data de pagamento vem alguns dias depois.
+    """
+
+    pool = max(1, int(linhas / SORTEIOS_POR_CPF))
+    if pool > _LIMITE_CPFS:
+        raise ValueError(f"no máximo {int(_LIMITE_CPFS * SORTEIOS_POR_CPF)} linhas")
+
+    prob_paga = min(1.0, taxa_conversao * CONSULTAS_POR_CPF)
+    visto = np.zeros(pool, dtype=bool)
+    pesos_hora = np.where(np.isin(np.arange(24), HORAS_NOTURNO), PESO_NOTURNO, 1.0)
+    pesos_hora /= pesos_hora.sum()
+    inicio_us = np.datetime64(inicio, 'us').astype(np.int64)
+
+    sementes = np.random.SeedSequence(semente).spawn(dias)
+    por_dia = np.random.default_rng(semente).multinomial(linhas, np.full(dias, 1 / dias))
+    primeira_linha = 0
+
+    for dia, n in enumerate(por_dia.tolist()):
+        gerador = np.random.default_rng(sementes[dia])
+        data = str(np.datetime64(inicio, 'D') + dia)
+
+        instantes = inicio_us + dia * _US_DIA + np.sort(
+            gerador.choice(24, n, p=pesos_hora) * _US_HORA + gerador.integers(0, _US_HORA, n))
+        # índice do CPF pela inversa da CDF do peso acumulado: Φ(Φ⁻¹(q) - σ) = u
+        indices = np.minimum((ndtr(ndtri(gerador.random(n)) + DISPERSAO_CPF) * pool).astype(np.int64), pool - 1)
+        providers = _sortear(gerador, PROVIDERS, n)
+        status = (gerador.random(n) >= PROPORCAO_COMPLETED).astype(np.int8)  # 0 completed, 1 failed
+        mensagens = np.where(status == 1, _sortear(gerador, MENSAGENS_FALHA, n), -1)
+        atraso = np.where(gerador.random(n) < PROPORCAO_ATUALIZADA,
+                          (gerador.exponential(ATRASO_ATUALIZACAO_S, n) * 1_000_000).astype(np.int64), 0)
+        parceiros = (_misturar(indices, semente, _FLUXO_PARCEIRO) % np.uint64(len(SUBPARCEIROS))).astype(np.int32)
+
+        # primeira aparição de cada CPF ainda não visto; os que convertem viram pagas
+        novos, primeira = np.unique(indices, return_index=True)
+        primeira = primeira[~visto[novos]]
+        novos = novos[~visto[novos]]
+        visto[novos] = True
+        gatilhos = np.sort(primeira[_uniforme(novos, semente, _FLUXO_PAGA) < prob_paga])
+        status[gatilhos] = 0
+        mensagens[gatilhos] = -1
+
+        for ini in range(0, n, tamanho_chunk):
+            fim = min(ini + tamanho_chunk, n)
+            linhas_globais = np.arange(primeira_linha + ini, primeira_linha + fim)
+            ids = _uuid(linhas_globais, semente, _FLUXO_ID)
+            # provider_key repete o id na BMS; nos demais providers é outro identificador
+            chaves = pc.if_else(pa.array(providers[ini:fim] == 0), ids, _uuid(linhas_globais, semente, _FLUXO_CHAVE))
+            yield data, 'consultas', pa.table([
+                ids,
+                _categorias(providers[ini:fim], PROVIDERS),
+                pa.array(cpf_sintetico(indices[ini:fim], semente)),
+                _categorias(status[ini:fim], ['completed', 'failed']),
+                chaves,
+                pa.array(instantes[ini:fim].astype('datetime64[us]')),
+                pa.array((instantes[ini:fim] + atraso[ini:fim]).astype('datetime64[us]')),
+                _categorias(parceiros[ini:fim], SUBPARCEIROS),
+                _categorias(mensagens[ini:fim], [None if c is None else _TEXTO_MENSAGEM[c] for c in MENSAGENS_FALHA]),
+            ], schema=SCHEMAS['consultas'])
+
+        if len(gatilhos):
+            pagas, storm = _pagas_e_storm(gerador, semente, indices[gatilhos], instantes[gatilhos],
+                                          providers[gatilhos], parceiros[gatilhos], pool)
+            yield data, 'pagas', pagas
+            yield data, 'storm', storm
+
+        primeira_linha += n
+
+
+def amostra(linhas: int, semente: int = 0, **opcoes) -> dict:
+    """Os três conjuntos em memória, como DataFrames (para volumes que cabem na RAM)."""
+
+    blocos = {conjunto: [] for conjunto in SCHEMAS}
+    for _, conjunto, tabela in gerar_blocos(linhas, semente, **opcoes):
+        blocos[conjunto].append(tabela)
+
+    return {
+        conjunto: (pa.concat_tables(tabelas) if tabelas else SCHEMAS[conjunto].empty_table()).to_pandas()
+        for conjunto, tabelas in blocos.items()
+    }
+
+
+# --- Gravação ---
+
+def _gravar_storm_html(tabela: pa.Table, caminho: str):
+    # relatório Storm no formato de origem: tabela HTML com extensão .xls
+    tabela.to_pandas().to_html(caminho, index=False, decimal=',')
+
+
+def gravar_sinteticos(destino: str, linhas: int, semente: int = 0, formato: str = 'parquet',
+                      storm_html: bool = False, **opcoes) -> dict:
+    """Gera e grava os conjuntos bloco a bloco, sem manter o histórico em memória.
+
+    Em 'csv' as consultas saem como `consultas/resultado_AAAA_MM_DD.csv` (entrada de
+    pipeline.atualizar), as pagas como `pagas.csv` sem cabeçalho e o Storm como
+    `storm.csv`; em 'parquet', um arquivo por conjunto, um row group por bloco.
+    Com `storm_html`, o Storm sai como `storm/AAAA-MM-DD.xls` (HTML), um por dia.
+    Retorna as linhas gravadas por conjunto e os caminhos.
+    """
+
+    if formato not in FORMATOS:
+        raise ValueError(f"formato deve ser um de {FORMATOS}")
+
+    caminhos = {
+        'consultas': os.path.join(destino, 'consultas') if formato == 'csv' else os.path.join(destino, 'consultas.parquet'),
+        'pagas': os.path.join(destino, f'pagas.{formato}'),
+        'storm': os.path.join(destino, 'storm') if storm_html else os.path.join(destino, f'storm.{formato}'),
+    }
+    for conjunto, caminho in caminhos.items():
+        os.makedirs(caminho if not os.path.splitext(caminho)[1] else destino, exist_ok=True)
+
+    contagem = {conjunto: 0 for conjunto in SCHEMAS}
+    escritores = {}
+    try:
+        for data, conjunto, tabela in gerar_blocos(linhas, semente, **opcoes):
+            contagem[conjunto] += tabela.num_rows
+
+            if conjunto == 'storm' and storm_html:
+                _gravar_storm_html(tabela, os.path.join(caminhos['storm'], f'{data}.xls'))
+                continue
+
+            chave = conjunto
+            if formato == 'csv' and conjunto == 'consultas':
+                chave = ('consultas', data)
+                anterior = [c for c in escritores if isinstance(c, tuple) and c != chave]
+                for c in anterior:
+                    escritores.pop(c).close()
+
+            if chave not in escritores:
+                schema = SCHEMAS[conjunto]
+                if formato == 'parquet':
+                    escritores[chave] = pq.ParquetWriter(caminhos[conjunto], schema)
+                elif conjunto == 'consultas':
+                    arquivo = os.path.join(caminhos['consultas'], f"resultado_{data.replace('-', '_')}.csv")
+                    escritores[chave] = pacsv.CSVWriter(arquivo, schema, write_options=pacsv.WriteOptions(delimiter=';'))
+                else:
+                    # extração de pagas sem cabeçalho, como pipeline.ler_pagas espera
+                    opcoes_csv = pacsv.WriteOptions(include_header=conjunto != 'pagas')
+                    escritores[chave] = pacsv.CSVWriter(caminhos[conjunto], schema, write_options=opcoes_csv)
+            escritores[chave].write_table(tabela)
+    finally:
+        for escritor in escritores.values():
+            escritor.close()
+
+    return {'linhas': contagem, 'caminhos': caminhos}
+
+
+if __name__ == '__main__':
+    import time
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--linhas', type=int, default=1_000_000)
+    parser.add_argument('--semente', type=int, default=0)
+    parser.add_argument('--dias', type=int, default=DIAS)
+    parser.add_argument('--formato', choices=FORMATOS, default='parquet')
+    parser.add_argument('--storm-html', action='store_true')
+    parser.add_argument('--destino', default=DIRETORIO_SINTETICOS)
+    args = parser.parse_args()
+
+    inicio = time.perf_counter()
+    resumo = gravar_sinteticos(args.destino, args.linhas, args.semente, args.formato, args.storm_html, dias=args.dias)
+    print(pd.Series(resumo['linhas']).to_string())
+    print(f"{time.perf_counter() - inicio:.1f}s -> {os.path.abspath(args.destino)}")
@@ -0,0 +1,195 @@
+"""Solução analítica da curva de retorno marginal e do ponto de platô.
+
+Modelo (mesmas equações da tabela amostrada dos dashboards, sem arredondamento):
+
+    receita(x) = x * taxa_conversao * mcu
+    dif(x)     = receita(x) - custo_consulta * (x - passo) = a*x + b
+    retorno(x) = dif(x) / dif(x - passo) = 1 + a*passo / D(x)
+
+com a = taxa_conversao*mcu - custo_consulta, b = custo_consulta*passo e
+D(x) = dif(x - passo) = a*(x - polo). A variação do retorno entre dois passos é
+
+    delta(x) = |retorno(x) - retorno(x - passo)| = passo**2 / |(x - polo)*(x - polo - passo)|
+
+então o platô (delta < limiar) tem solução fechada: resolver u*(u - passo) = passo**2/limiar
+para u = x - polo. Para curvas sem forma fechada há `plato_numerico`, por bissecção.
+"""
+import math
+
+import numpy as np
+
+# Faixa e passo da tabela original (np.linspace(1000, 75000, 100)), mantidos como
+# padrão para que o LIMIAR conserve o mesmo significado nos dashboards.
+CONSULTA_MIN = 1000.0
+CONSULTA_MAX = 75000.0
+PASSO_PADRAO = (CONSULTA_MAX - CONSULTA_MIN) / 99
+
+
+def _coeficientes(taxa_conversao, mcu, custo_consulta, passo):
+    a = taxa_conversao * mcu - custo_consulta
+    b = custo_consulta * passo
+    return a, b
+
+
+def polo_retorno(taxa_conversao, mcu, custo_consulta, passo=PASSO_PADRAO):
+    """Ponto onde dif(x - passo) = 0 e o retorno marginal diverge; NaN quando dif é constante."""
+    a, b = _coeficientes(taxa_conversao, mcu, custo_consulta, passo)
+    return passo - b / a if a != 0 else np.nan
+
+
+def dif_marginal(x, taxa_conversao, mcu, custo_consulta, passo=PASSO_PADRAO):
+    """Diferença entre a receita em x e o custo do passo anterior (coluna `dif` da tabela)."""
+    a, b = _coeficientes(taxa_conversao, mcu, custo_consulta, passo)
+    return np.multiply(a, x) + b
+
+
+def retorno_marginal(x, taxa_conversao, mcu, custo_consulta, passo=PASSO_PADRAO):
+    """Retorno marginal dif(x) / dif(x - passo), vetorizado; NaN sobre o polo."""
+
+    x = np.asarray(x, dtype=float)
+    dif = dif_marginal(x, taxa_conversao, mcu, custo_consulta, passo)
+    dif_anterior = dif_marginal(x - passo, taxa_conversao, mcu, custo_consulta, passo)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        retorno = np.where(dif_anterior != 0, dif / dif_anterior, np.nan)
+
+    return float(retorno) if retorno.ndim == 0 else retorno
+
+
+def variacao_retorno(x, taxa_conversao, mcu, custo_consulta, passo=PASSO_PADRAO):
+    """Variação absoluta do retorno marginal entre x - passo e x (delta_ret_marginal)."""
+
+    x = np.asarray(x, dtype=float)
+    variacao = np.abs(
+        retorno_marginal(x, taxa_conversao, mcu, custo_consulta, passo)
+        - retorno_marginal(x - passo, taxa_conversao, mcu, custo_consulta, passo)
+    )
+
+    return float(variacao) if variacao.ndim == 0 else variacao
+
+
+def resolver_plato(taxa_conversao, mcu, custo_consulta, limiar,
+                   consulta_min=CONSULTA_MIN, consulta_max=CONSULTA_MAX, passo=PASSO_PADRAO):
+    """Ponto em [consulta_min, consulta_max] a partir do qual delta(x) < limiar até o fim da faixa.
+
+    Retorna dict com `ponto_plato`, `dif_no_plato`, `regime` ('eficiencia' quando
+    dif > 0 no platô, 'ineficiencia' caso contrário) e `polo`; sem platô na faixa,
+    os campos numéricos são NaN e `regime` é None.
+    """
+
+    if limiar <= 0 or passo <= 0 or consulta_max < consulta_min:
+        raise ValueError("limiar e passo devem ser positivos e consulta_max >= consulta_min")
+
+    a, b = _coeficientes(taxa_conversao, mcu, custo_consulta, passo)
+
+    polo = polo_retorno(taxa_conversao, mcu, custo_consulta, passo)
+
+    if a == 0:
+        # dif constante: retorno sempre 1, a curva já nasce no platô
+        ponto_plato = consulta_min
+    else:
+        raiz = math.sqrt(1.0 + 4.0 / limiar)
+        # u*(u - passo) > passo²/limiar vale fora do intervalo [u_esquerda, u_direita]
+        u_esquerda = passo * (1.0 - raiz) / 2.0
+        u_direita = passo * (1.0 + raiz) / 2.0
+
+        if consulta_max <= polo + u_esquerda:
+            # faixa inteira à esquerda do polo, onde a curva já está estável
+            ponto_plato = consulta_min
+        else:
+            ponto_plato = max(consulta_min, polo + u_direita)
+
+    if ponto_plato > consulta_max:
+        return {'ponto_plato': np.nan, 'dif_no_plato': np.nan, 'regime': None, 'polo': polo}
+
+    dif_no_plato = a * ponto_plato + b
+
+    return {
+        'ponto_plato': float(ponto_plato),
+        'dif_no_plato': float(dif_no_plato),
+        'regime': 'eficiencia' if dif_no_plato > 0 else 'ineficiencia',
+        'polo': polo,
+    }
+
+
+def resolver_plato_lote(taxa_conversao, mcu, custo_consulta, limiar,
+                        consulta_min=CONSULTA_MIN, consulta_max=CONSULTA_MAX, passo=PASSO_PADRAO):
+    """Versão vetorizada de `resolver_plato` para muitos cenários de uma vez (arrays por broadcasting).
+
+    Retorna dict de arrays `ponto_plato`, `dif_no_plato`, `polo` (NaN sem platô)
+    e `eficiencia` (bool, dif > 0 no platô).
+    """
+
+    taxa_conversao, mcu, custo_consulta, limiar, consulta_min, consulta_max, passo = np.broadcast_arrays(
+        *[np.asarray(v, dtype=float) for v in (taxa_conversao, mcu, custo_consulta, limiar, consulta_min, consulta_max, passo)]
+    )
+    if np.any(limiar <= 0) or np.any(passo <= 0) or np.any(consulta_max < consulta_min):
+        raise ValueError("limiar e passo devem ser positivos e consulta_max >= consulta_min")
+
+    a, b = _coeficientes(taxa_conversao, mcu, custo_consulta, passo)
+    constante = a == 0
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        polo = np.where(constante, np.nan, passo - b / a)
+
+    raiz = np.sqrt(1.0 + 4.0 / limiar)
+    u_esquerda = passo * (1.0 - raiz) / 2.0
+    u_direita = passo * (1.0 + raiz) / 2.0
+
+    # mesmos casos de resolver_plato: dif constante ou faixa à esquerda do polo já estão no platô
+    ja_estavel = constante | (consulta_max <= polo + u_esquerda)
+    ponto_plato = np.where(ja_estavel, consulta_min, np.maximum(consulta_min, polo + u_direita))
+    ponto_plato = np.where(ponto_plato > consulta_max, np.nan, ponto_plato)
+
+    dif_no_plato = a * ponto_plato + b
+
+    return {
+        'ponto_plato': ponto_plato,
+        'dif_no_plato': dif_no_plato,
+        'eficiencia': dif_no_plato > 0,
+        'polo': polo,
+    }
+
+
+def bisseccao(funcao, inicio, fim, tolerancia=1e-9, max_iter=200):
+    """Raiz de `funcao` em [inicio, fim] por bissecção; exige troca de sinal nos extremos."""
+
+    f_inicio = funcao(inicio)
+    f_fim = funcao(fim)
+    if f_inicio == 0:
+        return inicio
+    if f_fim == 0:
+        return fim
+    if np.sign(f_inicio) == np.sign(f_fim):
+        raise ValueError("a função não troca de sinal no intervalo informado")
+
+    for _ in range(max_iter):
+        meio = (inicio + fim) / 2.0
+        f_meio = funcao(meio)
+        if f_meio == 0 or (fim - inicio) / 2.0 < tolerancia:
+            return meio
+        if np.sign(f_meio) == np.sign(f_inicio):
+            inicio, f_inicio = meio, f_meio
+        else:
+            fim = meio
+
+    return (inicio + fim) / 2.0
+
+
+def plato_numerico(retorno, limiar, consulta_min=CONSULTA_MIN, consulta_max=CONSULTA_MAX,
+                   passo=PASSO_PADRAO, tolerancia=1e-6):
+    """Platô de uma curva de retorno qualquer (callable), por bissecção.
+
+    Supõe que a variação |retorno(x) - retorno(x - passo)| decresce na faixa,
+    como nas curvas de retorno dos modelos de taxa; retorna NaN sem platô.
+    """
+
+    def excesso(x):
+        return abs(retorno(x) - retorno(x - passo)) - limiar
+
+    if excesso(consulta_min) < 0:
+        return float(consulta_min)
+    if excesso(consulta_max) >= 0:
+        return np.nan
+
+    return bisseccao(excesso, consulta_min, consulta_max, tolerancia)
@@ -0,0 +1,188 @@
+"""Carga dos relatórios de comissão Storm (HTML com extensão .xls).
+
+Substitui o laço de visualizacao_dados (read_html arquivo a arquivo, replace em
+ValorBase, pd.concat incremental e `except: print(file)`):
+
+- os relatórios são lidos num pool de processos, e cada processo já devolve só
+  as linhas do corretor (`Numero_Corretor` contendo 7560) nas colunas usadas;
+- o CPF é normalizado de forma vetorizada (juncao_cpf.normalizar_cpf);
+- o resultado de cada arquivo fica em cache pelo hash do conteúdo, então só
+  relatórios novos ou alterados são lidos de novo;
+- falhas vão para um relatório por arquivo em vez de sumirem no console.
+
+A deduplicação por CPF (primeira ocorrência, na ordem dos arquivos) é feita
+depois do filtro do corretor.
+"""
+import hashlib
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+
+from juncao_cpf import CHAVE_INVALIDA, COLUNAS_STORM, cpf_texto, normalizar_cpf
+
+DIRETORIO_STORM = '../../input_data/storm/'
+DIRETORIO_CACHE_STORM = '../../output_data/estado/storm/'
+
+CORRETOR = '7560'
+EXTENSOES = ('.xls', '.html', '.htm')
+
+# Colunas do relatório original usadas na carga
+COLUNAS_RELATORIO = ['CPFCliente', 'ADE', 'CMSRepassada', 'ValorBase', 'Numero_Corretor']
+
+# Muda quando o tratamento muda, invalidando o cache
+VERSAO_CACHE = 1
+
+COLUNAS_RESULTADO = ['arquivo', 'hash', 'linhas_lidas', 'linhas_corretor', 'cpfs_invalidos', 'cache', 'erro']
+
+
+def listar_relatorios(diretorio: str) -> list:
+    """Relatórios do diretório (.xls/.html), em ordem de nome (o nome carrega a data)."""
+    return sorted(
+        os.path.join(diretorio, arquivo)
+        for arquivo in os.listdir(diretorio)
+        if arquivo.lower().endswith(EXTENSOES) and not arquivo.startswith('.~lock')
+    )
+
+
+def _hash_arquivo(caminho: str) -> str:
+    sha = hashlib.sha256()
+    with open(caminho, 'rb') as arquivo:
+        for bloco in iter(lambda: arquivo.read(1 << 20), b''):
+            sha.update(bloco)
+    return sha.hexdigest()
+
+
+def _para_numero(serie: pd.Series) -> pd.Series:
+    # read_html já converte '1.234,56'; o que sobrar como texto (ex.: 'R$ 1.234,56') é tratado aqui
+    if pd.api.types.is_numeric_dtype(serie.dtype):
+        return serie.astype('float64')
+    texto = serie.astype('string').str.replace(r'[^\d,.-]', '', regex=True)
+    texto = texto.str.replace('.', '', regex=False).str.replace(',', '.', regex=False)
+    return pd.to_numeric(texto, errors='coerce').astype('float64')
+
+
+def tratar_relatorio(relatorio: pd.DataFrame, corretor: str = CORRETOR) -> tuple:
+    """Filtra o corretor e padroniza um relatório lido; retorna (storm, CPFs inválidos).
+
+    `storm` tem COLUNAS_STORM (CPF_storm com 11 dígitos) mais ValorBase.
+    """
+
+    faltando = [coluna for coluna in COLUNAS_RELATORIO if coluna not in relatorio.columns]
+    if faltando:
+        raise KeyError(f"colunas ausentes: {', '.join(faltando)}")
+
+    do_corretor = relatorio['Numero_Corretor'].astype('string').str.contains(corretor, regex=False).fillna(False)
+    relatorio = relatorio.loc[do_corretor.to_numpy(dtype=bool), COLUNAS_RELATORIO]
+
+    chaves = normalizar_cpf(relatorio['CPFCliente'])
+    validos = chaves != CHAVE_INVALIDA
+
+    storm = pd.DataFrame({
+        'CPF_storm': cpf_texto(chaves[validos]).to_numpy(),
+        'ADE': relatorio['ADE'].to_numpy()[validos],
+        'CMSRepassada': _para_numero(relatorio['CMSRepassada']).to_numpy()[validos],
+        'ValorBase': _para_numero(relatorio['ValorBase']).to_numpy()[validos],
+    })
+
+    return storm, int((~validos).sum())
+
+
+def _ler_relatorio(args) -> dict:
+    caminho, corretor = args
+    resultado = {'arquivo': os.path.basename(caminho), 'storm': None, 'linhas_lidas': 0, 'cpfs_invalidos': 0, 'erro': None}
+
+    try:
+        relatorio = pd.read_html(caminho, header=0, thousands='.', decimal=',')[0]
+        resultado['linhas_lidas'] = len(relatorio)
+        resultado['storm'], resultado['cpfs_invalidos'] = tratar_relatorio(relatorio, corretor)
+    except (OSError, ValueError, KeyError, ImportError) as erro:  # inclui parser HTML ausente (lxml)
+        resultado['erro'] = f'{type(erro).__name__}: {erro}'
+
+    return resultado
+
+
+def _caminho_cache(diretorio_cache: str, hash_arquivo: str, corretor: str) -> str:
+    return os.path.join(diretorio_cache, f'{hash_arquivo}_{corretor}_v{VERSAO_CACHE}.parquet')
+
+
+def carregar_storm(diretorio: str = DIRETORIO_STORM, corretor: str = CORRETOR, diretorio_cache: str = DIRETORIO_CACHE_STORM,
+                   processos: int = None, arquivos: list = None) -> tuple:
+    """Lê todos os relatórios do diretório e retorna `(storm, relatorio)`.
+
+    `storm` tem uma linha por CPF (primeira ocorrência, na ordem dos arquivos),
+    pronto para `JuncaoCPF.atualizar_storm` / `pipeline.atualizar(storm=...)`.
+    `relatorio` tem uma linha por arquivo: hash, linhas lidas e do corretor,
+    CPFs inválidos, se veio do cache e o erro (None quando a leitura deu certo).
+    Arquivos com erro não entram no cache e são lidos de novo na próxima carga.
+    Com `diretorio_cache=None` o cache não é usado.
+    """
+
+    if arquivos is None:
+        arquivos = listar_relatorios(diretorio)
+
+    hashes = {caminho: _hash_arquivo(caminho) for caminho in arquivos}
+    resultados = {}
+    pendentes = []
+
+    for caminho in arquivos:
+        cache = _caminho_cache(diretorio_cache, hashes[caminho], corretor) if diretorio_cache else None
+        if cache and os.path.exists(cache):
+            storm = pd.read_parquet(cache)
+            resultados[caminho] = {'arquivo': os.path.basename(caminho), 'storm': storm, 'cache': True,
+                                   'linhas_lidas': storm.attrs.get('linhas_lidas'), 'cpfs_invalidos': storm.attrs.get('cpfs_invalidos'), 'erro': None}
+        else:
+            pendentes.append(caminho)
+
+    if processos is None:
+        processos = min(os.cpu_count() or 1, len(pendentes))
+
+    tarefas = [(caminho, corretor) for caminho in pendentes]
+    if processos > 1:
+        with ProcessPoolExecutor(max_workers=processos) as executor:
+            lidos = list(executor.map(_ler_relatorio, tarefas))
+    else:
+        lidos = [_ler_relatorio(tarefa) for tarefa in tarefas]
+
+    for caminho, resultado in zip(pendentes, lidos):
+        resultado['cache'] = False
+        resultados[caminho] = resultado
+        if resultado['erro'] is None and diretorio_cache:
+            os.makedirs(diretorio_cache, exist_ok=True)
+            storm = resultado['storm']
+            storm.attrs = {'linhas_lidas': resultado['linhas_lidas'], 'cpfs_invalidos': resultado['cpfs_invalidos']}
+            storm.to_parquet(_caminho_cache(diretorio_cache, hashes[caminho], corretor), index=False)
+
+    blocos = [resultados[caminho]['storm'] for caminho in arquivos if resultados[caminho]['storm'] is not None]
+    if blocos:
+        storm = pd.concat(blocos, ignore_index=True)
+        storm = storm.drop_duplicates(subset='CPF_storm', keep='first', ignore_index=True)
+    else:
+        storm = pd.DataFrame(columns=COLUNAS_STORM + ['ValorBase'])
+    storm.attrs = {}
+
+    relatorio = pd.DataFrame([
+        {
+            'arquivo': resultados[caminho]['arquivo'],
+            'hash': hashes[caminho],
+            'linhas_lidas': resultados[caminho]['linhas_lidas'],
+            'linhas_corretor': None if resultados[caminho]['storm'] is None else len(resultados[caminho]['storm']),
+            'cpfs_invalidos': resultados[caminho]['cpfs_invalidos'],
+            'cache': resultados[caminho]['cache'],
+            'erro': resultados[caminho]['erro'],
+        }
+        for caminho in arquivos
+    ], columns=COLUNAS_RESULTADO)
+
+    return storm, relatorio
+
+
+if __name__ == '__main__':
+    import sys
+
+    diretorio = sys.argv[1] if len(sys.argv) > 1 else DIRETORIO_STORM
+    storm, relatorio = carregar_storm(diretorio)
+    print(relatorio.drop(columns='hash').to_string(index=False))
+    print(f"{len(storm)} CPFs do corretor {CORRETOR} em {len(relatorio)} relatórios")
+    for erro in relatorio.loc[relatorio['erro'].notna()].itertuples():
+        print(f"falha em {erro.arquivo}: {erro.erro}")
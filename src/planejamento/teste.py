@@ -1,24 +1,10 @@
 import streamlit as st
-import pandas as pd
-import matplotlib.pyplot as plt
-import numpy as np
 
 # --- 1. Definição da Função de Cálculo ---
-def calcular_mcu(tac, spread, averbacao, formalizacao, comissao1, comissao2, qtd_consulta, valor_por_consulta):
-    """Calcula a Margem de Contribuição Unitária (MCU)."""
-    
-    # 1. Receita Bruta (RB)
-    receita_bruta = tac + spread
-    
-    # 2. Custos Variáveis (CV)
-    custos_variaveis_fixos = averbacao + formalizacao + comissao1 + comissao2
-    custo_consulta = qtd_consulta * valor_por_consulta
-    custos_variaveis_total = custos_variaveis_fixos + custo_consulta
-    
-    # 3. Margem de Contribuição Unitária (MCU)
-    mcu = receita_bruta - custos_variaveis_total
-    
-    return mcu, receita_bruta, custos_variaveis_total
+from mcu import calcular_mcu
+from calculos import ponto_ruptura, tornado_sensibilidade
+from graficos import ALTAIR_DISPONIVEL, grafico_mcu_altair, grafico_tornado_altair, imagem_mapa_calor, imagem_mcu, imagem_tornado
+from sensibilidade import METRICAS, PARAMETROS, PONTOS_MAPA
 
 # --- 2. Configuração do Streamlit ---
 st.set_page_config(layout="wide", page_title="Análise da Margem de Contribuição")
@@ -55,13 +41,64 @@ st.sidebar.subheader("Custo Variável por Consulta")
 valor_por_consulta = st.sidebar.number_input("Custo por Consulta (R$)", min_value=0.01, value=valor_consulta_default, step=0.01, format="%.2f")
 qtd_consulta_teste = st.sidebar.slider("Quantidade de Consultas para Teste", min_value=1, max_value=150, value=qtd_consulta_teste_default)
 max_consultas_grafico = st.sidebar.slider("Máximo de Consultas no Gráfico", min_value=20, max_value=200, value=70)
+# Vega-Lite envia só os dados e desenha no navegador; sem altair, imagem PNG memoizada
+render_navegador = ALTAIR_DISPONIVEL and st.sidebar.checkbox("Gráficos interativos (no navegador)", value=False)
 
-
-# --- 4. Execução do Cálculo para o cenário atual ---
+st.sidebar.markdown("---")
+modo = st.sidebar.radio("Modo", ["Cenário atual", "Sensibilidade"], horizontal=True)
+
+
+# --- 4. Modo Sensibilidade (todos os parâmetros variando em ± faixa em torno do cenário atual) ---
+
+if modo == "Sensibilidade":
+    base = {'tac': tac, 'spread': spread, 'averbacao': averbacao, 'formalizacao': formalizacao, 'comissao1': comissao1,
+            'comissao2': comissao2, 'qtd_consulta': qtd_consulta_teste, 'valor_por_consulta': valor_por_consulta}
+
+    st.header("🌪️ Sensibilidade da MCU e do Ponto de Ruptura")
+    col1, col2 = st.columns(2)
+    with col1:
+        variacao = st.slider("Variação de cada parâmetro (±%)", min_value=1, max_value=50, value=20) / 100
+    with col2:
+        metrica = st.radio("Métrica", list(METRICAS), format_func=METRICAS.get, horizontal=True)
+
+    # Tabela e gráficos memoizados pelo cenário e pela faixa (calculos.py / graficos.py)
+    tabela = tornado_sensibilidade(base, variacao, metrica)
+    if render_navegador:
+        st.altair_chart(grafico_tornado_altair(base, variacao, metrica), use_container_width=True)
+    else:
+        st.image(imagem_tornado(base, variacao, metrica))
+
+    st.subheader("Elasticidades")
+    st.caption("Variação % da saída para 1% de variação no parâmetro, medida entre as pontas da faixa.")
+    st.dataframe(
+        tabela[['rotulo', 'base', 'mcu_inferior', 'mcu_superior', 'elasticidade_mcu', 'ruptura_inferior', 'ruptura_superior', 'elasticidade_ruptura']]
+        .rename(columns={'rotulo': 'Parâmetro', 'base': 'Valor atual', 'mcu_inferior': 'MCU (-)', 'mcu_superior': 'MCU (+)',
+                         'elasticidade_mcu': 'Elasticidade MCU', 'ruptura_inferior': 'Ruptura (-)', 'ruptura_superior': 'Ruptura (+)',
+                         'elasticidade_ruptura': 'Elasticidade Ruptura'}),
+        hide_index=True, use_container_width=True,
+    )
+
+    st.subheader("Mapa de calor de um par de parâmetros")
+    nomes = list(PARAMETROS)
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        parametro_x = st.selectbox("Eixo X", nomes, index=nomes.index('spread'), format_func=PARAMETROS.get)
+    with col2:
+        opcoes_y = [n for n in nomes if n != parametro_x]
+        parametro_y = st.selectbox("Eixo Y", opcoes_y, index=opcoes_y.index('comissao1') if 'comissao1' in opcoes_y else 0, format_func=PARAMETROS.get)
+    with col3:
+        pontos_mapa = st.select_slider("Resolução da grade", options=[50, 100, 200, 300], value=PONTOS_MAPA)
+    st.image(imagem_mapa_calor(base, parametro_x, parametro_y, variacao, metrica, pontos_mapa))
+    st.caption(f"{pontos_mapa * pontos_mapa:,} cenários; a linha tracejada é a fronteira MCU = 0.")
+
+    st.stop()
+
+
+# --- 5. Execução do Cálculo para o cenário atual ---
 
 mcu_atual, rb_atual, cv_atual = calcular_mcu(tac, spread, averbacao, formalizacao, comissao1, comissao2, qtd_consulta_teste, valor_por_consulta)
 
-# --- 5. Exibição dos Indicadores Chave ---
+# --- 6. Exibição dos Indicadores Chave ---
 
 col1, col2, col3, col4 = st.columns(4)
 
@@ -72,18 +109,10 @@ with col2:
 with col3:
     st.metric("MCU Atual (com {qtd_consulta_teste} consultas)", f"R$ {mcu_atual:,.2f}", delta="Positiva" if mcu_atual > 0 else "Negativa")
 
-# Determinação e exibição do Ponto de Ruptura
-custos_fixos_sem_consulta = averbacao + formalizacao + comissao1 + comissao2
-margem_disponivel_para_consulta = rb_atual - custos_fixos_sem_consulta
-
-if margem_disponivel_para_consulta > 0 and valor_por_consulta > 0:
-    ponto_ruptura = margem_disponivel_para_consulta / valor_por_consulta
-    # Arredonda para cima para garantir que a MCU não seja zero/negativa
-    ponto_ruptura_int = int(np.floor(ponto_ruptura))
-    
-    # Recalcula a MCU no limite (ponto de ruptura)
-    mcu_ruptura, _, _ = calcular_mcu(tac, spread, averbacao, formalizacao, comissao1, comissao2, ponto_ruptura_int, valor_por_consulta)
+# Determinação e exibição do Ponto de Ruptura (memoizado em calculos.py)
+ponto_ruptura_int, mcu_ruptura = ponto_ruptura(tac, spread, averbacao, formalizacao, comissao1, comissao2, valor_por_consulta)
 
+if ponto_ruptura_int is not None:
     with col4:
         st.metric("Ponto de Ruptura (Máx. Consultas)", f"{ponto_ruptura_int} consultas", help=f"A partir de {ponto_ruptura_int + 1} consultas, a MCU se torna negativa. MCU no limite: R$ {mcu_ruptura:.2f}")
 
@@ -94,46 +123,16 @@ else:
 
 st.markdown("---")
 
-# --- 6. Geração do Gráfico de Tendência da MCU ---
+# --- 7. Geração do Gráfico de Tendência da MCU ---
 
 st.header("📈 Tendência da Margem de Contribuição Unitária (MCU)")
 st.subheader("MCU em função do número de consultas")
 
-# Criação dos dados para o gráfico
-consultas = np.arange(1, max_consultas_grafico + 1)
-mcus = []
-
-for q in consultas:
-    mcu, _, _ = calcular_mcu(tac, spread, averbacao, formalizacao, comissao1, comissao2, q, valor_por_consulta)
-    mcus.append(mcu)
-
-df_mcu = pd.DataFrame({'Consultas': consultas, 'MCU': mcus})
-
-# Criação do Gráfico
-fig, ax = plt.subplots(figsize=(10, 5))
-
-# Plot da MCU
-ax.plot(df_mcu['Consultas'], df_mcu['MCU'], marker='o', linestyle='-', color='skyblue', label='MCU por Consulta')
-
-# Linha de Zero (Ponto de Equilíbrio)
-ax.axhline(0, color='red', linestyle='--', linewidth=2, label='Ponto de Equilíbrio (MCU=0)')
-
-# Linha vertical no Ponto de Ruptura (se aplicável)
-if 'ponto_ruptura_int' in locals():
-    # Desenha o Ponto de Ruptura (Máximo de Consultas Viável)
-    ax.axvline(ponto_ruptura_int, color='green', linestyle=':', linewidth=2, label=f'Máximo Viável ({ponto_ruptura_int})')
-    # Marca a MCU atual
-    ax.plot(qtd_consulta_teste, mcu_atual, 'o', color='purple', markersize=8, label=f'Cenário Atual ({qtd_consulta_teste} consultas)')
-
-
-ax.set_title(f'MCU em Função do Número de Consultas (Máx. {max_consultas_grafico})')
-ax.set_xlabel('Quantidade de Consultas por Contrato')
-ax.set_ylabel('Margem de Contribuição Unitária (R$)')
-ax.grid(True, linestyle='--')
-ax.legend()
-plt.tight_layout()
-
-st.pyplot(fig)
+# Gráfico memoizado pelos parâmetros de entrada (graficos.py)
+if render_navegador:
+    st.altair_chart(grafico_mcu_altair(tac, spread, averbacao, formalizacao, comissao1, comissao2, valor_por_consulta, qtd_consulta_teste, max_consultas_grafico), use_container_width=True)
+else:
+    st.image(imagem_mcu(tac, spread, averbacao, formalizacao, comissao1, comissao2, valor_por_consulta, qtd_consulta_teste, max_consultas_grafico))
 
 st.markdown(f"""
 <div style="background-color: #f0f2f6; padding: 10px; border-radius: 5px;">
@@ -1,27 +1,20 @@
 import streamlit as st
-import pandas as pd
-import matplotlib.pyplot as plt
 import numpy as np
-import statsmodels.api as sm
 
 # --- 1. Definição da Função de Cálculo ---
-def calcular_mcu(tac, spread, averbacao, formalizacao, comissao1, comissao2, qtd_consulta, valor_por_consulta):
-    """Calcula a Margem de Contribuição Unitária (MCU)."""
-    
-    # 1. Receita Bruta (RB)
-    receita_bruta = tac + spread
-    
-    # 2. Custos Variáveis (CV)
-    custos_variaveis_fixos = averbacao + formalizacao + comissao1 + comissao2
-    custo_consulta = qtd_consulta * valor_por_consulta
-    custos_variaveis_total = custos_variaveis_fixos + custo_consulta
-    
-    # 3. Margem de Contribuição Unitária (MCU)
-    mcu = receita_bruta - custos_variaveis_total
-    
-    return mcu, receita_bruta, custos_variaveis_total
-
-negbin_model = sm.load("negbin_model.pkl")
+from mcu import calcular_mcu
+from calculos import detectar_plato, ponto_ruptura, simulacao_lucro
+from instrumentacao import ler_metricas, painel_streamlit
+from graficos import ALTAIR_DISPONIVEL, grafico_mcu_altair, grafico_plato_altair, grafico_simulacao_altair, imagem_mcu, imagem_plato, imagem_simulacao
+from modelos import obter_modelo
+from previsao import consultas_previstas_dia
+from simulacao import margem_por_contrato
+
+# Carregado uma vez por processo; recarrega só se o arquivo mudar
+negbin_model = obter_modelo("negbin_model.json")
+
+# Consultas previstas para as próximas 24h (previsao.py); None sem estado salvo
+consultas_previstas = consultas_previstas_dia()
 
 # --- 2. Configuração do Streamlit ---
 st.set_page_config(layout="wide", page_title="Análise da Margem de Contribuição")
@@ -58,6 +51,8 @@ st.sidebar.subheader("Custo Variável por Consulta")
 valor_por_consulta = st.sidebar.number_input("Custo por Consulta (R$)", min_value=0.01, value=valor_consulta_default, step=0.01, format="%.2f")
 qtd_consulta_teste = st.sidebar.slider("Quantidade de Consultas para Teste", min_value=1, max_value=150, value=qtd_consulta_teste_default)
 max_consultas_grafico = st.sidebar.slider("Máximo de Consultas no Gráfico", min_value=20, max_value=200, value=70)
+# Vega-Lite envia só os dados e desenha no navegador; sem altair, imagem PNG memoizada
+render_navegador = ALTAIR_DISPONIVEL and st.sidebar.checkbox("Gráficos interativos (no navegador)", value=False)
 
 
 # --- 4. Execução do Cálculo para o cenário atual ---
@@ -75,18 +70,10 @@ with col2:
 with col3:
     st.metric("MCU Atual (com {qtd_consulta_teste} consultas)", f"R$ {mcu_atual:,.2f}", delta="Positiva" if mcu_atual > 0 else "Negativa")
 
-# Determinação e exibição do Ponto de Ruptura
-custos_fixos_sem_consulta = averbacao + formalizacao + comissao1 + comissao2
-margem_disponivel_para_consulta = rb_atual - custos_fixos_sem_consulta
-
-if margem_disponivel_para_consulta > 0 and valor_por_consulta > 0:
-    ponto_ruptura = margem_disponivel_para_consulta / valor_por_consulta
-    # Arredonda para cima para garantir que a MCU não seja zero/negativa
-    ponto_ruptura_int = int(np.floor(ponto_ruptura))
-    
-    # Recalcula a MCU no limite (ponto de ruptura)
-    mcu_ruptura, _, _ = calcular_mcu(tac, spread, averbacao, formalizacao, comissao1, comissao2, ponto_ruptura_int, valor_por_consulta)
+# Determinação e exibição do Ponto de Ruptura (memoizado em calculos.py)
+ponto_ruptura_int, mcu_ruptura = ponto_ruptura(tac, spread, averbacao, formalizacao, comissao1, comissao2, valor_por_consulta)
 
+if ponto_ruptura_int is not None:
     with col4:
         st.metric("Ponto de Ruptura (Máx. Consultas)", f"{ponto_ruptura_int} consultas", help=f"A partir de {ponto_ruptura_int + 1} consultas, a MCU se torna negativa. MCU no limite: R$ {mcu_ruptura:.2f}")
 
@@ -102,41 +89,11 @@ st.markdown("---")
 st.header("📈 Tendência da Margem de Contribuição Unitária (MCU)")
 st.subheader("MCU em função do número de consultas")
 
-# Criação dos dados para o gráfico
-consultas = np.arange(1, max_consultas_grafico + 1)
-mcus = []
-
-for q in consultas:
-    mcu, _, _ = calcular_mcu(tac, spread, averbacao, formalizacao, comissao1, comissao2, q, valor_por_consulta)
-    mcus.append(mcu)
-
-df_mcu = pd.DataFrame({'Consultas': consultas, 'MCU': mcus})
-
-# Criação do Gráfico
-fig, ax = plt.subplots(figsize=(10, 5))
-
-# Plot da MCU
-ax.plot(df_mcu['Consultas'], df_mcu['MCU'], marker='o', linestyle='-', color='skyblue', label='MCU por Consulta')
-
-# Linha de Zero (Ponto de Equilíbrio)
-ax.axhline(0, color='red', linestyle='--', linewidth=2, label='Ponto de Equilíbrio (MCU=0)')
-
-# Linha vertical no Ponto de Ruptura (se aplicável)
-if 'ponto_ruptura_int' in locals():
-    # Desenha o Ponto de Ruptura (Máximo de Consultas Viável)
-    ax.axvline(ponto_ruptura_int, color='green', linestyle=':', linewidth=2, label=f'Máximo Viável ({ponto_ruptura_int})')
-    # Marca a MCU atual
-    ax.plot(qtd_consulta_teste, mcu_atual, 'o', color='purple', markersize=8, label=f'Cenário Atual ({qtd_consulta_teste} consultas)')
-
-
-ax.set_title(f'MCU em Função do Número de Consultas (Máx. {max_consultas_grafico})')
-ax.set_xlabel('Quantidade de Consultas por Contrato')
-ax.set_ylabel('Margem de Contribuição Unitária (R$)')
-ax.grid(True, linestyle='--')
-ax.legend()
-plt.tight_layout()
-
-st.pyplot(fig)
+# Gráfico memoizado pelos parâmetros de entrada (graficos.py)
+if render_navegador:
+    st.altair_chart(grafico_mcu_altair(tac, spread, averbacao, formalizacao, comissao1, comissao2, valor_por_consulta, qtd_consulta_teste, max_consultas_grafico), use_container_width=True)
+else:
+    st.image(imagem_mcu(tac, spread, averbacao, formalizacao, comissao1, comissao2, valor_por_consulta, qtd_consulta_teste, max_consultas_grafico))
 
 st.markdown(f"""
 <div style="background-color: #f0f2f6; padding: 10px; border-radius: 5px;">
@@ -154,10 +111,6 @@ st.markdown(f"""
 # negbin_model = smf.glm(formula="qtd_finalizadas ~ qtd_nao_finalizadas + 0", data=df, family=sm.families.NegativeBinomial()).fit()
 
 # --- Cabeçalho ---
-import streamlit as st
-import pandas as pd
-import numpy as np
-import matplotlib.pyplot as plt
 
 st.header("📉 Curva de Retorno Marginal e Ponto de Platô")
 
@@ -197,8 +150,9 @@ with st.expander("⚙️ Ajustar parâmetros do modelo"):
             "Qtd Atual de Consultas",
             min_value=1000.0,
             max_value=75000.0,
-            value=10000.0,
-            step=500.0
+            value=10000.0 if consultas_previstas is None else float(np.clip(round(consultas_previstas / 500) * 500, 1000, 75000)),
+            step=500.0,
+            help=None if consultas_previstas is None else f"Previsão para as próximas 24h: {consultas_previstas:,.0f} consultas"
         )
 
 # ===============================
@@ -206,89 +160,19 @@ with st.expander("⚙️ Ajustar parâmetros do modelo"):
 # ===============================
 LIMIAR = 0.001
 
-dados = pd.DataFrame({"consulta": np.linspace(1000, 75000, 100)})
-dados["custo"] = dados["consulta"] * CUSTO_CONSULTA
-dados["mcu"] = round((dados["consulta"]) * MCU, 2)
-dados["dif"] = round(dados["mcu"] - dados["custo"].shift(), 2)
-dados["retorno_dif"] = round(dados["dif"] / dados["dif"].shift(), 2)
-dados["retorno_dif_smooth"] = dados["retorno_dif"].rolling(window=3, center=True).mean()
-dados["delta_ret_marginal_smooth"] = dados["retorno_dif_smooth"].diff().abs()
-dados = dados.iloc[2:, :]
-
-# --- Detecção do platô ---
-plato = dados[dados["delta_ret_marginal_smooth"] < LIMIAR]
-if not plato.empty:
-    ponto_plato = plato.iloc[0]["consulta"]
-    dif_no_plato = dados.loc[dados["consulta"] >= ponto_plato, "dif"].iloc[0]
-else:
-    ponto_plato = np.nan
-    dif_no_plato = np.nan
+# Nesta versão o MCU do slider já é por consulta (sem taxa de conversão)
+TAXA_MODELO = 1.0
 
-# ===============================
-# 🎯 IDENTIFICAÇÃO DO CENÁRIO ATUAL
-# ===============================
-# Localiza o valor mais próximo de MEAN_CONSULTA
-idx_atual = (dados["consulta"] - MEAN_CONSULTA).abs().idxmin()
-retorno_atual = dados.loc[idx_atual, "retorno_dif_smooth"]
+# Tabela, platô e gráfico memoizados pelos parâmetros normalizados (calculos.py / graficos.py)
+ponto_plato, dif_no_plato = detectar_plato(TAXA_MODELO, MCU, CUSTO_CONSULTA, LIMIAR)
 
 # ===============================
 # 📊 GRÁFICO
 # ===============================
-fig, ax = plt.subplots(figsize=(10, 5))
-
-# Linha principal
-ax.plot(
-    dados["consulta"],
-    dados["retorno_dif_smooth"],
-    color='blue',
-    linestyle='--',
-    linewidth=2,
-    label="Retorno Suavizado"
-)
-
-# Região e linha do platô
-if not np.isnan(ponto_plato):
-    if dif_no_plato > 0:
-        cor_plato = "lightgreen"
-        texto_plato = "Platô da Eficiência (Lucro)"
-        cor_linha = "green"
-    else:
-        cor_plato = "lightcoral"
-        texto_plato = "Platô da Ineficiência (Prejuízo)"
-        cor_linha = "red"
-
-    ax.axvspan(ponto_plato, dados["consulta"].max(), color=cor_plato, alpha=0.3, label=texto_plato)
-    ax.axvline(x=ponto_plato, color=cor_linha, linestyle=':', linewidth=2, label=f"Ponto de Platô ({int(ponto_plato)})")
-
-# --- Marca o ponto atual ---
-ax.scatter(
-    MEAN_CONSULTA, retorno_atual,
-    s=120, color='purple', edgecolor='white', zorder=5,
-    label=f"Cenário Atual ({int(MEAN_CONSULTA)} consultas)"
-)
-
-# Linha vertical tracejada do cenário atual
-ax.axvline(x=MEAN_CONSULTA, color='purple', linestyle='--', alpha=0.6)
-
-# Texto com seta para o ponto
-ax.annotate(
-    f"{int(MEAN_CONSULTA)} consultas\nRetorno: {retorno_atual:.2f}",
-    xy=(MEAN_CONSULTA, retorno_atual),
-    xytext=(MEAN_CONSULTA + 5000, retorno_atual + 0.05),
-    arrowprops=dict(arrowstyle="->", color='purple'),
-    color='purple',
-    fontsize=9,
-    bbox=dict(boxstyle="round,pad=0.3", fc="lavender", ec="purple", alpha=0.6)
-)
-
-# --- Estilo geral ---
-ax.set_xlabel("Número de Consultas")
-ax.set_ylabel("Retorno marginal (ΔDif / ΔDif anterior)")
-ax.set_title("Curva de Retorno Marginal com Identificação de Eficiência, Ineficiência e Cenário Atual")
-ax.legend()
-ax.grid(True, linestyle='--', alpha=0.6)
-
-st.pyplot(fig)
+if render_navegador:
+    st.altair_chart(grafico_plato_altair(TAXA_MODELO, MCU, CUSTO_CONSULTA, MEAN_CONSULTA, LIMIAR), use_container_width=True)
+else:
+    st.image(imagem_plato(TAXA_MODELO, MCU, CUSTO_CONSULTA, MEAN_CONSULTA, LIMIAR))
 
 # ===============================
 # 🧭 FEEDBACK DINÂMICO
@@ -311,3 +195,41 @@ st.markdown(f"""
 - Custo por Consulta: `R$ {CUSTO_CONSULTA:.2f}`
 - Consultas Atuais: `{int(MEAN_CONSULTA)}`
 """)
+
+# ===============================
+# 🎲 SIMULAÇÃO MONTE CARLO (MODELO NEGBIN)
+# ===============================
+st.subheader("🎲 Lucro Simulado com o Modelo Binomial Negativo")
+st.markdown(f"Contratos pagos sorteados do modelo ajustado (taxa `{negbin_model.taxa:.4f}`, alpha `{negbin_model.alpha:.2f}`); a margem por contrato vem dos parâmetros financeiros da barra lateral.")
+
+col_sim1, col_sim2 = st.columns(2)
+with col_sim1:
+    SORTEIOS = st.select_slider("Sorteios por volume", options=[10_000, 50_000, 100_000, 500_000], value=100_000)
+with col_sim2:
+    SEMENTE = st.number_input("Semente", min_value=0, value=42, step=1)
+
+margem_contrato = margem_por_contrato(tac, spread, averbacao, formalizacao, comissao1, comissao2)
+
+args_simulacao = (negbin_model.taxa, negbin_model.alpha, margem_contrato, CUSTO_CONSULTA, MEAN_CONSULTA, SORTEIOS, int(SEMENTE))
+if render_navegador:
+    st.altair_chart(grafico_simulacao_altair(*args_simulacao), use_container_width=True)
+else:
+    st.image(imagem_simulacao(*args_simulacao))
+
+cenario = simulacao_lucro(negbin_model.taxa, negbin_model.alpha, margem_contrato, CUSTO_CONSULTA, (MEAN_CONSULTA,), SORTEIOS, int(SEMENTE)).iloc[0]
+
+col_p5, col_p50, col_p95, col_prej = st.columns(4)
+with col_p5:
+    st.metric("Lucro P5", f"R$ {cenario['lucro_p5']:,.2f}")
+with col_p50:
+    st.metric("Lucro P50", f"R$ {cenario['lucro_p50']:,.2f}")
+with col_p95:
+    st.metric("Lucro P95", f"R$ {cenario['lucro_p95']:,.2f}")
+with col_prej:
+    st.metric("Prob. de Prejuízo", f"{cenario['prob_prejuizo']:.1%}", help=f"Com {int(MEAN_CONSULTA)} consultas e margem de R$ {margem_contrato:.2f} por contrato pago.")
+
+# ===============================
+# ⏱️ DESEMPENHO DO PIPELINE
+# ===============================
+with st.expander("⏱️ Desempenho do pipeline (execuções instrumentadas)"):
+    painel_streamlit(ler_metricas())